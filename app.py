@@ -6,9 +6,13 @@ import os
 from datetime import datetime
 import locale
 from utils.zip_handler import ZipHandler
+from utils.member_cache import MemberCache
 from utils.csv_processor import CSVProcessor
-from utils.langchain_agent import LangChainAIAgent
-from utils.database import DatabaseManager
+from utils.ai_agent import AIAgent
+from utils.database import DatabaseManager, DEFAULT_INGEST_WORKERS, INVOICE_PAGE_ROWS, invoice_cursor
+
+# Most recent invoices given to the assistant; totals come from the rollups
+AI_CONTEXT_INVOICES = 5000
 
 # Configure locale for Brazilian number formatting
 try:
@@ -38,6 +42,17 @@ def main():
         st.session_state.chat_history = []
     if 'db_manager' not in st.session_state:
         st.session_state.db_manager = None
+    if 'processed_archives' not in st.session_state:
+        st.session_state.processed_archives = set()
+    if 'incomplete_uploads' not in st.session_state:
+        # Uploads loaded with unreadable members: not recorded, so only a new upload retries them
+        st.session_state.incomplete_uploads = set()
+    if 'upload_warnings' not in st.session_state:
+        # Warnings of streamed uploads, shown again on the reruns that follow the load
+        st.session_state.upload_warnings = {}
+    if 'processor' not in st.session_state:
+        # One processor per session, so profiles computed for a dataset are reused across reruns
+        st.session_state.processor = CSVProcessor()
     
     # Initialize database with retry logic
     if st.session_state.db_manager is None:
@@ -85,25 +100,88 @@ def main():
         
         if uploaded_file is not None:
             try:
-                with st.spinner("Extraindo arquivo ZIP..."):
-                    zip_handler = ZipHandler()
-                    csv_files = zip_handler.extract_csv_files(uploaded_file)
-                    
-                if csv_files:
-                    st.success(f"Encontrados {len(csv_files)} arquivos CSV")
-                    
-                    # Save to database
-                    if st.session_state.db_manager:
-                        with st.spinner("Salvando dados no banco..."):
-                            try:
-                                st.session_state.db_manager.save_csv_data(csv_files)
-                                st.success("✅ Dados atualizados no banco")
-                                st.rerun()  # Reload to show updated data
-                            except Exception as e:
-                                st.error(f"Erro ao salvar no banco: {str(e)}")
+                zip_handler = ZipHandler(cache=MemberCache())
+                fingerprint = zip_handler.get_archive_fingerprint(uploaded_file)
+                upload_id = getattr(uploaded_file, 'file_id', fingerprint)
+                for message in st.session_state.upload_warnings.get(upload_id, []):
+                    st.warning(message)
                     
+                # Reruns keep the same upload: skip archives already extracted and saved
+                if fingerprint in st.session_state.processed_archives:
+                    st.caption(f"✅ {uploaded_file.name} já processado")
+                elif upload_id in st.session_state.incomplete_uploads:
+                    st.caption(f"⚠️ {uploaded_file.name} importado com arquivos ilegíveis; envie-o novamente para tentar de novo")
+                elif st.session_state.db_manager and st.session_state.db_manager.is_archive_ingested(fingerprint):
+                    st.session_state.processed_archives.add(fingerprint)
+                    st.info(f"ℹ️ {uploaded_file.name} já foi importado anteriormente")
                 else:
-                    st.error("Nenhum arquivo CSV encontrado no ZIP")
+                    # Size the archive from its central directory before decompressing it
+                    manifest = zip_handler.preflight(uploaded_file)
+                    size_mb = manifest['total_size'] / 1024 / 1024
+                    
+                    if manifest['mode'] == 'reject':
+                        st.error(f"Arquivo ZIP recusado: {'; '.join(manifest['reasons'])}")
+                    elif manifest['mode'] == 'offline':
+                        st.warning(
+                            f"Arquivo muito grande para a interface ({size_mb:,.0f} MB, "
+                            f"~{manifest['estimated_rows']:,} linhas). "
+                            "Importe pela linha de comando: `python ingest_archives.py <arquivo.zip>`"
+                        )
+                    elif manifest['mode'] == 'streaming':
+                        if st.session_state.db_manager:
+                            # Too large to hold in memory: stream bounded chunks straight into the database
+                            with st.spinner(f"Importando {size_mb:,.0f} MB em blocos..."):
+                                try:
+                                    st.session_state.db_manager.save_csv_data(
+                                        zip_handler.iter_csv_chunks(uploaded_file),
+                                        fingerprint=fingerprint,
+                                        archive_name=uploaded_file.name,
+                                        workers=DEFAULT_INGEST_WORKERS,
+                                        complete=lambda: not zip_handler.failed_members()
+                                    )
+                                    if zip_handler.failed_members():
+                                        st.session_state.incomplete_uploads.add(upload_id)
+                                    else:
+                                        st.session_state.processed_archives.add(fingerprint)
+                                    st.session_state.upload_warnings[upload_id] = zip_handler.member_warnings()
+                                    st.success("✅ Dados atualizados no banco")
+                                    st.rerun()  # Reload to show updated data
+                                except Exception as e:
+                                    for message in zip_handler.member_warnings():
+                                        st.warning(message)
+                                    st.error(f"Erro ao salvar no banco: {str(e)}")
+                        else:
+                            st.error("Arquivo grande demais para processar sem conexão com o banco de dados")
+                        
+                    else:
+                        with st.spinner("Extraindo arquivo ZIP..."):
+                            csv_files = zip_handler.extract_csv_files(uploaded_file)
+                        
+                        if csv_files:
+                            st.success(f"Encontrados {len(csv_files)} arquivos CSV")
+                            
+                            # Save to database
+                            if st.session_state.db_manager:
+                                with st.spinner("Salvando dados no banco..."):
+                                    try:
+                                        # Archives with unreadable members are not recorded as imported
+                                        complete = not zip_handler.failed_members()
+                                        st.session_state.db_manager.save_csv_data(
+                                            csv_files,
+                                            fingerprint=fingerprint if complete else None,
+                                            archive_name=uploaded_file.name
+                                        )
+                                        if complete:
+                                            st.session_state.processed_archives.add(fingerprint)
+                                        else:
+                                            st.session_state.incomplete_uploads.add(upload_id)
+                                        st.success("✅ Dados atualizados no banco")
+                                        st.rerun()  # Reload to show updated data
+                                    except Exception as e:
+                                        st.error(f"Erro ao salvar no banco: {str(e)}")
+                            
+                        else:
+                            st.error("Nenhum arquivo CSV encontrado no ZIP")
                     
             except Exception as e:
                 st.error(f"Erro ao processar arquivo ZIP: {str(e)}")
@@ -174,8 +252,10 @@ def main():
             st.header("🤖 Assistente IA")
             st.markdown("Faça perguntas sobre seus dados de notas fiscais em português")
             
-            # Initialize AI agent
-            ai_agent = LangChainAIAgent()
+            # Initialize AI agent, sharing the session's processor and its cached profiles
+            if 'ai_agent' not in st.session_state:
+                st.session_state.ai_agent = AIAgent(processor=st.session_state.processor)
+            ai_agent = st.session_state.ai_agent
             
             # Chat interface
             for message in st.session_state.chat_history:
@@ -196,25 +276,40 @@ def main():
                         try:
                             # Prepare data context - prioritize database data
                             data_context = {}
+                            data_version = None
                             
                             if has_database_data and st.session_state.db_manager:
-                                # Use database data by creating DataFrames from queries
-                                import pandas as pd
-                                invoices = st.session_state.db_manager.query_invoices()
-                                if invoices:
-                                    invoices_df = pd.DataFrame(invoices)
-                                    data_context["invoices_database"] = invoices_df
+                                # Also notices data loaded by other processes (ingest_archives.py)
+                                data_version = st.session_state.db_manager.sync_data_version()
+                                # Reuse the DataFrames (and their profiles) until new data is saved
+                                if st.session_state.get('data_context_version') == data_version:
+                                    data_context = st.session_state.data_context
+                                else:
+                                    # Use database data by creating DataFrames from queries
+                                    import pandas as pd
+                                    invoices = st.session_state.db_manager.query_invoices(limit=AI_CONTEXT_INVOICES)
+                                    if invoices:
+                                        invoices_df = pd.DataFrame(invoices)
+                                        data_context["invoices_database"] = invoices_df
+                                    
+                                    # Exact totals of the whole history, whatever the page above holds
+                                    summary = st.session_state.db_manager.get_invoice_summary()
+                                    if summary.get('invoices'):
+                                        data_context["summary_database"] = pd.DataFrame([{**summary['invoices'], **summary.get('items', {})}])
                                 
-                                # Get top products for context
-                                products = st.session_state.db_manager.get_top_products(50)
-                                if products:
-                                    products_df = pd.DataFrame(products)
-                                    data_context["products_database"] = products_df
+                                    # Get top products for context
+                                    products = st.session_state.db_manager.get_top_products(50)
+                                    if products:
+                                        products_df = pd.DataFrame(products)
+                                        data_context["products_database"] = products_df
+                                    
+                                    st.session_state.data_context = data_context
+                                    st.session_state.data_context_version = data_version
                             
                             # No fallback needed - always use database
                             
                             if data_context:
-                                response = ai_agent.answer_question(prompt, data_context)
+                                response = ai_agent.answer_question(prompt, data_context, data_version=data_version)
                                 st.write(response)
                                 
                                 # Add assistant response to chat history
@@ -267,10 +362,22 @@ def main():
                     if end_date:
                         query_params['end_date'] = end_date
                     
-                    results = st.session_state.db_manager.query_invoices(query_params)
+                    st.session_state.invoice_query = query_params
+                    # Keyset cursor of every page visited, starting with the first one
+                    st.session_state.invoice_cursors = [None]
+                
+                if st.session_state.get('invoice_query') is not None:
+                    cursors = st.session_state.invoice_cursors
+                    # One extra row tells whether a next page exists
+                    results = st.session_state.db_manager.query_invoices(
+                        st.session_state.invoice_query, limit=INVOICE_PAGE_ROWS + 1, after=cursors[-1]
+                    )
+                    has_next = len(results) > INVOICE_PAGE_ROWS
+                    results = results[:INVOICE_PAGE_ROWS]
                     
                     if results:
-                        st.success(f"Encontradas {len(results)} notas fiscais")
+                        first = (len(cursors) - 1) * INVOICE_PAGE_ROWS + 1
+                        st.success(f"Página {len(cursors)}: notas fiscais {first:,} a {first + len(results) - 1:,}")
                         
                         # Convert to DataFrame for display
                         import pandas as pd
@@ -289,6 +396,16 @@ def main():
                                 display_df['Valor'] = [f"R$ {float(x):,.2f}" if pd.notnull(x) and str(x) != 'nan' else "N/A" for x in display_df['Valor']]
                             
                             st.dataframe(display_df, use_container_width=True)
+                        
+                        col_prev, col_next = st.columns(2)
+                        with col_prev:
+                            if len(cursors) > 1 and st.button("◀ Página anterior"):
+                                cursors.pop()
+                                st.rerun()
+                        with col_next:
+                            if has_next and st.button("Próxima página ▶"):
+                                cursors.append(invoice_cursor(results[-1]))
+                                st.rerun()
                     else:
                         st.info("Nenhuma nota fiscal encontrada para os critérios selecionados")
             
@@ -0,0 +1,112 @@
+"""
+Benchmark fixtures: scaled copies of the bundled archive and a local
+SQLite stand-in for the PostgreSQL database (or a scratch schema on a real one)
+"""
+
+import os
+import re
+import sqlite3
+import zipfile
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from utils.database import DatabaseManager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_ARCHIVE = os.path.join(REPO_ROOT, '202401_NFs.zip')
+
+# A data row starts with its 44-digit access key
+KEY_ROW = re.compile(rb'^\d{44}(?=[,;])', re.MULTILINE)
+
+
+def scale_archive(source, factor, dest):
+    """
+    Write ``factor`` copies of an NF-e archive into one archive
+    
+    Copy 0 is the original data. Later copies replace the first three digits
+    of every access key with 9 and the copy number, so keys stay 44 digits
+    long and unique while headers and items still match.
+    
+    Args:
+        source (str): Path of the original ZIP archive
+        factor (int): Number of copies (1 to 100)
+        dest (str): Path of the ZIP archive to write
+        
+    Returns:
+        str: ``dest``
+    """
+    if not 1 <= factor <= 100:
+        raise ValueError("Scale factor must be between 1 and 100")
+    
+    with zipfile.ZipFile(source) as src, \
+            zipfile.ZipFile(dest, 'w', compression=zipfile.ZIP_DEFLATED) as out:
+        for info in src.infolist():
+            data = src.read(info)
+            header_end = data.index(b'\n') + 1
+            header, body = data[:header_end], data[header_end:]
+            if not body.endswith(b'\n'):
+                body += b'\n'
+            
+            with out.open(info.filename, 'w', force_zip64=True) as member:
+                member.write(header)
+                member.write(body)
+                for copy in range(1, factor):
+                    prefix = b'9%02d' % copy
+                    member.write(KEY_ROW.sub(lambda match: prefix + match.group()[3:], body))
+    
+    return dest
+
+
+def _register_sqlite_adapters():
+    # The sqlite3 driver only binds builtin types
+    sqlite3.register_adapter(pd.Timestamp, lambda value: value.isoformat(sep=' '))
+    sqlite3.register_adapter(np.int64, int)
+    sqlite3.register_adapter(np.float64, float)
+    sqlite3.register_adapter(np.bool_, bool)
+    sqlite3.register_adapter(Decimal, str)
+
+
+def sqlite_database_manager(path, cache_queries=False):
+    """
+    DatabaseManager backed by a fresh SQLite file, schema from create_tables
+    
+    Args:
+        path (str): Database file, replaced if it exists
+        cache_queries (bool): Use the process-wide query cache; off by
+            default so query benchmarks reach the database
+        
+    Returns:
+        DatabaseManager
+    """
+    _register_sqlite_adapters()
+    if os.path.exists(path):
+        os.remove(path)
+    
+    db = DatabaseManager(engine=create_engine(f"sqlite:///{path}"), cache_queries=cache_queries)
+    db.create_tables()
+    return db
+
+
+def postgres_database_manager(url, schema='nfe_benchmark'):
+    """
+    DatabaseManager on a fresh schema of a PostgreSQL server, partitioned
+    tables from create_tables
+    
+    Args:
+        url (str): SQLAlchemy URL of the server
+        schema (str): Schema to use, dropped first if it exists
+        
+    Returns:
+        DatabaseManager
+    """
+    with create_engine(url).begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    
+    engine = create_engine(url, connect_args={'options': f'-csearch_path={schema}'})
+    db = DatabaseManager(engine=engine, cache_queries=False)
+    db.create_tables()
+    return db
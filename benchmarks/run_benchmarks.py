@@ -0,0 +1,291 @@
+"""
+Benchmarks de extração, resumos, gravação, consultas e montagem do prompt da IA
+
+Roda sem rede, com um banco SQLite local no lugar do PostgreSQL, em várias
+escalas do arquivo 202401_NFs.zip. O resultado é gravado em JSON e comparado
+com a linha de base salva. Com --database-url, a gravação também é medida em
+um PostgreSQL com 1 e com --workers conexões em paralelo.
+
+Exemplos:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scales 1 10 --repeat 5
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks --synthetic --scales 1 100 1000
+    python -m benchmarks.run_benchmarks --database-url postgresql://localhost/nfe --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.fixtures import BUNDLED_ARCHIVE, postgres_database_manager, scale_archive, sqlite_database_manager
+from benchmarks.synthetic_archive import generate_archive
+from utils.zip_handler import ZipHandler
+from utils.csv_processor import CSVProcessor
+from utils.ai_agent import AIAgent
+from utils.database import DatabaseManager, INVOICE_PAGE_ROWS
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, 'results.json')
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_WORKERS = 4
+# Slowdown (relative to the baseline best time) reported as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(func, repeat, setup=None):
+    """
+    Time ``func`` ``repeat`` times
+    
+    Args:
+        func: Callable; receives the value returned by ``setup`` if given
+        repeat (int): Number of runs
+        setup: Optional untimed callable run before each run
+        
+    Returns:
+        tuple: (list of seconds per run, result of the last run)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def record(timings, rows=None):
+    entry = {
+        'best_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'runs': len(timings)
+    }
+    if rows:
+        entry['rows'] = rows
+        entry['rows_per_second'] = rows / max(min(timings), 1e-9)
+    return entry
+
+
+def run_scale(source, factor, repeat, workdir, synthetic=False, seed=42, database_url=None,
+              workers=DEFAULT_WORKERS):
+    """
+    Run every benchmark on ``factor`` copies of the source archive
+    
+    Args:
+        synthetic (bool): Use a generated archive ``factor`` times the size
+            of the bundled one instead of copies of ``source``
+        seed (int): Seed of the generated archive
+        database_url (str): PostgreSQL server on which the load is also
+            measured serially and with ``workers`` connections
+    
+    Returns:
+        dict: Benchmark name -> timing entry
+    """
+    archive = os.path.join(workdir, f"{factor}x_NFs.zip")
+    if synthetic:
+        generate_archive(archive, scale=factor, seed=seed)
+    else:
+        scale_archive(source, factor, archive)
+    db_path = os.path.join(workdir, 'benchmark.sqlite')
+    results = {}
+    
+    # ZIP extraction and CSV parsing, without the parsed member cache
+    timings, csv_files = measure(lambda: ZipHandler().extract_csv_files(archive), repeat)
+    rows = sum(len(df) for df in csv_files.values())
+    results['extract_csv_files'] = record(timings, rows)
+    
+    # Dashboard summaries on a cold processor (no memoized profile)
+    def summaries(processor):
+        for df in csv_files.values():
+            processor.get_financial_summary(df)
+            processor.get_date_range_summary(df)
+            processor.get_column_info(df)
+    results['csv_summaries'] = record(measure(summaries, repeat, setup=CSVProcessor)[0], rows)
+    
+    # Database load into an empty database
+    timings, _ = measure(
+        lambda db: db.save_csv_data(csv_files),
+        repeat,
+        setup=lambda: sqlite_database_manager(db_path)
+    )
+    results['save_csv_data'] = record(timings, rows)
+    
+    # The same load on PostgreSQL, serial and partitioned over parallel workers
+    if database_url:
+        managers = []
+        
+        def fresh_database():
+            # Close the previous run's pooled connections before dropping its schema
+            for previous in managers:
+                previous.engine.dispose()
+            managers[:] = [postgres_database_manager(database_url)]
+            return managers[0]
+        
+        for count in sorted({1, workers}):
+            timings, _ = measure(lambda db: db.save_csv_data(csv_files, workers=count), repeat, setup=fresh_database)
+            results[f"postgres.save_csv_data.workers_{count}"] = record(timings, rows)
+        managers[0].engine.dispose()
+    
+    db = sqlite_database_manager(db_path)
+    db.save_csv_data(csv_files)
+    queries = {
+        'get_invoice_summary': db.get_invoice_summary,
+        'query_invoices': db.query_invoices,
+        'query_invoices_page': lambda: db.query_invoices(limit=INVOICE_PAGE_ROWS),
+        'get_top_products': lambda: db.get_top_products(10),
+        'check_database_status': db.check_database_status
+    }
+    for name, query in queries.items():
+        results[f"query.{name}"] = record(measure(query, repeat)[0])
+    
+    # Dashboard reads on a rerun, answered by the query cache after the first one
+    cached = DatabaseManager(engine=db.engine)
+    cached.check_database_status()
+    cached.get_invoice_summary()
+    cached.get_top_products(10)
+    results['query.cached_dashboard'] = record(measure(
+        lambda: (cached.check_database_status(), cached.get_invoice_summary(), cached.get_top_products(10)),
+        repeat
+    )[0])
+    
+    # AI prompt summary built from the same data context as the app
+    data_context = {
+        'invoices_database': pd.DataFrame(db.query_invoices()),
+        'products_database': pd.DataFrame(db.get_top_products(50))
+    }
+    timings, _ = measure(
+        lambda agent: agent._prepare_data_summary(data_context),
+        repeat,
+        setup=lambda: AIAgent(processor=CSVProcessor())
+    )
+    results['prepare_data_summary'] = record(timings, sum(len(df) for df in data_context.values()))
+    
+    db.engine.dispose()
+    return results
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare best times against a baseline
+    
+    Returns:
+        list: (scale, benchmark, baseline seconds, current seconds, ratio,
+            status) tuples; status is 'regression', 'faster', 'ok' or 'new'
+    """
+    rows = []
+    for scale, benchmarks in current['results'].items():
+        for name, entry in benchmarks.items():
+            base = baseline.get('results', {}).get(scale, {}).get(name)
+            if base is None:
+                rows.append((scale, name, None, entry['best_seconds'], None, 'new'))
+                continue
+            ratio = entry['best_seconds'] / max(base['best_seconds'], 1e-9)
+            if ratio > 1 + threshold:
+                status = 'regression'
+            elif ratio < 1 / (1 + threshold):
+                status = 'faster'
+            else:
+                status = 'ok'
+            rows.append((scale, name, base['best_seconds'], entry['best_seconds'], ratio, status))
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'escala':>7}  {'benchmark':<34}{'base (s)':>10}{'atual (s)':>11}{'razão':>8}  situação"]
+    for scale, name, base, current, ratio, status in rows:
+        base_text = f"{base:.4f}" if base is not None else '-'
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else '-'
+        lines.append(f"{scale:>7}  {name:<34}{base_text:>10}{current:>11.4f}{ratio_text:>8}  {status}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mede extração, resumos, gravação no banco, consultas e montagem do prompt da IA"
+    )
+    parser.add_argument('--archive', default=BUNDLED_ARCHIVE,
+                        help="Arquivo ZIP de NF-e usado como base (padrão: 202401_NFs.zip)")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help="Fatores de escala do arquivo (padrão: 1 10 100)")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="Usa arquivos sintéticos gerados em vez de cópias do arquivo base")
+    parser.add_argument('--seed', type=int, default=42,
+                        help="Semente dos arquivos sintéticos (padrão: 42)")
+    parser.add_argument('--database-url',
+                        help="PostgreSQL para medir também a gravação em paralelo (usa o schema nfe_benchmark)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Conexões da gravação em paralelo no PostgreSQL (padrão: {DEFAULT_WORKERS})")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Execuções por benchmark; vale o melhor tempo (padrão: 3)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="Arquivo JSON de resultados (padrão: benchmarks/results.json)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help="Linha de base para comparação (padrão: benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Grava os resultados também como nova linha de base")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Lentidão relativa considerada regressão (padrão: {DEFAULT_THRESHOLD})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    results = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'archive': f"synthetic (seed {args.seed})" if args.synthetic else os.path.basename(args.archive),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': {}
+    }
+    
+    with tempfile.TemporaryDirectory(prefix='nfe-bench-') as workdir:
+        for factor in args.scales:
+            print(f"⏱️  Escala {factor}x...")
+            results['results'][f"{factor}x"] = run_scale(
+                args.archive, factor, args.repeat, workdir, synthetic=args.synthetic, seed=args.seed,
+                database_url=args.database_url, workers=args.workers
+            )
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"✓ Resultados gravados em {args.output}")
+    
+    regressions = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        print(format_comparison(rows))
+        regressions = sum(1 for row in rows if row[-1] == 'regression')
+        if regressions:
+            print(f"✗ {regressions} regressão(ões) acima de {args.threshold:.0%}")
+    else:
+        for scale, benchmarks in results['results'].items():
+            for name, entry in benchmarks.items():
+                print(f"{scale:>7}  {name:<34}{entry['best_seconds']:>10.4f}s")
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"✓ Linha de base gravada em {args.baseline}")
+    
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+"""
+Gerador determinístico de arquivos ZIP sintéticos de NF-e (Cabecalho/Itens)
+
+Os arquivos seguem o layout exato do 202401_NFs.zip, com chaves de acesso de
+44 dígitos válidas (dígito verificador módulo 11), CNPJs válidos e totais do
+cabeçalho iguais à soma dos itens. A mesma semente gera sempre os mesmos bytes.
+
+Exemplos:
+    python -m benchmarks.synthetic_archive dados/202401_NFs.zip --scale 100
+    python -m benchmarks.synthetic_archive dados/202402_NFs.zip --items 50000000 --seed 7
+"""
+
+import os
+import io
+import sys
+import time
+import zipfile
+import argparse
+import calendar
+
+import numpy as np
+import pandas as pd
+
+from utils.nfe_schema import INVOICE_COLUMNS
+
+# Invoices and items in the bundled 202401_NFs.zip, the unit of --scale
+BUNDLED_INVOICES = 100
+BUNDLED_ITEMS = 565
+# Invoices generated per block; part of the output format, so changing it changes the bytes
+BLOCK_INVOICES = 20_000
+# Legal maximum number of items in one NF-e
+MAX_ITEMS_PER_INVOICE = 990
+# Header columns repeated at the start of every item row
+ITEM_REPEATED_COLUMNS = [
+    col for col in INVOICE_COLUMNS
+    if col not in ('EVENTO MAIS RECENTE', 'DATA/HORA EVENTO MAIS RECENTE', 'VALOR NOTA FISCAL')
+]
+
+# UF: (IBGE code, capital, relative share of issued NF-e)
+UFS = {
+    'SP': (35, 'SAO PAULO', 31.0), 'RJ': (33, 'RIO DE JANEIRO', 10.0), 'MG': (31, 'BELO HORIZONTE', 9.0),
+    'PR': (41, 'CURITIBA', 7.0), 'RS': (43, 'PORTO ALEGRE', 6.5), 'SC': (42, 'FLORIANOPOLIS', 4.5),
+    'BA': (29, 'SALVADOR', 4.0), 'DF': (53, 'BRASILIA', 3.5), 'GO': (52, 'GOIANIA', 3.0),
+    'PE': (26, 'RECIFE', 2.7), 'PA': (15, 'BELEM', 2.3), 'CE': (23, 'FORTALEZA', 2.2),
+    'ES': (32, 'VITORIA', 2.0), 'MT': (51, 'CUIABA', 2.0), 'MS': (50, 'CAMPO GRANDE', 1.5),
+    'AM': (13, 'MANAUS', 1.5), 'MA': (21, 'SAO LUIS', 1.3), 'PB': (25, 'JOAO PESSOA', 0.9),
+    'RN': (24, 'NATAL', 0.9), 'AL': (27, 'MACEIO', 0.8), 'PI': (22, 'TERESINA', 0.7),
+    'SE': (28, 'ARACAJU', 0.6), 'RO': (11, 'PORTO VELHO', 0.6), 'TO': (17, 'PALMAS', 0.5),
+    'AC': (12, 'RIO BRANCO', 0.2), 'AP': (16, 'MACAPA', 0.2), 'RR': (14, 'BOA VISTA', 0.2)
+}
+
+# Share of invoices whose recipient is in the emitter's state
+INTRASTATE_SHARE = 0.45
+CFOP_INTRASTATE = {'5102': 45, '5405': 15, '5949': 12, '5101': 10, '5910': 8, '5117': 5, '5152': 5}
+CFOP_INTERSTATE = {'6102': 30, '6108': 15, '6906': 10, '6117': 10, '6949': 10, '6101': 10, '6114': 8, '6917': 7}
+
+# NCM code: (description, relative frequency)
+NCMS = {
+    '49019900': ('Outros livros, brochuras e impressos semelhantes', 20),
+    '30049099': ('Outros medicamentos', 10),
+    '90183929': ('Outras sondas, catéteres e cânulas', 6),
+    '87089990': ('Outras partes e acessórios para tratores e veículos automóveis', 8),
+    '27101921': ('Gasóleo (óleo diesel)', 6),
+    '27101932': ('Óleos lubrificantes com aditivos', 4),
+    '07099990': ('Outros produtos hortícolas, frescos ou refrigerados', 6),
+    '22021000': ('Águas, incluindo as águas minerais e as águas gaseificadas, adicionadas de açúcar', 7),
+    '39269090': ('Outras obras de plásticos', 7),
+    '73181500': ('Outros parafusos e pinos ou pernos, mesmo com as porcas e arruelas', 6),
+    '84713019': ('Outras máquinas automáticas para processamento de dados, portáteis', 4),
+    '85122021': ('Luzes fixas para automóveis e outros ciclos', 4),
+    '90213190': ('Outras próteses articulares', 3),
+    '94036000': ('Outros móveis de madeira', 5),
+    '90279099': ('Partes e acessórios para outros instrumentos e aparelhos para análise', 4)
+}
+# Unit: (relative frequency, sold in fractional quantities)
+UNITS = {
+    'UNIDAD': (60, False), 'UN': (10, False), 'KG': (8, True), 'PEÇA': (5, False), 'CDA': (4, False),
+    'CX': (4, False), 'LITRO': (3, True), 'PCT': (3, False), 'METRO': (3, True)
+}
+
+NATUREZAS = {
+    'VENDA': 20, 'Venda de mercadoria adquirida ou recebida de terceiros': 15, 'VENDA DE MERCADORIA': 12,
+    'Venda Fora do Estado': 8, 'Venda de produção do estabelecimento': 8, 'REMESSA - ENTREGA FUTURA': 5,
+    'RETORNO DE MATERIAL DEPOSITADO EM ARMAZEM GERAL': 5, 'OUTRAS SAIDAS': 4, 'Remessa em bonificação': 3
+}
+INDICADORES_IE = {'NÃO CONTRIBUINTE': 83, 'CONTRIBUINTE ISENTO': 11, 'CONTRIBUINTE ICMS': 6}
+CONSUMIDOR_FINAL = {'1 - CONSUMIDOR FINAL': 91, '0 - NORMAL': 9}
+PRESENCA = {
+    '0 - NÃO SE APLICA': 41, '1 - OPERAÇÃO PRESENCIAL': 25, '9 - OPERAÇÃO NÃO PRESENCIAL, OUTROS': 25,
+    '2 - OPERAÇÃO NÃO PRESENCIAL, PELA INTERNET': 8, '3 - OPERAÇÃO NÃO PRESENCIAL, TELEATENDIMENTO': 1
+}
+MODELO = '55 - NF-E EMITIDA EM SUBSTITUIÇÃO AO MODELO 1 OU 1A'
+EVENTO = 'Autorização de Uso'
+
+CNPJ_WEIGHTS_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+CNPJ_WEIGHTS_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+# Access key check digit weights: 2..9 repeated from the rightmost digit
+KEY_WEIGHTS = np.tile(np.arange(2, 10), 6)[:43][::-1]
+
+
+def _digits(values, width):
+    """(n, width) digit matrix of non-negative integers"""
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype='int64')
+    return (np.asarray(values, dtype='int64')[:, None] // powers) % 10
+
+
+def _to_strings(digits):
+    """Digit matrix -> array of digit strings"""
+    raw = np.ascontiguousarray((digits + ord('0')).astype('uint8'))
+    return raw.view(f"S{digits.shape[1]}").ravel().astype(str)
+
+
+def _mod11(digits, weights):
+    remainder = (digits * weights).sum(axis=1) % 11
+    return np.where(remainder < 2, 0, 11 - remainder)
+
+
+def cnpj_digits(base):
+    """
+    Valid CNPJ digit matrices from 12-digit bases (8-digit root + 4-digit branch)
+    
+    Returns:
+        numpy array: (n, 14) digits including both check digits
+    """
+    digits = _digits(base, 12)
+    first = _mod11(digits, CNPJ_WEIGHTS_1)
+    digits = np.column_stack([digits, first])
+    second = _mod11(digits, CNPJ_WEIGHTS_2)
+    return np.column_stack([digits, second])
+
+
+def access_key_digits(uf_codes, year_month, cnpj, serie, numero, codigo):
+    """
+    44-digit NF-e access keys
+    
+    Layout: cUF(2) AAMM(4) CNPJ(14) modelo 55(2) série(3) número(9)
+    tpEmis 1(1) código numérico(8) and the modulo-11 check digit.
+    """
+    n = len(numero)
+    digits = np.column_stack([
+        _digits(uf_codes, 2),
+        _digits(np.full(n, year_month), 4),
+        cnpj,
+        _digits(np.full(n, 55), 2),
+        _digits(serie, 3),
+        _digits(numero, 9),
+        np.ones((n, 1), dtype='int64'),
+        _digits(codigo, 8)
+    ])
+    remainder = (digits * KEY_WEIGHTS).sum(axis=1) % 11
+    check = np.where(remainder < 2, 0, 11 - remainder)
+    return np.column_stack([digits, check])
+
+
+def _csv_rows(frame):
+    """CSV rows of a DataFrame, without header and line terminators"""
+    return frame.to_csv(index=False, header=False, lineterminator='\r\n').split('\r\n')[:-1]
+
+
+def _weighted(table):
+    keys = list(table)
+    weights = np.array([table[key][-1] if isinstance(table[key], tuple) else table[key] for key in keys], dtype='float64')
+    return np.array(keys, dtype=object), weights / weights.sum()
+
+
+def _zipf_weights(count, exponent):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+class SyntheticArchive:
+    """
+    Deterministic generator of NF-e archives in the Cabecalho/Itens layout
+    
+    Emitters, recipients and products are drawn once from the seed; each
+    block of BLOCK_INVOICES invoices then has its own random stream, so a
+    block can be regenerated identically. Headers are written in a first
+    pass and items in a second, keeping memory bounded by one block.
+    """
+    
+    def __init__(self, invoices, seed=42, month='202401'):
+        """
+        Args:
+            invoices (int): Number of invoices (items follow a skewed
+                distribution averaging about 5.65 per invoice)
+            seed (int): Random seed; the same seed gives identical output
+            month (str): YYYYMM of the emission dates
+        """
+        self.invoices = int(invoices)
+        self.seed = int(seed)
+        self.month = str(month)
+        self.year, self.month_number = int(self.month[:4]), int(self.month[4:])
+        self._build_catalogs()
+    
+    def _build_catalogs(self):
+        rng = np.random.default_rng([self.seed, 0])
+        uf_names, uf_weights = _weighted(UFS)
+        self.uf_names, self.uf_weights = uf_names, uf_weights
+        
+        # Emitters: few large issuers and a long tail
+        n_emitters = max(50, self.invoices // 200)
+        emitter_uf = rng.choice(len(uf_names), n_emitters, p=uf_weights)
+        self.emitters = {
+            'uf': emitter_uf,
+            'cnpj': cnpj_digits(rng.integers(10 ** 9, 10 ** 12, n_emitters)),
+            'ie': rng.integers(10 ** 8, 10 ** 12, n_emitters).astype(str),
+            'serie': rng.choice([0, 1, 1, 1, 1, 2, 3, 890], n_emitters),
+            'name': np.array([f"EMPRESA SINTETICA {i:06d} LTDA" for i in range(n_emitters)], dtype=object)
+        }
+        self.emitter_weights = _zipf_weights(n_emitters, 1.1)
+        
+        n_recipients = max(50, self.invoices // 20)
+        self.recipients = {
+            'cnpj': _to_strings(cnpj_digits(rng.integers(10 ** 9, 10 ** 12, n_recipients))),
+            'name': np.array([f"CLIENTE SINTETICO {i:07d}" for i in range(n_recipients)], dtype=object)
+        }
+        self.recipient_weights = _zipf_weights(n_recipients, 0.9)
+        
+        # Products with a fixed NCM, unit and reference price
+        n_products = max(200, self.invoices // 10)
+        ncm_codes, ncm_weights = _weighted(NCMS)
+        unit_names, unit_weights = _weighted(UNITS)
+        product_ncm = rng.choice(len(ncm_codes), n_products, p=ncm_weights)
+        product_unit = rng.choice(len(unit_names), n_products, p=unit_weights)
+        self.products = {
+            'ncm': ncm_codes[product_ncm],
+            'ncm_type': np.array([NCMS[code][0] for code in ncm_codes[product_ncm]], dtype=object),
+            'unit': unit_names[product_unit],
+            'fractional': np.array([UNITS[unit][1] for unit in unit_names[product_unit]]),
+            'price_cents': np.clip(np.round(rng.lognormal(np.log(2_000), 1.8, n_products)), 5, 50_000_000),
+            'description': np.array([f"PRODUTO SINTETICO {i:06d}" for i in range(n_products)], dtype=object)
+        }
+        self.product_weights = _zipf_weights(n_products, 1.05)
+    
+    def blocks(self):
+        """Number of invoice blocks"""
+        return (self.invoices + BLOCK_INVOICES - 1) // BLOCK_INVOICES
+    
+    def generate_block(self, block):
+        """
+        Generate one block of invoices and their items
+        
+        Returns:
+            tuple: (headers DataFrame, items DataFrame) with the CSV columns
+        """
+        headers, invoice_of_item, details = self._generate(block)
+        repeated = headers[ITEM_REPEATED_COLUMNS].iloc[invoice_of_item].reset_index(drop=True)
+        return headers, pd.concat([repeated, details], axis=1)
+    
+    def _generate(self, block):
+        """Headers, the invoice row of each item and the item-only columns of one block"""
+        rng = np.random.default_rng([self.seed, 1, block])
+        start = block * BLOCK_INVOICES
+        n = min(BLOCK_INVOICES, self.invoices - start)
+        numero = np.arange(start + 1, start + n + 1)
+        
+        # Parties and operation
+        emitter = rng.choice(len(self.emitter_weights), n, p=self.emitter_weights)
+        recipient = rng.choice(len(self.recipient_weights), n, p=self.recipient_weights)
+        emitter_uf = self.emitters['uf'][emitter]
+        intrastate = rng.random(n) < INTRASTATE_SHARE
+        recipient_uf = np.where(intrastate, emitter_uf, rng.choice(len(self.uf_names), n, p=self.uf_weights))
+        intrastate = recipient_uf == emitter_uf
+        
+        # Emission times within the month, event a few seconds later
+        days = calendar.monthrange(self.year, self.month_number)[1]
+        month_start = np.datetime64(f"{self.year:04d}-{self.month_number:02d}-01T00:00:00")
+        emitted = month_start + rng.integers(0, days * 86_400, n).astype('timedelta64[s]')
+        event = emitted + rng.integers(1, 120, n).astype('timedelta64[s]')
+        
+        uf_codes = np.array([UFS[uf][0] for uf in self.uf_names])[emitter_uf]
+        keys = _to_strings(access_key_digits(
+            uf_codes, (self.year % 100) * 100 + self.month_number, self.emitters['cnpj'][emitter],
+            self.emitters['serie'][emitter], numero, rng.integers(0, 10 ** 8, n)
+        ))
+        
+        # Items per invoice: most invoices have one item, a few have hundreds
+        counts = np.minimum(1 + rng.negative_binomial(0.25, 0.25 / (0.25 + 4.65), n), MAX_ITEMS_PER_INVOICE)
+        invoice_of_item = np.repeat(np.arange(n), counts)
+        m = len(invoice_of_item)
+        
+        product = rng.choice(len(self.product_weights), m, p=self.product_weights)
+        price_cents = np.maximum(1, np.round(self.products['price_cents'][product] * rng.uniform(0.9, 1.1, m)))
+        fractional = self.products['fractional'][product]
+        bulk = rng.lognormal(1.2, 1.2, m)
+        quantity = np.where(
+            rng.random(m) < 0.6, 1.0,
+            np.where(fractional, np.maximum(0.01, np.round(bulk, 2)), np.maximum(1.0, np.round(bulk)))
+        )
+        total_cents = np.round(quantity * price_cents).astype('int64')
+        invoice_cents = np.bincount(invoice_of_item, weights=total_cents, minlength=n).astype('int64')
+        
+        cfop_intra, cfop_intra_weights = _weighted(CFOP_INTRASTATE)
+        cfop_inter, cfop_inter_weights = _weighted(CFOP_INTERSTATE)
+        item_intrastate = intrastate[invoice_of_item]
+        cfop = np.where(
+            item_intrastate,
+            rng.choice(cfop_intra, m, p=cfop_intra_weights),
+            rng.choice(cfop_inter, m, p=cfop_inter_weights)
+        )
+        
+        natureza, natureza_weights = _weighted(NATUREZAS)
+        indicador, indicador_weights = _weighted(INDICADORES_IE)
+        consumidor, consumidor_weights = _weighted(CONSUMIDOR_FINAL)
+        presenca, presenca_weights = _weighted(PRESENCA)
+        
+        headers = pd.DataFrame({
+            'CHAVE DE ACESSO': keys,
+            'MODELO': MODELO,
+            'SÉRIE': self.emitters['serie'][emitter],
+            'NÚMERO': numero,
+            'NATUREZA DA OPERAÇÃO': rng.choice(natureza, n, p=natureza_weights),
+            'DATA EMISSÃO': np.char.replace(np.datetime_as_string(emitted, unit='s'), 'T', ' '),
+            'EVENTO MAIS RECENTE': EVENTO,
+            'DATA/HORA EVENTO MAIS RECENTE': np.char.replace(np.datetime_as_string(event, unit='s'), 'T', ' '),
+            'CPF/CNPJ Emitente': _to_strings(self.emitters['cnpj'][emitter]),
+            'RAZÃO SOCIAL EMITENTE': self.emitters['name'][emitter],
+            'INSCRIÇÃO ESTADUAL EMITENTE': self.emitters['ie'][emitter],
+            'UF EMITENTE': self.uf_names[emitter_uf],
+            'MUNICÍPIO EMITENTE': np.array([UFS[uf][1] for uf in self.uf_names], dtype=object)[emitter_uf],
+            'CNPJ DESTINATÁRIO': self.recipients['cnpj'][recipient],
+            'NOME DESTINATÁRIO': self.recipients['name'][recipient],
+            'UF DESTINATÁRIO': self.uf_names[recipient_uf],
+            'INDICADOR IE DESTINATÁRIO': rng.choice(indicador, n, p=indicador_weights),
+            'DESTINO DA OPERAÇÃO': np.where(intrastate, '1 - OPERAÇÃO INTERNA', '2 - OPERAÇÃO INTERESTADUAL'),
+            'CONSUMIDOR FINAL': rng.choice(consumidor, n, p=consumidor_weights),
+            'PRESENÇA DO COMPRADOR': rng.choice(presenca, n, p=presenca_weights),
+            'VALOR NOTA FISCAL': invoice_cents / 100
+        })
+        
+        details = pd.DataFrame({
+            'NÚMERO PRODUTO': np.arange(m) - np.repeat(np.cumsum(counts) - counts, counts) + 1,
+            'DESCRIÇÃO DO PRODUTO/SERVIÇO': self.products['description'][product],
+            'CÓDIGO NCM/SH': self.products['ncm'][product],
+            'NCM/SH (TIPO DE PRODUTO)': self.products['ncm_type'][product],
+            'CFOP': cfop,
+            'QUANTIDADE': quantity,
+            'UNIDADE': self.products['unit'][product],
+            'VALOR UNITÁRIO': price_cents / 100,
+            'VALOR TOTAL': total_cents / 100
+        })
+        return headers, invoice_of_item, details
+    
+    def write(self, path, progress=None):
+        """
+        Stream the archive to disk, one block at a time
+        
+        Args:
+            path (str): Destination ZIP file
+            progress: Optional callable(member, block, blocks)
+            
+        Returns:
+            dict: invoices, items, bytes and seconds
+        """
+        start = time.perf_counter()
+        date_time = (self.year, self.month_number, 1, 0, 0, 0)
+        item_count = 0
+        
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for member, pick in (('Cabecalho', 0), ('Itens', 1)):
+                info = zipfile.ZipInfo(f"{self.month}_NFs_{member}.csv", date_time=date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with archive.open(info, 'w', force_zip64=True) as raw, \
+                        io.TextIOWrapper(raw, encoding='utf-8', newline='') as out:
+                    for block in range(self.blocks()):
+                        headers, invoice_of_item, details = self._generate(block)
+                        if pick == 0:
+                            headers.to_csv(out, index=False, header=block == 0, lineterminator='\r\n')
+                        else:
+                            if block == 0:
+                                out.write(','.join(ITEM_REPEATED_COLUMNS + list(details.columns)) + '\r\n')
+                            # Render each invoice's repeated columns once instead of once per item
+                            prefixes = _csv_rows(headers[ITEM_REPEATED_COLUMNS])
+                            out.write(''.join([
+                                f"{prefixes[i]},{row}\r\n"
+                                for i, row in zip(invoice_of_item.tolist(), _csv_rows(details))
+                            ]))
+                            item_count += len(details)
+                        if progress:
+                            progress(member, block + 1, self.blocks())
+        
+        return {
+            'invoices': self.invoices,
+            'items': item_count,
+            'bytes': os.path.getsize(path),
+            'seconds': time.perf_counter() - start
+        }
+
+
+def generate_archive(path, invoices=None, scale=None, seed=42, month='202401'):
+    """
+    Write a synthetic NF-e archive
+    
+    Args:
+        path (str): Destination ZIP file
+        invoices (int): Number of invoices
+        scale (float): Alternatively, a multiple of the bundled archive size
+        seed (int): Random seed
+        month (str): YYYYMM of the emission dates
+        
+    Returns:
+        dict: invoices, items, bytes and seconds
+    """
+    if invoices is None:
+        invoices = round((scale or 1) * BUNDLED_INVOICES)
+    return SyntheticArchive(invoices, seed=seed, month=month).write(path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Gera um arquivo ZIP sintético de NF-e no layout Cabecalho/Itens"
+    )
+    parser.add_argument('output', help="Arquivo ZIP de saída (ex.: dados/202401_NFs.zip)")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--scale', type=float, default=1,
+                      help=f"Múltiplo do 202401_NFs.zip ({BUNDLED_INVOICES} notas, {BUNDLED_ITEMS} itens; padrão: 1)")
+    size.add_argument('--invoices', type=int, help="Número de notas fiscais")
+    size.add_argument('--items', type=int, help="Número aproximado de itens")
+    parser.add_argument('--seed', type=int, default=42, help="Semente aleatória (padrão: 42)")
+    parser.add_argument('--month', default='202401', help="Mês de emissão YYYYMM (padrão: 202401)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.invoices:
+        invoices = args.invoices
+    elif args.items:
+        invoices = max(1, round(args.items * BUNDLED_INVOICES / BUNDLED_ITEMS))
+    else:
+        invoices = round(args.scale * BUNDLED_INVOICES)
+    
+    generator = SyntheticArchive(invoices, seed=args.seed, month=args.month)
+    
+    def progress(member, block, blocks):
+        print(f"\r{member}: bloco {block}/{blocks}", end='', flush=True)
+    
+    result = generator.write(args.output, progress=progress)
+    print(
+        f"\n✓ {args.output}: {result['invoices']:,} notas, {result['items']:,} itens, "
+        f"{result['bytes'] / 1024 / 1024:,.1f} MB em {result['seconds']:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Importação em lote (sem navegador) de arquivos ZIP mensais de NF-e
+
+Exemplos:
+    python ingest_archives.py dados/
+    python ingest_archives.py "dados/2023*_NFs.zip" --workers 4
+"""
+
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.zip_handler import ZipHandler, DEFAULT_CHUNK_ROWS
+from utils.database import DatabaseManager
+
+DEFAULT_PATTERN = '*_NFs.zip'
+# Emission month in archive names such as 202401_NFs.zip
+ARCHIVE_MONTH = re.compile(r'^(\d{6})_')
+
+
+def find_archives(sources, pattern=DEFAULT_PATTERN):
+    """
+    Resolve directories and glob patterns into a sorted list of ZIP files
+    
+    Args:
+        sources (list): Directories, glob patterns or file paths
+        pattern (str): File pattern used inside directories
+        
+    Returns:
+        list: Unique archive paths, oldest month first
+    """
+    archives = set()
+    for source in sources:
+        if os.path.isdir(source):
+            archives.update(glob.glob(os.path.join(source, pattern)))
+        else:
+            archives.update(path for path in glob.glob(source) if os.path.isfile(path))
+    return sorted(archives, key=lambda path: os.path.basename(path))
+
+
+def ingest_archive(path, db_manager, chunksize=DEFAULT_CHUNK_ROWS, force=False):
+    """
+    Stream one archive into the database
+    
+    Returns:
+        dict: Result with status, rows, bytes and elapsed seconds
+    """
+    start = time.perf_counter()
+    zip_handler = ZipHandler()
+    name = os.path.basename(path)
+    
+    fingerprint = zip_handler.get_archive_fingerprint(path)
+    if not force and db_manager.is_archive_ingested(fingerprint):
+        return {'archive': name, 'status': 'skipped', 'rows': 0, 'bytes': 0,
+                'seconds': time.perf_counter() - start}
+    
+    # Archives with unreadable members are loaded but not recorded, so the next run retries them
+    db_manager.save_csv_data(
+        zip_handler.iter_csv_chunks(path, chunksize=chunksize),
+        fingerprint=fingerprint,
+        archive_name=name,
+        complete=lambda: not zip_handler.failed_members()
+    )
+    
+    warnings = zip_handler.member_warnings()
+    return {
+        'archive': name,
+        'status': 'incomplete' if zip_handler.failed_members() else 'ok',
+        'rows': sum(stats.get('rows', 0) for stats in zip_handler.member_stats.values()),
+        'bytes': zip_handler.extraction_stats.get('bytes_decompressed', 0),
+        'seconds': time.perf_counter() - start,
+        'warnings': warnings
+    }
+
+
+def format_result(result):
+    seconds = max(result['seconds'], 1e-9)
+    if result['status'] == 'skipped':
+        return f"↷ {result['archive']}: já importado, ignorado"
+    return (
+        f"{'⚠' if result['status'] == 'incomplete' else '✓'} {result['archive']}: "
+        f"{result['rows']:,} linhas em {seconds:.1f}s "
+        f"({result['rows'] / seconds:,.0f} linhas/s, {result['bytes'] / seconds / 1024 / 1024:.1f} MB/s)"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Importa arquivos ZIP mensais de NF-e (YYYYMM_NFs.zip) para o banco PostgreSQL"
+    )
+    parser.add_argument('sources', nargs='+', help="Diretórios, padrões glob ou arquivos ZIP")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN,
+                        help=f"Padrão de arquivo dentro de diretórios (padrão: {DEFAULT_PATTERN})")
+    parser.add_argument('--workers', type=int, default=2,
+                        help="Número máximo de arquivos importados em paralelo (padrão: 2)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"Linhas por bloco lido do CSV (padrão: {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument('--force', action='store_true',
+                        help="Reimporta arquivos que já constam como importados")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(message)s')
+    
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    
+    archives = find_archives(args.sources, args.pattern)
+    if not archives:
+        print("✗ Nenhum arquivo ZIP encontrado")
+        return 1
+    
+    try:
+        db_manager = DatabaseManager()
+        db_manager.create_tables()
+        # Partitions lock their parent table while being created: make them
+        # all now rather than while concurrent imports hold their transactions
+        matches = (ARCHIVE_MONTH.match(os.path.basename(path)) for path in archives)
+        db_manager.create_partitions({match.group(1) for match in matches if match})
+    except Exception as e:
+        print(f"✗ Erro na conexão com o banco: {e}")
+        return 1
+    
+    print(f"🚀 Importando {len(archives)} arquivo(s) com até {args.workers} em paralelo...")
+    
+    start = time.perf_counter()
+    failures = 0
+    total_rows = 0
+    total_bytes = 0
+    
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(ingest_archive, path, db_manager, args.chunksize, args.force): path
+            for path in archives
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"✗ {os.path.basename(path)}: {e}")
+                continue
+            
+            total_rows += result['rows']
+            total_bytes += result['bytes']
+            if result['status'] == 'incomplete':
+                # Loaded, but not recorded as imported: its failed members need attention
+                failures += 1
+            print(format_result(result))
+            for message in result.get('warnings', []):
+                print(f"  ⚠️  {message}")
+    
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(
+        f"\n{len(archives) - failures}/{len(archives)} arquivo(s) importado(s) em {elapsed:.1f}s "
+        f"({total_rows / elapsed:,.0f} linhas/s, {total_bytes / elapsed / 1024 / 1024:.1f} MB/s)"
+    )
+    
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import os
+import uuid
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from benchmarks.fixtures import postgres_database_manager, sqlite_database_manager
+
+HEADER_FILE = '202401_NFs_Cabecalho.csv'
+ITEM_FILE = '202401_NFs_Itens.csv'
+
+# (emission date, emitter, recipient, invoice value) per invoice
+INVOICES = [
+    ('2024-01-05 10:00:00', '11111111000111', '99999999000199', 150.10),
+    ('2024-01-05 11:30:00', '11111111000111', '88888888000188', 20.25),
+    ('2024-01-12 09:00:00', '22222222000122', '99999999000199', 1234.56),
+    ('2024-01-20 15:45:00', '22222222000122', None, None),
+    ('2024-01-31 23:59:00', '11111111000111', '77777777000177', 0.99),
+    ('2024-02-01 08:00:00', '22222222000122', '88888888000188', 310.00),
+    ('2024-02-14 12:00:00', '11111111000111', '99999999000199', 75.40)
+]
+# (invoice index, description, quantity, unit value)
+ITEMS = [
+    (0, 'ARROZ 5KG', 2, 25.05), (0, 'FEIJAO 1KG', 10, 10.00),
+    (1, 'ARROZ 5KG', 1, 20.25),
+    (2, 'NOTEBOOK', 1, 1200.00), (2, 'MOUSE', 2, 17.28),
+    (3, 'FEIJAO 1KG', 3, 9.90),
+    (4, None, 1, 0.99),
+    (5, 'NOTEBOOK', 0.25, 1240.00),
+    (6, 'ARROZ 5KG', 3, 25.13), (6, 'MOUSE', 0.5, 0.01)
+]
+
+
+def access_key(index, emitted):
+    """44-character access key encoding the emission year and month (AAMM) like real NF-e keys"""
+    return f"41{emitted[2:4]}{emitted[5:7]}{index:038d}"
+
+
+@pytest.fixture
+def db(tmp_path):
+    return sqlite_database_manager(str(tmp_path / 'nfe.sqlite'))
+
+
+@pytest.fixture
+def pg_db():
+    """
+    DatabaseManager on a private schema of the PostgreSQL server in
+    TEST_DATABASE_URL, with partitioned tables; skipped when it is not set
+    """
+    url = os.getenv('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    db = postgres_database_manager(url, schema)
+    yield db
+    
+    db.engine.dispose()
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+    admin.dispose()
+
+
+@pytest.fixture
+def headers():
+    """Invoice header chunk as produced by ZipHandler for the Cabecalho layout"""
+    return pd.DataFrame({
+        'CHAVE DE ACESSO': [access_key(i, row[0]) for i, row in enumerate(INVOICES)],
+        'NÚMERO': [str(1000 + i) for i in range(len(INVOICES))],
+        'DATA EMISSÃO': pd.to_datetime([row[0] for row in INVOICES]),
+        'EVENTO MAIS RECENTE': 'Autorização de Uso',
+        'DATA/HORA EVENTO MAIS RECENTE': pd.to_datetime([row[0] for row in INVOICES]) + pd.Timedelta(minutes=1),
+        'CPF/CNPJ Emitente': [row[1] for row in INVOICES],
+        'CNPJ DESTINATÁRIO': [row[2] for row in INVOICES],
+        'VALOR NOTA FISCAL': [row[3] for row in INVOICES]
+    })
+
+
+@pytest.fixture
+def items():
+    """Invoice items chunk as produced by ZipHandler for the Itens layout"""
+    return pd.DataFrame({
+        'CHAVE DE ACESSO': [access_key(row[0], INVOICES[row[0]][0]) for row in ITEMS],
+        'NÚMERO PRODUTO': [str(n) for n in range(1, len(ITEMS) + 1)],
+        'DESCRIÇÃO DO PRODUTO/SERVIÇO': [row[1] for row in ITEMS],
+        'QUANTIDADE': [float(row[2]) for row in ITEMS],
+        'VALOR UNITÁRIO': [row[3] for row in ITEMS],
+        'VALOR TOTAL': [round(row[2] * row[3], 2) for row in ITEMS]
+    })
+
+
+@pytest.fixture
+def archive(headers, items):
+    """One monthly archive, headers before items as save_csv_data expects"""
+    return {HEADER_FILE: headers, ITEM_FILE: items}
@@ -0,0 +1,48 @@
+import zipfile
+
+import pytest
+from sqlalchemy import text
+
+from benchmarks.fixtures import BUNDLED_ARCHIVE
+from utils.database import ROLLUP_TABLES
+
+
+def rollup_rows(conn):
+    return {
+        rollup: sorted(tuple(row) for row in conn.execute(text(f"SELECT * FROM {rollup}")))
+        for rollup in ROLLUP_TABLES
+    }
+
+
+def assert_rollups_match_rebuild(db):
+    """The incrementally maintained rollups equal a full rebuild"""
+    with db.engine.connect() as conn:
+        maintained = rollup_rows(conn)
+        db._rebuild_rollups(conn)
+        rebuilt = rollup_rows(conn)
+        conn.rollback()
+    
+    for rollup, rows in rebuilt.items():
+        assert [row[:len(ROLLUP_TABLES[rollup][0])] for row in maintained[rollup]] == \
+            [row[:len(ROLLUP_TABLES[rollup][0])] for row in rows], rollup
+        for got, expected in zip(maintained[rollup], rows):
+            assert got == pytest.approx(expected), rollup
+
+
+def scalar(db, sql):
+    with db.engine.connect() as conn:
+        return conn.execute(text(sql)).scalar()
+
+
+def write_zip(path, members):
+    """Write a ZIP archive of {member name: bytes} and return its path as a string"""
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return str(path)
+
+
+def bundled_members():
+    """{member name: bytes} of the bundled 202401_NFs.zip"""
+    with zipfile.ZipFile(BUNDLED_ARCHIVE) as archive:
+        return {info.filename: archive.read(info) for info in archive.infolist()}
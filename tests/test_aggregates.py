@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import BUNDLED_ARCHIVE
+from utils.aggregates import NumericAggregate, DateAggregate, merge_states, states_from_dict, states_to_dict
+from utils.csv_processor import CSVProcessor
+from utils.zip_handler import ZipHandler
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(7).lognormal(mean=5, sigma=2, size=5000)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'valor_total': np.arange(1, 1001, dtype='float64') / 4,
+        'data_emissao': pd.date_range('2024-01-01', periods=1000, freq='h'),
+        'descricao': [f'produto {n % 97}' for n in range(1000)]
+    })
+
+
+def test_numeric_merge_matches_single_pass(values):
+    merged = NumericAggregate()
+    for chunk in np.array_split(values, 7):
+        merged.merge(NumericAggregate().update(chunk))
+    
+    assert merged.count == len(values)
+    assert merged.total == pytest.approx(values.sum())
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.variance == pytest.approx(values.var(ddof=1))
+    assert (merged.minimum, merged.maximum) == (values.min(), values.max())
+
+
+def test_numeric_merge_keeps_failures_and_ignores_nan():
+    left = NumericAggregate().update(pd.Series([1.0, np.nan, 3.0]), failures=2)
+    right = NumericAggregate().update(pd.Series([np.nan]), failures=1)
+    
+    merged = left.merge(right)
+    assert (merged.count, merged.total, merged.failures) == (2, 4.0, 3)
+
+
+def test_date_merge():
+    january = DateAggregate().update(pd.to_datetime(['2024-01-05', '2024-01-31', None]))
+    february = DateAggregate().update(pd.to_datetime(['2024-02-14']))
+    
+    merged = january.merge(february)
+    assert merged.count == 3
+    assert (merged.minimum, merged.maximum) == (pd.Timestamp('2024-01-05'), pd.Timestamp('2024-02-14'))
+    assert DateAggregate().merge(DateAggregate()).count == 0
+
+
+def test_merge_states_matches_whole_and_leaves_inputs(frame):
+    processor = CSVProcessor()
+    left = processor.aggregate(frame.iloc[:400])
+    right = processor.aggregate(frame.iloc[400:])
+    left_before = states_to_dict(left)
+    
+    merged = merge_states(left, right)
+    whole = processor.aggregate(frame)
+    
+    assert states_to_dict(left) == left_before
+    assert merged['financial']['valor_total'].total == pytest.approx(whole['financial']['valor_total'].total)
+    assert merged['financial']['valor_total'].std == pytest.approx(whole['financial']['valor_total'].std)
+    assert states_to_dict(merged)['dates'] == states_to_dict(whole)['dates']
+    assert states_to_dict(states_from_dict(states_to_dict(merged))) == states_to_dict(merged)
+
+
+def test_chunked_summary_matches_whole_frame(frame):
+    processor = CSVProcessor()
+    chunks = [frame.iloc[start:start + 300] for start in range(0, len(frame), 300)]
+    
+    assert processor.get_financial_summary(iter(chunks)) == pytest.approx(processor.get_financial_summary(frame))
+    assert processor.get_date_range_summary(iter(chunks)) == processor.get_date_range_summary(frame)
+
+
+def test_summaries_of_streamed_archive_members():
+    processor = CSVProcessor()
+    handler = ZipHandler()
+    whole = handler.extract_csv_files(BUNDLED_ARCHIVE)
+    
+    headers = processor.get_financial_summary(handler.iter_csv_chunks(BUNDLED_ARCHIVE, chunksize=50))
+    assert headers == pytest.approx(processor.get_financial_summary(whole['202401_NFs_Cabecalho.csv']))
+    
+    chunks = handler.iter_csv_chunks(BUNDLED_ARCHIVE, chunksize=500)
+    items = processor.get_date_range_summary(chunks, member='itens')
+    assert items == processor.get_date_range_summary(whole['202401_NFs_Itens.csv'])
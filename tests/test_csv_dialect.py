@@ -0,0 +1,56 @@
+import io
+
+import pandas as pd
+
+from tests.helpers import bundled_members, write_zip
+from utils.csv_dialect import DialectDetector
+from utils.zip_handler import ZipHandler
+
+
+def detect(data, **options):
+    return DialectDetector(**options).detect(io.BytesIO(data))
+
+
+def test_semicolon_latin1_with_quoted_delimiters():
+    data = 'NOME;VALOR;CIDADE\n"Padaria; Café";"1.234,56";São Paulo\nAção;2,00;Curitiba\n'.encode('cp1252')
+    dialect = detect(data)
+    
+    assert (dialect['encoding'], dialect['delimiter'], dialect['quotechar']) == ('cp1252', ';', '"')
+    assert (dialect['header_row'], dialect['columns'], dialect['field_count']) == (0, ['NOME', 'VALOR', 'CIDADE'], 3)
+
+
+def test_bom_preamble_and_tabs():
+    data = '\ufeffRelatório gerado em 01/02/2024\nCHAVE\tVALOR\n1\t2\n3\t4\n'.encode('utf-8')
+    dialect = detect(data)
+    
+    assert (dialect['encoding'], dialect['delimiter']) == ('utf-8-sig', '\t')
+    assert (dialect['header_row'], dialect['columns']) == (1, ['CHAVE', 'VALOR'])
+
+
+def test_multibyte_character_cut_by_the_sample():
+    data = ('A,B\n' + 'ç,ã\n' * 50).encode('utf-8')
+    # The sample ends in the middle of a two-byte character
+    dialect = detect(data, sample_size=len('A,B\n'.encode('utf-8')) + 1)
+    
+    assert dialect['encoding'] == 'utf-8'
+    assert dialect['sample_bytes'] == 5
+
+
+def test_single_column_file():
+    assert detect(b'apenas uma coluna\nsem separador\n')['field_count'] < 2
+
+
+def test_reexported_archive_parses_like_the_original(tmp_path):
+    members = bundled_members()
+    original = ZipHandler().extract_csv_files(write_zip(tmp_path / 'original.zip', members))
+    
+    # The same data as a semicolon separated, cp1252 encoded export
+    for name, data in members.items():
+        df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+        members[name] = df.to_csv(sep=';', index=False).encode('cp1252')
+    handler = ZipHandler()
+    exported = handler.extract_csv_files(write_zip(tmp_path / 'exported.zip', members))
+    
+    for name, df in original.items():
+        assert handler.member_stats[name]['dialect']['delimiter'] == ';'
+        pd.testing.assert_frame_equal(exported[name], df)
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from utils.csv_processor import CSVProcessor
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('R$ 1.234,56', 1234.56),
+    ('1.234.567,89', 1234567.89),
+    ('0,99', 0.99),
+    ('-15,00', -15.0),
+    ('(1.000,50)', -1000.5),
+    ('R$1234', 1234.0)
+])
+def test_parse_currency_pt_br(raw, expected):
+    values, failures, number_locale = CSVProcessor().parse_currency(pd.Series([raw, 'R$ 2,50']))
+    
+    assert number_locale == 'pt-BR'
+    assert failures == 0
+    assert values.iloc[0] == pytest.approx(expected)
+
+
+def test_parse_currency_detects_locale_and_counts_failures():
+    processor = CSVProcessor()
+    
+    values, failures, number_locale = processor.parse_currency(pd.Series(['1.234,56', '10,00', 'n/d', None, '']))
+    assert number_locale == 'pt-BR'
+    assert values.iloc[:2].tolist() == [1234.56, 10.0]
+    assert values.iloc[2:].isna().all()
+    assert failures == 1
+    
+    values, _, number_locale = processor.parse_currency(pd.Series(['$1,234.56', '10.00']))
+    assert number_locale == 'en-US'
+    assert values.tolist() == [1234.56, 10.0]
+    
+    numeric = pd.Series([1.5, 2.0])
+    values, failures, number_locale = processor.parse_currency(numeric)
+    assert values is numeric and (failures, number_locale) == (0, None)
+
+
+def test_profile_is_memoized():
+    processor = CSVProcessor()
+    df = pd.DataFrame({
+        'VALOR TOTAL': ['1.234,56', '10,00', None],
+        'DATA EMISSÃO': ['01/02/2024', '15/02/2024', '20/02/2024'],
+        'UF': ['SP', 'SP', 'RJ']
+    })
+    
+    profile = processor.profile(df)
+    assert processor.profile(df.copy()) is profile
+    assert profile['financial_columns'] == ['VALOR TOTAL']
+    assert profile['date_columns'] == ['DATA EMISSÃO']
+    assert profile['columns']['VALOR TOTAL']['stats']['total'] == pytest.approx(1244.56)
+    
+    changed = df.copy()
+    changed.loc[2, 'UF'] = 'MG'
+    assert processor.profile(changed) is not profile
+    
+    # A version key replaces the fingerprint: the data is not scanned again
+    versioned = processor.profile(df, version=('notas', 1))
+    assert processor.profile(changed, version=('notas', 1)) is versioned
+    assert processor.profile(changed, version=('notas', 2)) is not versioned
+
+
+def test_get_column_info():
+    processor = CSVProcessor()
+    df = pd.DataFrame({
+        'VALOR': ['R$ 1,00', 'R$ 2,00', 'R$ 2,00', None],
+        'QUANTIDADE': [1.0, 2.0, 3.0, 4.0]
+    })
+    
+    info = processor.get_column_info(df).set_index('Column')
+    assert info.loc['VALOR', 'Type'] == 'Financial'
+    assert info.loc['VALOR', 'Null Count'] == 1
+    assert info.loc['VALOR', 'Unique Values'] == 2
+    assert info.loc['QUANTIDADE', 'Type'] == 'Other'
+    assert 'P95' not in info.columns
+    
+    approximate = processor.get_column_info(df, approximate=True).set_index('Column')
+    assert approximate.loc['QUANTIDADE', 'Unique Values'] == 4
+    assert approximate.loc['QUANTIDADE', 'P50'] == pytest.approx(2.0, rel=0.05)
@@ -0,0 +1,194 @@
+import pandas as pd
+import pytest
+from sqlalchemy import event, text
+
+from tests.helpers import assert_rollups_match_rebuild, rollup_rows, scalar
+from utils.database import DatabaseManager, invoice_cursor
+
+
+def test_upsert_counts(db, archive, headers):
+    stats = db.save_csv_data(archive)
+    assert (stats['inserted'], stats['updated'], stats['unchanged']) == (7, 0, 0)
+    assert stats['items'] == 10
+    
+    stats = db.save_csv_data(archive)
+    assert (stats['inserted'], stats['updated'], stats['unchanged']) == (0, 0, 7)
+    
+    changed = headers.copy()
+    changed.loc[0, 'VALOR NOTA FISCAL'] = 999.0
+    changed.loc[0, 'DATA/HORA EVENTO MAIS RECENTE'] = pd.Timestamp('2024-03-01')
+    stats = db.save_csv_data({'202401_NFs_Cabecalho.csv': changed})
+    assert (stats['inserted'], stats['updated'], stats['unchanged']) == (0, 1, 6)
+    assert scalar(db, "SELECT COUNT(*) FROM invoices") == 7
+
+
+def test_older_event_leaves_rows_unchanged(db, archive, headers):
+    db.save_csv_data(archive)
+    with db.engine.connect() as conn:
+        before = conn.execute(text("SELECT * FROM invoices ORDER BY id")).fetchall()
+    
+    older = headers.copy()
+    older['VALOR NOTA FISCAL'] = 1.0
+    older['EVENTO MAIS RECENTE'] = 'Cancelamento'
+    older['DATA/HORA EVENTO MAIS RECENTE'] = pd.Timestamp('2023-12-31')
+    stats = db.save_csv_data({'202401_NFs_Cabecalho.csv': older})
+    
+    assert (stats['inserted'], stats['updated'], stats['unchanged']) == (0, 0, 7)
+    with db.engine.connect() as conn:
+        assert conn.execute(text("SELECT * FROM invoices ORDER BY id")).fetchall() == before
+    assert_rollups_match_rebuild(db)
+
+
+def test_rollups_follow_reloads(db, archive, headers, items):
+    db.save_csv_data(archive)
+    assert_rollups_match_rebuild(db)
+    
+    # Updated headers move invoices between emitters and recipients
+    changed = headers.copy()
+    changed['CPF/CNPJ Emitente'] = changed['CPF/CNPJ Emitente'].iloc[::-1].to_numpy()
+    changed['VALOR NOTA FISCAL'] = changed['VALOR NOTA FISCAL'] * 2
+    changed['DATA/HORA EVENTO MAIS RECENTE'] = pd.Timestamp('2024-03-01')
+    db.save_csv_data({'202401_NFs_Cabecalho.csv': changed})
+    assert_rollups_match_rebuild(db)
+    
+    # Items of one file split over chunks, then replaced by fewer items
+    db.save_csv_data([('202401_NFs_Itens.csv', items.iloc[:4]), ('202401_NFs_Itens.csv', items.iloc[4:])])
+    assert_rollups_match_rebuild(db)
+    db.save_csv_data({'202401_NFs_Itens.csv': items.iloc[[0, 2]]})
+    assert scalar(db, "SELECT COUNT(*) FROM invoice_items") == 9
+    assert_rollups_match_rebuild(db)
+
+
+def test_drop_and_reload_month(db, archive, headers, items):
+    db.save_csv_data(archive)
+    
+    db.drop_month('2024-02')
+    assert scalar(db, "SELECT COUNT(*) FROM invoices") == 5
+    assert scalar(db, "SELECT COUNT(*) FROM invoice_items") == 7
+    assert scalar(db, "SELECT COUNT(*) FROM invoice_month_rollup WHERE mes = '2024-02'") == 0
+    assert_rollups_match_rebuild(db)
+    
+    january = headers['DATA EMISSÃO'] < '2024-02-01'
+    keys = set(headers.loc[january, 'CHAVE DE ACESSO'].iloc[:3])
+    stats = db.reload_month('202401', {
+        '202401_NFs_Cabecalho.csv': headers[headers['CHAVE DE ACESSO'].isin(keys)],
+        '202401_NFs_Itens.csv': items[items['CHAVE DE ACESSO'].isin(keys)]
+    })
+    assert stats['inserted'] == 3
+    assert scalar(db, "SELECT COUNT(*) FROM invoices") == 3
+    assert_rollups_match_rebuild(db)
+    
+    db.drop_month('2024-01')
+    with db.engine.connect() as conn:
+        assert all(not rows for rows in rollup_rows(conn).values())
+
+
+def test_summary_reads_rollups(db, archive, headers, items):
+    db.save_csv_data(archive)
+    summary = db.get_invoice_summary()
+    
+    assert summary['invoices']['total_invoices'] == len(headers)
+    assert summary['invoices']['total_value'] == pytest.approx(headers['VALOR NOTA FISCAL'].sum())
+    assert summary['invoices']['unique_emitters'] == headers['CPF/CNPJ Emitente'].nunique()
+    assert summary['items']['total_items'] == len(items)
+    assert summary['items']['total_items_value'] == pytest.approx(items['VALOR TOTAL'].sum())
+    
+    top = db.get_top_products(limit=2)
+    assert [product['descricao_produto'] for product in top] == ['NOTEBOOK', 'ARROZ 5KG']
+
+
+def test_keyset_pages_cover_every_invoice(db, archive):
+    db.save_csv_data(archive)
+    full = db.query_invoices()
+    assert [row['data_emissao'] for row in full] == sorted((row['data_emissao'] for row in full), reverse=True)
+    
+    pages = []
+    after = None
+    while page := db.query_invoices(limit=3, after=after):
+        assert len(page) <= 3
+        pages.append(page)
+        after = invoice_cursor(page[-1])
+    
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [row for page in pages for row in page] == full
+    assert sum(row['item_count'] for row in full) == 10
+
+
+def test_keyset_pages_with_filters(db, archive):
+    db.save_csv_data(archive)
+    params = {'start_date': '2024-01-05', 'end_date': '2024-02-01', 'emitente': '11111111000111'}
+    full = db.query_invoices(params)
+    
+    pages = []
+    after = None
+    while page := db.query_invoices(params, limit=2, after=after):
+        pages.extend(page)
+        after = invoice_cursor(page[-1])
+    
+    assert len(full) == 3
+    assert pages == full
+    assert [row for batch in db.iter_invoices(params, batch_size=2) for row in batch] == full
+
+
+def test_sync_data_version_sees_other_writers(db, archive, headers):
+    db.save_csv_data(archive)
+    cached = DatabaseManager(engine=db.engine)
+    version = cached.sync_data_version()
+    assert cached.sync_data_version() == version
+    total = cached.get_invoice_summary()['invoices']['total_invoices']
+    
+    # Another process writes: the counter of this one is not bumped
+    with db.engine.connect() as conn:
+        conn.execute(text("UPDATE invoice_month_rollup SET invoice_count = invoice_count + 1"))
+        conn.commit()
+    assert cached.data_version == version
+    assert cached.get_invoice_summary()['invoices']['total_invoices'] == total
+    
+    assert cached.sync_data_version() > version
+    assert cached.get_invoice_summary()['invoices']['total_invoices'] > total
+
+
+def test_fingerprint_is_recorded_with_the_load(db, archive, headers):
+    db.save_csv_data(archive, fingerprint='first', archive_name='202401_NFs.zip')
+    assert db.is_archive_ingested('first')
+    
+    def failing():
+        yield '202401_NFs_Cabecalho.csv', headers.assign(**{'VALOR NOTA FISCAL': 1.0})
+        raise RuntimeError("archive read failed")
+    
+    with pytest.raises(RuntimeError):
+        db.save_csv_data(failing(), fingerprint='second')
+    assert not db.is_archive_ingested('second')
+    assert scalar(db, "SELECT SUM(valor_nota_fiscal) FROM invoices") == pytest.approx(headers['VALOR NOTA FISCAL'].sum())
+
+
+def test_item_replace_is_set_based(db, items):
+    # More keys than SQLite accepts as bound parameters in one statement
+    many = pd.concat([items.iloc[[0]]] * 1500, ignore_index=True)
+    many['CHAVE DE ACESSO'] = [f"4124{n:040d}" for n in range(1500)]
+    many['VALOR TOTAL'] = 1.0
+    db.save_csv_data({'202401_NFs_Itens.csv': many})
+    assert scalar(db, "SELECT COUNT(*) FROM invoice_items") == 1500
+    
+    replaced = pd.concat([many.iloc[:1000], many.iloc[:1000]], ignore_index=True)
+    replaced['VALOR TOTAL'] = 2.0
+    deletes = []
+    
+    def count_deletes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('DELETE FROM INVOICE_ITEMS'):
+            deletes.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', count_deletes)
+    try:
+        db.save_csv_data({'202401_NFs_Itens.csv': replaced})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_deletes)
+    
+    assert len(deletes) == 1
+    with db.engine.connect() as conn:
+        rows = dict(conn.execute(text(
+            "SELECT valor_total, COUNT(*) FROM invoice_items GROUP BY valor_total"
+        )).fetchall())
+    # Keys in the chunk are replaced by both of their new items, the others are kept
+    assert rows == {1.0: 500, 2.0: 2000}
+    assert_rollups_match_rebuild(db)
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from tests.helpers import assert_rollups_match_rebuild, scalar
+
+
+@pytest.fixture
+def dated_archive(headers, items):
+    """The archive with the invoice's emission date repeated on its items, as in real exports"""
+    dates = headers.set_index('CHAVE DE ACESSO')['DATA EMISSÃO']
+    return {
+        '202401_NFs_Cabecalho.csv': headers,
+        '202401_NFs_Itens.csv': items.assign(**{'DATA EMISSÃO': items['CHAVE DE ACESSO'].map(dates)})
+    }
+
+
+def test_partitioned_tables(pg_db, dated_archive):
+    stats = pg_db.save_csv_data(dated_archive)
+    
+    assert (stats['inserted'], stats['items']) == (7, 10)
+    assert scalar(pg_db, "SELECT COUNT(*) FROM invoices_2024_02") == 2
+    assert scalar(pg_db, "SELECT COUNT(*) FROM invoice_items_2024_01") == 7
+    assert_rollups_match_rebuild(pg_db)
+
+
+def test_concurrent_loads_of_the_same_keys(pg_db, dated_archive):
+    results = []
+    
+    def load():
+        results.append(pg_db.save_csv_data(dated_archive))
+    
+    # As ingest_archives does: creating a partition would lock the tables until the commit
+    pg_db.create_partitions(['2024-01', '2024-02'])
+    with pg_db.engine.connect() as conn:
+        pg_db._save_serial(conn, dated_archive.items())
+        second = threading.Thread(target=load)
+        second.start()
+        # The second load reads the rollup deltas of keys the first one has
+        # inserted but not committed yet
+        time.sleep(0.5)
+        conn.commit()
+    second.join()
+    
+    assert results and results[0]['inserted'] == 0
+    assert scalar(pg_db, "SELECT COUNT(*) FROM invoices") == 7
+    assert scalar(pg_db, "SELECT SUM(invoice_count) FROM invoice_month_rollup") == 7
+    assert scalar(pg_db, "SELECT SUM(invoice_count) FROM invoice_recipient_rollup") == 7
+    assert_rollups_match_rebuild(pg_db)
+
+
+def test_items_take_the_stored_invoice_date(pg_db, archive, items):
+    # Items without a date, then items dated a day after their invoice
+    stats = pg_db.save_csv_data(archive)
+    assert (stats['inserted'], stats['items']) == (7, 10)
+    
+    shifted = items.assign(**{'DATA EMISSÃO': pd.Timestamp('2024-01-06')})
+    pg_db.save_csv_data({'202401_NFs_Itens.csv': shifted})
+    
+    assert scalar(pg_db, "SELECT COUNT(*) FROM invoice_items") == 10
+    assert scalar(pg_db, """
+        SELECT COUNT(*) FROM invoice_items ii
+        JOIN invoices i ON i.chave_acesso = ii.chave_acesso AND i.data_emissao = ii.data_emissao
+    """) == 10
+    assert scalar(pg_db, "SELECT COUNT(*) FROM invoice_items_2024_02") == 3
+    assert_rollups_match_rebuild(pg_db)
+
+
+def test_parallel_load(pg_db, dated_archive):
+    chunks = [(name, df.iloc[start:start + 3]) for name, df in dated_archive.items() for start in range(0, len(df), 3)]
+    stats = pg_db.save_csv_data(chunks, workers=3)
+    
+    assert (stats['inserted'], stats['items']) == (7, 10)
+    assert len(stats['workers']) == 3
+    assert scalar(pg_db, "SELECT COUNT(*) FROM invoices") == 7
+    assert_rollups_match_rebuild(pg_db)
+    
+    stats = pg_db.save_csv_data(chunks, workers=3)
+    assert (stats['inserted'], stats['unchanged']) == (0, 7)
+    assert_rollups_match_rebuild(pg_db)
+
+
+def test_failed_parallel_worker_keeps_rollups_of_committed_chunks(pg_db, dated_archive, headers):
+    broken = headers.iloc[:1].assign(**{'CHAVE DE ACESSO': '4' * 50})
+    chunks = [('202401_NFs_Cabecalho.csv', headers), ('202401_NFs_Cabecalho.csv', broken)]
+    
+    with pytest.raises(Exception):
+        pg_db.save_csv_data(chunks, workers=2)
+    assert scalar(pg_db, "SELECT COUNT(*) FROM invoices") == 7
+    assert_rollups_match_rebuild(pg_db)
@@ -0,0 +1,68 @@
+import os
+
+import ingest_archives
+from ingest_archives import find_archives, ingest_archive
+from tests.helpers import bundled_members, scalar, write_zip
+from utils.zip_handler import ZipHandler
+
+UNREADABLE = {'202401_NFs_Notas.csv': b'uma coluna so\nsem separador\n'}
+
+
+def test_archive_with_unreadable_member_is_not_recorded(db, tmp_path):
+    path = write_zip(tmp_path / '202401_NFs.zip', {**bundled_members(), **UNREADABLE})
+    
+    result = ingest_archive(path, db)
+    assert result['status'] == 'incomplete'
+    assert result['rows'] > 0
+    assert not db.is_archive_ingested(ZipHandler().get_archive_fingerprint(path))
+    # Loading it again retries instead of skipping it
+    assert ingest_archive(path, db)['status'] == 'incomplete'
+
+
+def test_extracted_archive_lists_failed_members(tmp_path):
+    path = write_zip(tmp_path / '202401_NFs.zip', {**bundled_members(), **UNREADABLE})
+    handler = ZipHandler()
+    
+    csv_files = handler.extract_csv_files(path)
+    assert sorted(csv_files) == ['202401_NFs_Cabecalho.csv', '202401_NFs_Itens.csv']
+    assert handler.failed_members() == ['202401_NFs_Notas.csv']
+
+
+def test_find_archives(tmp_path):
+    for name in ('202402_NFs.zip', '202401_NFs.zip', 'notas.zip'):
+        (tmp_path / name).write_bytes(b'')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / '202312_NFs.zip').write_bytes(b'')
+    
+    directory = find_archives([str(tmp_path)])
+    assert [os.path.basename(path) for path in directory] == ['202401_NFs.zip', '202402_NFs.zip']
+    
+    sources = [str(tmp_path / '2024*_NFs.zip'), str(tmp_path / 'sub' / '202312_NFs.zip'), str(tmp_path)]
+    assert [os.path.basename(path) for path in find_archives(sources)] == [
+        '202312_NFs.zip', '202401_NFs.zip', '202402_NFs.zip'
+    ]
+    assert find_archives([str(tmp_path / 'missing')]) == []
+
+
+def test_ingest_archive_skips_ingested_archives(db, tmp_path):
+    path = write_zip(tmp_path / '202401_NFs.zip', bundled_members())
+    
+    result = ingest_archive(path, db, chunksize=40)
+    assert (result['status'], result['rows']) == ('ok', 665)
+    assert scalar(db, "SELECT COUNT(*) FROM invoices") == 100
+    assert ingest_archive(path, db)['status'] == 'skipped'
+    assert ingest_archive(path, db, force=True)['status'] == 'ok'
+    assert scalar(db, "SELECT COUNT(*) FROM invoices") == 100
+
+
+def test_main_exit_codes(db, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(ingest_archives, 'DatabaseManager', lambda: db)
+    write_zip(tmp_path / '202401_NFs.zip', bundled_members())
+    (tmp_path / '202402_NFs.zip').write_bytes(b'not a zip file')
+    
+    assert ingest_archives.main([str(tmp_path / '202401_NFs.zip')]) == 0
+    assert ingest_archives.main([str(tmp_path), '--workers', '2']) == 1
+    output = capsys.readouterr().out
+    assert '↷ 202401_NFs.zip' in output
+    assert '✗ 202402_NFs.zip' in output
+    assert ingest_archives.main([str(tmp_path / 'nada')]) == 1
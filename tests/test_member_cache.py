@@ -0,0 +1,72 @@
+import os
+import zipfile
+
+import pandas as pd
+
+from benchmarks.fixtures import BUNDLED_ARCHIVE
+from tests.helpers import bundled_members, write_zip
+from utils.member_cache import MemberCache
+from utils.zip_handler import ZipHandler
+
+
+def member_info(name, data):
+    info = zipfile.ZipInfo(name)
+    info.CRC = zipfile.crc32(data)
+    info.file_size = len(data)
+    return info
+
+
+def test_second_extraction_is_served_from_the_cache(tmp_path):
+    cache = MemberCache(cache_dir=str(tmp_path / 'cache'))
+    first = ZipHandler(cache=cache)
+    parsed = first.extract_csv_files(BUNDLED_ARCHIVE)
+    assert {stats['cache'] for stats in first.member_stats.values()} == {'miss'}
+    
+    second = ZipHandler(cache=cache)
+    cached = second.extract_csv_files(BUNDLED_ARCHIVE)
+    assert {stats['cache'] for stats in second.member_stats.values()} == {'hit'}
+    for name, df in parsed.items():
+        # Categories, datetimes and string keys come back as parsed
+        pd.testing.assert_frame_equal(cached[name], df)
+
+
+def test_changed_member_misses(tmp_path):
+    cache = MemberCache(cache_dir=str(tmp_path / 'cache'))
+    members = bundled_members()
+    ZipHandler(cache=cache).extract_csv_files(write_zip(tmp_path / 'a.zip', members))
+    
+    members['202401_NFs_Itens.csv'] += b'\n'
+    handler = ZipHandler(cache=cache)
+    handler.extract_csv_files(write_zip(tmp_path / 'b.zip', members))
+    assert handler.member_stats['202401_NFs_Cabecalho.csv']['cache'] == 'hit'
+    assert handler.member_stats['202401_NFs_Itens.csv']['cache'] == 'miss'
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    frame = pd.DataFrame({'valor': range(1000)})
+    infos = [member_info(f"{n}.csv", bytes([n])) for n in range(3)]
+    cache = MemberCache(cache_dir=str(tmp_path))
+    for written, info in enumerate(infos):
+        cache.put(info, frame)
+        os.utime(cache._path(info), (1000 + written, 1000 + written))
+    entry_size = os.path.getsize(cache._path(infos[0]))
+    
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(infos[0]) is not None
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+    
+    assert cache.get(infos[1]) is None
+    assert cache.get(infos[0]) is not None
+    assert cache.get(infos[2]) is not None
+
+
+def test_unreadable_entry_is_discarded(tmp_path):
+    cache = MemberCache(cache_dir=str(tmp_path))
+    info = member_info('a.csv', b'a')
+    cache.put(info, pd.DataFrame({'a': [1]}))
+    with open(cache._path(info), 'wb') as f:
+        f.write(b'not parquet')
+    
+    assert cache.get(info) is None
+    assert not os.path.exists(cache._path(info))
@@ -0,0 +1,73 @@
+import re
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import BUNDLED_ARCHIVE
+from tests.helpers import bundled_members, write_zip
+from utils import nfe_schema
+from utils.zip_handler import ZipHandler
+
+HEADER_FILE = '202401_NFs_Cabecalho.csv'
+ITEM_FILE = '202401_NFs_Itens.csv'
+
+
+def test_detect_layout():
+    assert nfe_schema.detect_layout([f" {col} " for col in nfe_schema.INVOICE_COLUMNS]) == 'invoices'
+    # Item files repeat most header columns
+    assert nfe_schema.detect_layout(list(nfe_schema.INVOICE_COLUMNS) + list(nfe_schema.ITEM_COLUMNS)) == 'items'
+    assert nfe_schema.detect_layout(['CHAVE DE ACESSO', 'VALOR']) is None
+    assert nfe_schema.read_csv_options(['CHAVE DE ACESSO', 'VALOR']) == (None, {}, [])
+
+
+def test_known_layouts_are_parsed_with_their_schema():
+    handler = ZipHandler()
+    csv_files = handler.extract_csv_files(BUNDLED_ARCHIVE)
+    headers, items = csv_files[HEADER_FILE], csv_files[ITEM_FILE]
+    
+    assert handler.member_stats[HEADER_FILE]['dialect']['layout'] == 'invoices'
+    assert handler.member_stats[ITEM_FILE]['dialect']['layout'] == 'items'
+    assert headers['CHAVE DE ACESSO'].str.fullmatch(r'\d{44}').all()
+    assert isinstance(headers['UF EMITENTE'].dtype, pd.CategoricalDtype)
+    assert isinstance(items['CFOP'].dtype, pd.CategoricalDtype)
+    assert headers['VALOR NOTA FISCAL'].dtype == 'float64'
+    assert pd.api.types.is_datetime64_any_dtype(headers['DATA EMISSÃO'])
+    assert pd.api.types.is_datetime64_any_dtype(headers['DATA/HORA EVENTO MAIS RECENTE'])
+
+
+def test_leading_zeros_survive(tmp_path):
+    members = bundled_members()
+    # The first invoice's emitter gets a CNPJ starting with zeros
+    members[HEADER_FILE] = members[HEADER_FILE].replace(b',06267630001509,', b',00012345000199,')
+    
+    headers = ZipHandler().extract_csv_files(write_zip(tmp_path / 'a.zip', members))[HEADER_FILE]
+    assert headers['CPF/CNPJ Emitente'].iloc[0] == '00012345000199'
+
+
+def test_parse_dates_rejects_other_formats_without_converting():
+    df = pd.DataFrame({
+        'DATA EMISSÃO': ['2024-01-05 10:00:00', '2024-01-06'],
+        ' DATA/HORA EVENTO MAIS RECENTE': ['2024-01-05', '05/01/2024']
+    })
+    
+    # Raw header names, as read_csv_options returns them
+    with pytest.raises(ValueError, match='DATA/HORA EVENTO MAIS RECENTE'):
+        nfe_schema.parse_dates(df, ['DATA EMISSÃO', ' DATA/HORA EVENTO MAIS RECENTE'])
+    assert not pd.api.types.is_datetime64_any_dtype(df['DATA EMISSÃO'])
+    
+    failures = nfe_schema.coerce_dates(df, [' DATA/HORA EVENTO MAIS RECENTE'])
+    assert failures == {'DATA/HORA EVENTO MAIS RECENTE': 1}
+    assert df[' DATA/HORA EVENTO MAIS RECENTE'].isna().tolist() == [False, True]
+
+
+def test_other_date_formats_fall_back_to_inference(tmp_path):
+    members = bundled_members()
+    text = members[HEADER_FILE].decode('utf-8')
+    members[HEADER_FILE] = re.sub(r'(\d{4})-(\d\d)-(\d\d)', r'\3/\2/\1', text).encode('utf-8')
+    
+    handler = ZipHandler()
+    headers = handler.extract_csv_files(write_zip(tmp_path / 'a.zip', members))[HEADER_FILE]
+    
+    assert 'DATA EMISSÃO' in handler.member_stats[HEADER_FILE]['schema_error']
+    assert len(headers) == 100
+    assert headers['DATA EMISSÃO'].iloc[0].startswith('18/01/2024')
@@ -0,0 +1,97 @@
+import uuid
+
+from benchmarks.fixtures import sqlite_database_manager
+from utils import query_cache
+from utils.query_cache import QueryCache
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2, ttl=60)
+    calls = []
+
+    def compute(key):
+        return lambda: calls.append(key) or key.upper()
+
+    assert cache.get_or_compute('a', compute('a')) == 'A'
+    cache.get_or_compute('b', compute('b'))
+    cache.get_or_compute('a', compute('a'))
+    # 'b' is now the least recently used entry
+    cache.get_or_compute('c', compute('c'))
+    cache.get_or_compute('a', compute('a'))
+    cache.get_or_compute('b', compute('b'))
+
+    assert calls == ['a', 'b', 'c', 'b']
+    assert cache.stats() == {'hits': 2, 'misses': 4, 'evictions': 2, 'entries': 2, 'hit_rate': 2 / 6}
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache.time, 'monotonic', clock)
+    cache = QueryCache(max_entries=10, ttl=30)
+    values = iter(range(10))
+
+    first = cache.get_or_compute('k', lambda: next(values))
+    clock.now += 29
+    assert cache.get_or_compute('k', lambda: next(values)) == first
+    clock.now += 2
+    assert cache.get_or_compute('k', lambda: next(values)) != first
+    assert cache.stats()['evictions'] == 1
+
+
+def test_values_are_copied_and_predicate_is_applied():
+    cache = QueryCache(max_entries=10, ttl=60)
+
+    value = cache.get_or_compute('rows', lambda: [{'total': 1}])
+    value[0]['total'] = 99
+    cached = cache.get_or_compute('rows', lambda: None)
+    assert cached == [{'total': 1}]
+    cached.append('x')
+    assert cache.get_or_compute('rows', lambda: None) == [{'total': 1}]
+
+    status = cache.get_or_compute('status', lambda: 'empty', cacheable=lambda s: s == 'ready')
+    assert status == 'empty'
+    assert cache.get_or_compute('status', lambda: 'ready', cacheable=lambda s: s == 'ready') == 'ready'
+    assert cache.get_or_compute('status', lambda: 'other') == 'ready'
+
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+
+
+def test_data_versions():
+    namespace = f"sqlite:///{uuid.uuid4().hex}"
+    assert query_cache.data_version(namespace) == 0
+    assert query_cache.bump_data_version(namespace) == 1
+    assert query_cache.data_version(namespace) == 1
+
+    assert query_cache.observe_data_signature(namespace, (1, 10)) == 2
+    assert query_cache.observe_data_signature(namespace, (1, 10)) == 2
+    assert query_cache.observe_data_signature(namespace, (2, 20)) == 3
+    assert query_cache.data_version(namespace) == 3
+
+
+def test_cached_reads_follow_writes(tmp_path, archive, headers):
+    db = sqlite_database_manager(str(tmp_path / 'cache.sqlite'), cache_queries=True)
+    db.cache = QueryCache(max_entries=10, ttl=60)
+
+    assert db.get_invoice_summary()['invoices']['total_invoices'] == 0
+    assert db.get_invoice_summary()['invoices']['total_invoices'] == 0
+    assert db.cache.stats()['hits'] == 1
+
+    db.save_csv_data({'202401_NFs_Cabecalho.csv': headers.iloc[:3]})
+    assert db.get_invoice_summary()['invoices']['total_invoices'] == 3
+    db.save_csv_data(archive)
+    summary = db.get_invoice_summary()
+    assert summary['invoices']['total_invoices'] == 7
+    assert summary['items']['total_items'] == 10
+    assert db.get_top_products(limit=2) == db.get_top_products(limit=2)
+    assert db.cache.stats()['hits'] == 2
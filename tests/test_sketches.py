@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.aggregates import merge_states, states_to_dict
+from utils.csv_processor import CSVProcessor
+from utils.sketches import HyperLogLog, DDSketch
+
+
+def test_hyperloglog_merge_equals_union():
+    left = HyperLogLog(0.01).update(pd.Series(range(0, 60000)))
+    right = HyperLogLog(0.01).update(pd.Series(range(40000, 100000)))
+    union = HyperLogLog(0.01).update(pd.Series(range(0, 100000)))
+    
+    merged = HyperLogLog.from_dict(left.to_dict()).merge(right)
+    assert np.array_equal(merged.registers, union.registers)
+    assert merged.count() == pytest.approx(100000, rel=4 * merged.error)
+
+
+def test_ddsketch_merge_equals_single_sketch():
+    values = np.random.default_rng(7).lognormal(mean=5, sigma=2, size=5000)
+    signed = values * np.where(np.arange(len(values)) % 5 == 0, -1, 1)
+    signed[::50] = 0
+    
+    merged = DDSketch(0.01)
+    for chunk in np.array_split(signed, 4):
+        merged.merge(DDSketch(0.01).update(chunk))
+    whole = DDSketch(0.01).update(signed)
+    
+    assert merged.to_dict() == whole.to_dict()
+    for q in (0.1, 0.5, 0.95, 0.99):
+        exact = np.quantile(signed, q, method='lower')
+        assert merged.quantile(q) == pytest.approx(exact, rel=0.01, abs=1e-9)
+
+
+def test_merged_sketch_states_match_whole():
+    processor = CSVProcessor()
+    frame = pd.DataFrame({
+        'valor_total': np.arange(1, 1001, dtype='float64') / 4,
+        'descricao': [f'produto {n % 97}' for n in range(1000)]
+    })
+    
+    merged = merge_states(processor.aggregate(frame.iloc[:400], sketches=True),
+                          processor.aggregate(frame.iloc[400:], sketches=True))
+    whole = processor.aggregate(frame, sketches=True)
+    
+    assert states_to_dict(merged)['distinct'] == states_to_dict(whole)['distinct']
+    assert states_to_dict(merged)['quantiles'] == states_to_dict(whole)['quantiles']
+    assert merged['distinct']['descricao'].count() == pytest.approx(97, rel=0.05)
@@ -0,0 +1,91 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import BUNDLED_ARCHIVE
+from benchmarks.synthetic_archive import SyntheticArchive, cnpj_digits, generate_archive
+from utils.nfe_schema import detect_layout
+from utils.zip_handler import ZipHandler
+
+
+def check_digit(digits):
+    """Modulo-11 check digit with weights 2..9 from the rightmost digit"""
+    total = sum(int(d) * (2 + i % 8) for i, d in enumerate(reversed(digits)))
+    remainder = total % 11
+    return 0 if remainder < 2 else 11 - remainder
+
+
+@pytest.fixture(scope='module')
+def synthetic(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('synthetic') / '202403_NFs.zip')
+    result = generate_archive(path, invoices=300, seed=7, month='202403')
+    return path, result, ZipHandler().extract_csv_files(path)
+
+
+def test_same_seed_gives_identical_bytes(tmp_path):
+    first, second, other = (str(tmp_path / name) for name in ('a.zip', 'b.zip', 'c.zip'))
+    generate_archive(first, invoices=50, seed=3)
+    generate_archive(second, invoices=50, seed=3)
+    generate_archive(other, invoices=50, seed=4)
+    
+    with open(first, 'rb') as a, open(second, 'rb') as b, open(other, 'rb') as c:
+        first_bytes = a.read()
+        assert first_bytes == b.read()
+        assert first_bytes != c.read()
+
+
+def test_layout_matches_bundled_archive(synthetic):
+    path, _, files = synthetic
+    
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ['202403_NFs_Cabecalho.csv', '202403_NFs_Itens.csv']
+    layouts = {name: detect_layout(df.columns) for name, df in files.items()}
+    assert layouts == {'202403_NFs_Cabecalho.csv': 'invoices', '202403_NFs_Itens.csv': 'items'}
+    
+    bundled = ZipHandler().extract_csv_files(BUNDLED_ARCHIVE)
+    for name, df in files.items():
+        reference = bundled[name.replace('202403', '202401')]
+        assert list(df.columns) == list(reference.columns)
+        assert df.dtypes.astype(str).tolist() == reference.dtypes.astype(str).tolist()
+
+
+def test_access_keys_and_totals(synthetic):
+    _, result, files = synthetic
+    headers = files['202403_NFs_Cabecalho.csv']
+    items = files['202403_NFs_Itens.csv']
+    
+    assert len(headers) == result['invoices'] == 300
+    assert len(items) == result['items']
+    
+    keys = headers['CHAVE DE ACESSO'].astype(str)
+    assert keys.is_unique
+    assert keys.str.fullmatch(r'\d{44}').all()
+    assert all(int(key[-1]) == check_digit(key[:-1]) for key in keys)
+    assert (keys.str[2:6] == '2403').all()
+    assert (headers['DATA EMISSÃO'].dt.strftime('%Y%m') == '202403').all()
+    
+    emitters = headers['CPF/CNPJ Emitente'].astype(str)
+    assert (keys.str[6:20] == emitters).all()
+    
+    item_totals = items.groupby(items['CHAVE DE ACESSO'].astype(str))['VALOR TOTAL'].sum()
+    header_totals = headers.set_index(keys)['VALOR NOTA FISCAL']
+    pd.testing.assert_series_equal(
+        item_totals.sort_index(), header_totals.sort_index(), check_names=False, check_index_type=False
+    )
+
+
+def test_cnpj_check_digits():
+    # 11.222.333/0001-81 is the usual documentation example
+    assert ''.join(map(str, cnpj_digits([112223330001])[0])) == '11222333000181'
+
+
+def test_generation_is_split_into_reproducible_blocks():
+    generator = SyntheticArchive(50, seed=11)
+    headers, items = generator.generate_block(0)
+    again_headers, again_items = SyntheticArchive(50, seed=11).generate_block(0)
+    
+    pd.testing.assert_frame_equal(headers, again_headers)
+    pd.testing.assert_frame_equal(items, again_items)
+    assert generator.blocks() == 1
+    assert items['NÚMERO PRODUTO'].groupby(items['CHAVE DE ACESSO']).min().eq(1).all()
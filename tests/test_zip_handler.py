@@ -0,0 +1,176 @@
+import io
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+
+import utils.zip_handler as zip_handler
+from benchmarks.fixtures import BUNDLED_ARCHIVE
+from tests.helpers import bundled_members, write_zip
+from utils.zip_handler import ZipHandler
+
+HEADER_FILE = '202401_NFs_Cabecalho.csv'
+
+
+def with_header_lines(transform):
+    """Bundled members with the header file's data lines passed through ``transform``"""
+    members = bundled_members()
+    lines = members[HEADER_FILE].decode('utf-8').splitlines(keepends=True)
+    members[HEADER_FILE] = (lines[0] + ''.join(transform(lines[1:]))).encode('utf-8')
+    return members
+
+
+def no_ui(*args, **kwargs):
+    raise AssertionError(f"Streaming showed a Streamlit message: {args}")
+
+
+def test_streamed_dates_stay_datetime_when_some_do_not_parse(tmp_path, monkeypatch):
+    def redate(lines):
+        # One dd/mm/yyyy export date in the third chunk
+        lines[25] = re.sub(r'2024-01-(\d\d)', r'\1/01/2024', lines[25], count=1)
+        return lines
+    path = write_zip(tmp_path / '202401_NFs.zip', with_header_lines(redate))
+    # Streaming never talks to the Streamlit UI
+    monkeypatch.setattr(zip_handler.st, 'warning', no_ui)
+    
+    handler = ZipHandler()
+    chunks = [chunk for name, chunk in handler.iter_csv_chunks(path, chunksize=10) if name == HEADER_FILE]
+    
+    assert all(pd.api.types.is_datetime64_any_dtype(chunk['DATA EMISSÃO']) for chunk in chunks)
+    assert sum(chunk['DATA EMISSÃO'].isna().sum() for chunk in chunks) == 1
+    stats = handler.member_stats[HEADER_FILE]
+    assert stats['date_failures'] == {'DATA EMISSÃO': 1, 'DATA/HORA EVENTO MAIS RECENTE': 0}
+    assert any('left empty' in message for message in handler.member_warnings())
+
+
+def test_streamed_unreadable_member_is_only_recorded(tmp_path, monkeypatch):
+    members = {**bundled_members(), '202401_NFs_Notas.csv': b'uma coluna so\nsem separador\n'}
+    path = write_zip(tmp_path / '202401_NFs.zip', members)
+    monkeypatch.setattr(zip_handler.st, 'warning', no_ui)
+    
+    handler = ZipHandler()
+    names = {name for name, _ in handler.iter_csv_chunks(path)}
+    
+    assert names == {HEADER_FILE, '202401_NFs_Itens.csv'}
+    assert handler.failed_members() == ['202401_NFs_Notas.csv']
+    assert handler.member_warnings() == [
+        '202401_NFs_Notas.csv: Could not properly parse CSV file: 202401_NFs_Notas.csv'
+    ]
+
+
+class Unseekable(io.RawIOBase):
+    """Read-only stream that cannot seek, like a socket or a pipe"""
+    
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+
+def test_archive_sources_are_read_in_place():
+    with open(BUNDLED_ARCHIVE, 'rb') as f:
+        data = f.read()
+    
+    handler = ZipHandler()
+    expected = handler.extract_csv_files(BUNDLED_ARCHIVE)
+    assert {name: len(df) for name, df in expected.items()} == {HEADER_FILE: 100, '202401_NFs_Itens.csv': 565}
+    assert handler.extraction_stats['bytes_copied'] == 0
+    
+    for source in (data, io.BytesIO(data)):
+        extracted = handler.extract_csv_files(source)
+        assert handler.extraction_stats['bytes_copied'] == 0
+        assert handler.extraction_stats['archive_bytes'] == len(data)
+        for name, df in expected.items():
+            pd.testing.assert_frame_equal(extracted[name], df)
+    
+    # Only streams that cannot seek are spooled, once
+    extracted = handler.extract_csv_files(Unseekable(data))
+    assert handler.extraction_stats['bytes_copied'] == len(data)
+    pd.testing.assert_frame_equal(extracted[HEADER_FILE], expected[HEADER_FILE])
+
+
+def test_invalid_archive():
+    with pytest.raises(Exception, match='Invalid ZIP file format'):
+        ZipHandler().extract_csv_files(b'not a zip file')
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_parallel_extraction_matches_serial(tmp_path, use_processes):
+    members = bundled_members()
+    # A third member, so the pool has more members than the default CPU count
+    members['202401_NFs_Eventos.csv'] = members[HEADER_FILE]
+    path = write_zip(tmp_path / '202401_NFs.zip', members)
+    
+    serial = ZipHandler().extract_csv_files(path)
+    handler = ZipHandler()
+    parallel = handler.extract_csv_files(path, parallel=True, max_workers=2, use_processes=use_processes)
+    
+    assert list(parallel) == list(serial)
+    for name, df in serial.items():
+        pd.testing.assert_frame_equal(parallel[name], df)
+    assert handler.extraction_stats['members'] == 3
+
+
+def test_fingerprint_ignores_compression_and_member_order(tmp_path):
+    members = bundled_members()
+    first = write_zip(tmp_path / 'first.zip', members)
+    with zipfile.ZipFile(tmp_path / 'second.zip', 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name in reversed(list(members)):
+            archive.writestr(f"export/{name}", members[name])
+    
+    handler = ZipHandler()
+    fingerprint = handler.get_archive_fingerprint(first)
+    assert handler.get_archive_fingerprint(str(tmp_path / 'second.zip')) == fingerprint
+    
+    members[HEADER_FILE] += b'\n'
+    assert handler.get_archive_fingerprint(write_zip(tmp_path / 'third.zip', members)) != fingerprint
+
+
+def test_preflight_modes(tmp_path):
+    handler = ZipHandler()
+    path = write_zip(tmp_path / '202401_NFs.zip', bundled_members())
+    
+    manifest = handler.preflight(path)
+    assert manifest['mode'] == 'memory'
+    assert manifest['reasons'] == []
+    # Both members are larger than the sample, so their row counts are estimates
+    headers, items = sorted(m['estimated_rows'] for m in manifest['members'])
+    assert abs(headers - 100) <= 5 and abs(items - 565) <= 25
+    
+    assert handler.preflight(path, memory_budget_bytes=1024)['mode'] == 'streaming'
+    assert handler.preflight(path, time_budget_seconds=0)['mode'] == 'offline'
+    
+    empty = write_zip(tmp_path / 'empty.zip', {'leia-me.txt': b'nada'})
+    assert handler.preflight(empty)['reasons'] == ["No CSV files in archive"]
+    
+    bomb = write_zip(tmp_path / 'bomb.zip', {'bomba.csv': b'0' * (1024 * 1024)})
+    manifest = handler.preflight(bomb)
+    assert manifest['mode'] == 'reject'
+    assert 'bomba.csv' in manifest['reasons'][0]
+
+
+def test_preflight_row_estimates(tmp_path):
+    body = b''.join(b'%06d;linha\n' % n for n in range(50000))
+    path = write_zip(tmp_path / 'linhas.zip', {
+        'grande.csv': b'codigo;texto\n' + body,
+        'pequeno.csv': b'codigo;texto\n' + body[:13 * 40]
+    })
+    
+    estimates = {m['filename']: m['estimated_rows'] for m in ZipHandler().preflight(path)['members']}
+    assert estimates['pequeno.csv'] == 40
+    assert abs(estimates['grande.csv'] - 50000) < 500
+
+
+def test_file_info_reads_bytes():
+    with open(BUNDLED_ARCHIVE, 'rb') as file:
+        info = ZipHandler().get_file_info(file.read())
+    
+    assert sorted(entry['filename'] for entry in info) == sorted(bundled_members())
+    for entry in info:
+        assert entry['size'] > entry['compressed_size'] > 0
+        assert entry['compression_ratio'] == entry['size'] / entry['compressed_size']
@@ -0,0 +1,205 @@
+import math
+import numpy as np
+import pandas as pd
+from utils.sketches import HyperLogLog, DDSketch, float_array
+
+
+class NumericAggregate:
+    """
+    Mergeable running statistics of a numeric column
+    
+    Chunks are reduced with numpy and combined with Chan et al.'s parallel
+    update, so mean and variance stay numerically stable however the data
+    is split between chunks, workers or monthly archives.
+    """
+    
+    def __init__(self, count=0, total=0.0, minimum=None, maximum=None, mean=0.0, m2=0.0, failures=0):
+        self.count = count
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+        self.mean = mean
+        self.m2 = m2
+        self.failures = failures
+    
+    def update(self, values, failures=0):
+        """
+        Add a chunk of values (NaN is ignored)
+        
+        Args:
+            values: pandas Series or array of floats
+            failures (int): Values of the chunk that could not be parsed
+            
+        Returns:
+            NumericAggregate: self
+        """
+        array = float_array(values)
+        array = array[~np.isnan(array)]
+        self.failures += int(failures)
+        if array.size == 0:
+            return self
+        
+        chunk_mean = float(array.mean())
+        chunk = NumericAggregate(
+            count=int(array.size),
+            total=float(array.sum()),
+            minimum=float(array.min()),
+            maximum=float(array.max()),
+            mean=chunk_mean,
+            m2=float(np.square(array - chunk_mean).sum())
+        )
+        return self.merge(chunk)
+    
+    def merge(self, other):
+        """
+        Combine another aggregate into this one
+        
+        Returns:
+            NumericAggregate: self
+        """
+        self.failures += other.failures
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.total = other.count, other.total
+            self.minimum, self.maximum = other.minimum, other.maximum
+            self.mean, self.m2 = other.mean, other.m2
+            return self
+        
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+    
+    @property
+    def variance(self):
+        """Sample variance (ddof=1), NaN with fewer than two values"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+    
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 1 else math.nan
+    
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.minimum,
+            'max': self.maximum,
+            'mean': self.mean,
+            'm2': self.m2,
+            'failures': self.failures
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            count=data['count'], total=data['total'], minimum=data['min'], maximum=data['max'],
+            mean=data['mean'], m2=data['m2'], failures=data.get('failures', 0)
+        )
+
+
+class DateAggregate:
+    """Mergeable count and min/max of a datetime column"""
+    
+    def __init__(self, count=0, minimum=None, maximum=None):
+        self.count = count
+        self.minimum = minimum
+        self.maximum = maximum
+    
+    def update(self, dates):
+        """
+        Add a chunk of datetimes (NaT is ignored)
+        
+        Returns:
+            DateAggregate: self
+        """
+        valid = pd.Series(dates).dropna()
+        if valid.empty:
+            return self
+        return self.merge(DateAggregate(int(len(valid)), valid.min(), valid.max()))
+    
+    def merge(self, other):
+        """
+        Combine another aggregate into this one
+        
+        Returns:
+            DateAggregate: self
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.minimum, self.maximum = other.count, other.minimum, other.maximum
+            return self
+        
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+    
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'min': self.minimum.isoformat() if self.minimum is not None else None,
+            'max': self.maximum.isoformat() if self.maximum is not None else None
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        minimum = pd.Timestamp(data['min']) if data.get('min') else None
+        maximum = pd.Timestamp(data['max']) if data.get('max') else None
+        return cls(data['count'], minimum, maximum)
+
+
+# State kinds produced by CSVProcessor.aggregate and their classes
+STATE_TYPES = {
+    'financial': NumericAggregate,
+    'dates': DateAggregate,
+    'distinct': HyperLogLog,
+    'quantiles': DDSketch
+}
+
+
+def merge_states(left, right):
+    """
+    Merge two aggregate-state dicts as returned by CSVProcessor.aggregate
+    
+    Args:
+        left (dict): {'financial': {col: NumericAggregate}, 'dates': {col: DateAggregate}},
+            plus 'distinct' and 'quantiles' sketches when computed
+        right (dict): Same structure, for example from another archive
+        
+    Returns:
+        dict: New merged states; the inputs are left untouched
+    """
+    merged = {}
+    for kind, cls in STATE_TYPES.items():
+        if kind not in left and kind not in right:
+            continue
+        merged[kind] = {}
+        for states in (left.get(kind, {}), right.get(kind, {})):
+            for col, state in states.items():
+                if col in merged[kind]:
+                    merged[kind][col].merge(state)
+                else:
+                    # Copy, so that merging never mutates the inputs
+                    merged[kind][col] = cls.from_dict(state.to_dict())
+    return merged
+
+
+def states_to_dict(states):
+    """JSON-serializable form of aggregate states, to combine archives later without re-reading them"""
+    return {kind: {col: state.to_dict() for col, state in columns.items()} for kind, columns in states.items()}
+
+
+def states_from_dict(data):
+    """Inverse of ``states_to_dict``"""
+    return {
+        kind: {col: STATE_TYPES[kind].from_dict(state) for col, state in columns.items()}
+        for kind, columns in data.items()
+    }
@@ -0,0 +1,121 @@
+import codecs
+import csv
+import io
+import time
+
+
+class DialectDetector:
+    """Detects CSV encoding, delimiter, quoting and header row from a byte sample"""
+    
+    def __init__(self, encodings=None, delimiters=None, sample_size=64 * 1024, max_rows=200):
+        # latin-1 decodes any byte sequence, so it must stay last
+        self.encodings = encodings or ['utf-8', 'cp1252', 'latin-1']
+        self.delimiters = delimiters or [',', ';', '\t', '|']
+        self.quotechars = ['"', "'"]
+        self.sample_size = sample_size
+        self.max_rows = max_rows
+    
+    def detect(self, stream):
+        """
+        Detect the dialect of a CSV byte stream
+        
+        Only the first ``sample_size`` bytes are read, so the caller has to
+        reopen (or rewind) the stream before parsing it.
+        
+        Args:
+            stream: Binary file-like object positioned at the start of the CSV
+            
+        Returns:
+            dict: encoding, delimiter, quotechar, header_row, columns (header
+                names), field_count, sample_bytes and detection_seconds
+        """
+        start = time.perf_counter()
+        
+        sample = stream.read(self.sample_size)
+        truncated = len(sample) == self.sample_size
+        
+        encoding, text = self._detect_encoding(sample, truncated)
+        rows_text = self._complete_lines(text, truncated)
+        delimiter, quotechar, field_count = self._detect_delimiter(rows_text)
+        header_row, columns = self._detect_header_row(rows_text, delimiter, quotechar, field_count)
+        
+        return {
+            'encoding': encoding,
+            'delimiter': delimiter,
+            'quotechar': quotechar,
+            'header_row': header_row,
+            'columns': columns,
+            'field_count': field_count,
+            'sample_bytes': len(sample),
+            'detection_seconds': time.perf_counter() - start
+        }
+    
+    def _detect_encoding(self, sample, truncated):
+        """Pick the first encoding that decodes the sample cleanly"""
+        if sample.startswith(codecs.BOM_UTF8):
+            decoder = codecs.getincrementaldecoder('utf-8-sig')()
+            return 'utf-8-sig', decoder.decode(sample, final=not truncated)
+        
+        for encoding in self.encodings:
+            # An incremental decoder tolerates a multi-byte character cut at the sample edge
+            decoder = codecs.getincrementaldecoder(encoding)()
+            try:
+                return encoding, decoder.decode(sample, final=not truncated)
+            except UnicodeDecodeError:
+                continue
+        
+        return 'latin-1', sample.decode('latin-1')
+    
+    def _complete_lines(self, text, truncated):
+        """Drop the trailing partial line of a truncated sample"""
+        if truncated and '\n' in text:
+            text = text[:text.rindex('\n') + 1]
+        return text
+    
+    def _field_counts(self, text, delimiter, quotechar):
+        reader = csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar)
+        counts = []
+        try:
+            for row in reader:
+                if row:
+                    counts.append(len(row))
+                if len(counts) >= self.max_rows:
+                    break
+        except csv.Error:
+            return []
+        return counts
+    
+    def _detect_delimiter(self, text):
+        """Choose the delimiter/quote pair giving the most consistent multi-column rows"""
+        best = (self.delimiters[0], self.quotechars[0], 1)
+        best_score = (0.0, 0)
+        
+        for delimiter in self.delimiters:
+            if delimiter not in text:
+                continue
+            for quotechar in self.quotechars:
+                counts = self._field_counts(text, delimiter, quotechar)
+                if not counts:
+                    continue
+                mode = max(set(counts), key=counts.count)
+                if mode < 2:
+                    continue
+                score = (counts.count(mode) / len(counts), mode)
+                if score > best_score:
+                    best_score = score
+                    best = (delimiter, quotechar, mode)
+        
+        return best
+    
+    def _detect_header_row(self, text, delimiter, quotechar, field_count):
+        """First line with the expected number of fields (skips preambles) and its values"""
+        reader = csv.reader(io.StringIO(text), delimiter=delimiter, quotechar=quotechar)
+        try:
+            for index, row in enumerate(reader):
+                if len(row) == field_count:
+                    return index, row
+                if index >= self.max_rows:
+                    break
+        except csv.Error:
+            pass
+        return 0, []
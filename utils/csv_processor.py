@@ -2,12 +2,44 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import locale
-import re
+from collections import OrderedDict
+from utils.aggregates import NumericAggregate, DateAggregate
+from utils.sketches import HyperLogLog, DDSketch
+
+# Number of DataFrame profiles kept by each CSVProcessor
+PROFILE_CACHE_SIZE = 32
+# Values inspected to decide between pt-BR (1.234,56) and en-US (1,234.56) grouping
+LOCALE_SAMPLE_SIZE = 1000
+# Currency symbols and whitespace removed before parsing money strings
+CURRENCY_NOISE = r'R\$|US\$|[$€£¥\s]'
+# Values inspected when inferring the date format of a column
+DATE_SAMPLE_SIZE = 100
+# Candidate formats, most specific first; day-first wins ties over month-first
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+    '%m/%d/%Y %H:%M:%S', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d'
+]
+# Default error bounds of the approximate profile: HyperLogLog relative
+# standard error and DDSketch relative quantile accuracy
+DISTINCT_ERROR = 0.01
+QUANTILE_ACCURACY = 0.01
 
 class CSVProcessor:
     """Processes CSV data and provides financial analysis"""
     
-    def __init__(self):
+    def __init__(self, distinct_error=DISTINCT_ERROR, quantile_accuracy=QUANTILE_ACCURACY):
+        """
+        Args:
+            distinct_error (float): Relative standard error of approximate distinct counts
+            quantile_accuracy (float): Relative accuracy of approximate quantiles
+        """
+        self.distinct_error = distinct_error
+        self.quantile_accuracy = quantile_accuracy
+        self._profiles = OrderedDict()
+        # Parsed date columns per profile key, evicted together with the profile
+        self._dates = {}
+        
         self.financial_keywords = [
             'valor', 'value', 'amount', 'total', 'price', 'preço', 'preco',
             'custo', 'cost', 'receita', 'revenue', 'vendas', 'sales',
@@ -19,6 +51,111 @@ class CSVProcessor:
             'vencimento', 'due', 'emissao', 'issued', 'payment_date'
         ]
     
+    def profile(self, df, approximate=False, version=None):
+        """
+        Profile every column of a DataFrame in one pass
+        
+        dtype, null and unique counts, sample values, the financial/date
+        classification, the inferred date format, financial statistics
+        ('stats') and date ranges ('range') are computed together and
+        memoized by a schema plus content fingerprint, so repeated calls on
+        unchanged data are free. The dashboard summaries and the AI prompt
+        builder both read from this profile.
+        
+        In approximate mode unique counts come from a HyperLogLog sketch
+        instead of an exact ``nunique``, and numeric and financial columns
+        also get p50/p95/p99 from a DDSketch.
+        
+        Args:
+            df: pandas DataFrame
+            approximate (bool): Use sketches for unique counts and quantiles
+            version: Optional hashable key naming this dataset and its
+                version, e.g. ('invoices', DatabaseManager.data_version).
+                It replaces the content fingerprint, so a cached profile is
+                returned without scanning the data at all.
+            
+        Returns:
+            dict: rows, per-column 'columns' information, and the
+                'financial_columns' and 'date_columns' lists
+        """
+        return self._profile_entry(df, approximate, version)[1]
+    
+    def _profile_entry(self, df, approximate=False, version=None):
+        """Memoized profile of a DataFrame together with its fingerprint key"""
+        fingerprint = ('version', version) if version is not None else self._fingerprint(df)
+        key = fingerprint + (approximate,)
+        cached = self._profiles.get(key)
+        if cached is not None:
+            self._profiles.move_to_end(key)
+            return key, cached
+        
+        columns = {}
+        financial_cols = []
+        date_cols = []
+        
+        for col in df.columns:
+            col_data = df[col]
+            non_null = col_data.dropna()
+            sample = non_null.head(10)
+            
+            is_financial = self._is_financial_column(col, col_data, sample)
+            date_format = self.infer_date_format(non_null) if self._is_text(col_data) else None
+            is_date = self._is_date_column(col, date_format)
+            if is_financial:
+                financial_cols.append(col)
+            if is_date:
+                date_cols.append(col)
+            
+            columns[col] = {
+                'dtype': str(col_data.dtype),
+                'non_null': int(len(non_null)),
+                'nulls': int(len(col_data) - len(non_null)),
+                'unique': int(non_null.nunique()) if not approximate else self._distinct(non_null).count(),
+                'samples': sample.head(3).tolist(),
+                'type': 'Financial' if is_financial else 'Date' if is_date else 'Other',
+                'date_format': date_format
+            }
+            
+            values = None
+            if is_financial:
+                values, failures, _ = self.parse_currency(col_data)
+                columns[col]['stats'] = NumericAggregate().update(values, failures).to_dict()
+            elif self._is_number(col_data):
+                values = col_data
+            if approximate and values is not None:
+                columns[col]['quantiles'] = self._quantiles(values).quantiles()
+            
+            if is_date:
+                try:
+                    dates = self._cached_dates(key, df, col, date_format)
+                    columns[col]['range'] = DateAggregate().update(dates).to_dict()
+                except (ValueError, TypeError, OverflowError):
+                    pass
+        
+        profile = {
+            'rows': len(df),
+            'columns': columns,
+            'financial_columns': financial_cols,
+            'date_columns': date_cols
+        }
+        
+        self._profiles[key] = profile
+        if len(self._profiles) > PROFILE_CACHE_SIZE:
+            evicted, _ = self._profiles.popitem(last=False)
+            self._dates.pop(evicted, None)
+        
+        return key, profile
+    
+    def _fingerprint(self, df):
+        """Schema plus content fingerprint of a DataFrame"""
+        schema = tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+        try:
+            content = int(pd.util.hash_pandas_object(df, index=True).sum()) if len(df) else 0
+        except TypeError:
+            # Unhashable cell values (lists, dicts): fall back to object identity
+            content = ('id', id(df))
+        return schema, len(df), content
+    
     def identify_financial_columns(self, df):
         """
         Identify columns that likely contain financial data
@@ -29,29 +166,25 @@ class CSVProcessor:
         Returns:
             list: List of column names that likely contain financial data
         """
-        financial_cols = []
+        return list(self.profile(df)['financial_columns'])
         
-        for col in df.columns:
-            col_lower = col.lower().strip()
-            
-            # Check if column name contains financial keywords
-            if any(keyword in col_lower for keyword in self.financial_keywords):
-                # Check if column contains numeric data
-                if pd.api.types.is_numeric_dtype(df[col]):
-                    financial_cols.append(col)
-                # Check if it's a string that might be formatted currency
-                elif df[col].dtype == 'object':
-                    # Try to convert sample values to see if they're currency
-                    sample_values = df[col].dropna().head(10)
-                    numeric_count = 0
-                    for val in sample_values:
-                        if self._is_currency_string(str(val)):
-                            numeric_count += 1
+    def _is_financial_column(self, col, col_data, sample):
+        col_lower = col.lower().strip()
+            
+        # Check if column name contains financial keywords
+        if not any(keyword in col_lower for keyword in self.financial_keywords):
+            return False
                     
-                    if numeric_count > len(sample_values) * 0.7:  # 70% threshold
-                        financial_cols.append(col)
+        # Check if column contains numeric data
+        if pd.api.types.is_numeric_dtype(col_data):
+            return True
+        
+        # Check if it's a string that might be formatted currency
+        if self._is_text(col_data):
+            values, _, _ = self.parse_currency(sample)
+            return values.notna().sum() > len(sample) * 0.7  # 70% threshold
         
-        return financial_cols
+        return False
     
     def identify_date_columns(self, df):
         """
@@ -63,175 +196,423 @@ class CSVProcessor:
         Returns:
             list: List of column names that likely contain date data
         """
-        date_cols = []
+        return list(self.profile(df)['date_columns'])
         
-        for col in df.columns:
-            col_lower = col.lower().strip()
+    def _is_date_column(self, col, date_format):
+        col_lower = col.lower().strip()
             
-            # Check if column name contains date keywords
-            if any(keyword in col_lower for keyword in self.date_keywords):
-                date_cols.append(col)
-            # Check if column contains date-like data
-            elif self._contains_dates(df[col]):
-                date_cols.append(col)
+        # Check if column name contains date keywords
+        if any(keyword in col_lower for keyword in self.date_keywords):
+            return True
         
-        return date_cols
+        # Check if column contains date-like data
+        return date_format is not None
     
-    def get_financial_summary(self, df):
+    def infer_date_format(self, values):
         """
-        Generate financial summary from DataFrame
+        Infer the date format of a column from a sample of its values
+        
+        Each candidate format is tried once over the whole sample with a
+        strict, vectorized parse, and the one matching most values wins.
+        
+        Args:
+            values: pandas Series (only the first DATE_SAMPLE_SIZE non-null
+                values are used)
+            
+        Returns:
+            str: strftime format, or None if no candidate parses more than
+                half of the sample
+        """
+        sample = values.dropna().head(DATE_SAMPLE_SIZE).astype(str)
+        if sample.empty:
+            return None
+        
+        best_format, best_count = None, 0
+        for date_format in DATE_FORMATS:
+            count = int(pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum())
+            if count > best_count:
+                best_format, best_count = date_format, count
+            if count == len(sample):
+                break
+        
+        return best_format if best_count > len(sample) * 0.5 else None
+    
+    def parse_date_column(self, df, col):
+        """
+        Convert a column to datetimes with the format inferred by ``profile``
+        
+        The converted column is cached alongside the profile, so each date
+        column of a dataset is parsed once however many summaries use it.
         
         Args:
             df: pandas DataFrame
+            col: Column name
+            
+        Returns:
+            pandas Series: datetime64 values, NaT where parsing failed
+        """
+        key, profile = self._profile_entry(df)
+        return self._cached_dates(key, df, col, profile['columns'][col]['date_format'])
+    
+    def _cached_dates(self, key, df, col, date_format):
+        dates = self._dates.setdefault(key, {})
+        if col not in dates:
+            dates[col] = self._to_datetime(df[col], date_format)
+        return dates[col]
+    
+    def _to_datetime(self, series, date_format=None):
+        """Convert with one fixed format; inference per value is only a last resort"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        if date_format is None and self._is_text(series):
+            date_format = self.infer_date_format(series)
+        if date_format is not None and date_format.startswith('%d/%m/%Y'):
+            series, date_format = self._day_first_to_iso(series, date_format)
+        if date_format is not None:
+            return pd.to_datetime(series, format=date_format, errors='coerce')
+        return pd.to_datetime(series, errors='coerce')
+    
+    def _day_first_to_iso(self, series, date_format):
+        """
+        Reorder zero-padded dd/mm/yyyy text to yyyy-mm-dd with vectorized slicing
+        
+        pandas parses ISO layouts in C but falls back to per-value strptime
+        for other formats, which is several times slower on large columns.
+        """
+        text = series.astype('string')
+        values = text.dropna()
+        padded = (values.str.len() >= 10) & (values.str[2] == '/') & (values.str[5] == '/')
+        if not padded.fillna(False).all():
+            return series, date_format
+        iso = text.str[6:10] + '-' + text.str[3:5] + '-' + text.str[0:2] + text.str[10:]
+        return iso, '%Y-%m-%d' + date_format[len('%d/%m/%Y'):]
+    
+    def get_financial_summary(self, df, version=None, member=None):
+        """
+        Generate financial summary from DataFrame
+        
+        Args:
+            df: pandas DataFrame, or an iterable of DataFrame chunks or of
+                (filename, chunk) pairs such as ZipHandler.iter_csv_chunks
+                yields, for data that does not fit in memory
+            version: Optional dataset version key, see ``profile``
+            member (str): With (filename, chunk) pairs, the member files to
+                summarize, see ``_member_chunks``
             
         Returns:
             dict: Dictionary with financial metrics
         """
-        financial_cols = self.identify_financial_columns(df)
+        if isinstance(df, pd.DataFrame):
+            return self.financial_summary_from_states(self.states_from_profile(self.profile(df, version=version)))
+        return self.financial_summary_from_states(self._aggregate_chunks(df, dates=False, member=member))
         
-        if not financial_cols:
-            return None
+    def aggregate(self, data, states=None, sketches=False, member=None):
+        """
+        Compute mergeable aggregate states of the financial and date columns
         
-        summary = {}
+        Chunks are reduced as they arrive, so memory stays bounded by the
+        chunk size. States from different files, workers or monthly archives
+        can be combined with ``utils.aggregates.merge_states`` and rendered
+        with ``financial_summary_from_states`` and
+        ``date_range_summary_from_states``.
+        
+        Args:
+            data: pandas DataFrame or an iterable of DataFrame chunks or of
+                (filename, chunk) pairs
+            states (dict): Earlier states to continue; updated in place
+            sketches (bool): Also keep a HyperLogLog per column ('distinct')
+                and a DDSketch per numeric or financial column ('quantiles')
+            member (str): With (filename, chunk) pairs, the member files to
+                aggregate, see ``_member_chunks``
         
-        for col in financial_cols:
-            # Convert to numeric if needed
-            numeric_col = self._convert_to_numeric(df[col])
+        Returns:
+            dict: {'financial': {col: NumericAggregate},
+                'dates': {col: DateAggregate}}, plus 'distinct' and
+                'quantiles' when ``sketches`` is set
+        """
+        if isinstance(data, pd.DataFrame):
+            data = [data]
+        return self._aggregate_chunks(data, states, sketches=sketches, member=member)
             
-            if numeric_col is not None and len(numeric_col.dropna()) > 0:
-                total = numeric_col.sum()
-                avg = numeric_col.mean()
-                count = len(numeric_col.dropna())
-                
-                # Format numbers with locale
-                try:
-                    total_formatted = self._format_currency(total)
-                    avg_formatted = self._format_currency(avg)
-                except:
-                    total_formatted = f"{total:,.2f}"
-                    avg_formatted = f"{avg:,.2f}"
-                
-                summary[f"Total {col}"] = total_formatted
-                summary[f"Avg {col}"] = avg_formatted
-                summary[f"Count {col}"] = f"{count:,}"
+    def _member_chunks(self, chunks, member=None):
+        """
+        DataFrame chunks of one kind of member file
+        
+        Plain DataFrames pass through. (filename, chunk) pairs are unpacked
+        and kept only for files whose name contains ``member`` (case
+        insensitive, e.g. 'itens'), or by default for the first file:
+        header and item files have different columns and cannot be
+        summarized together.
+        """
+        first = None
+        for chunk in chunks:
+            if isinstance(chunk, pd.DataFrame):
+                yield chunk
+                continue
+            
+            filename, chunk = chunk
+            if member is not None:
+                if member.lower() in filename.lower():
+                    yield chunk
+            elif first is None or filename == first:
+                first = filename
+                yield chunk
+            else:
+                # Members are read one after another: the first file is complete
+                return
+    
+    def _aggregate_chunks(self, chunks, states=None, financial=True, dates=True, sketches=False, member=None):
+        if states is None:
+            states = {}
+        financial_states = states.setdefault('financial', {})
+        date_states = states.setdefault('dates', {})
+        if sketches:
+            distinct_states = states.setdefault('distinct', {})
+            quantile_states = states.setdefault('quantiles', {})
+        financial_cols = None
+        locales = {}
+        date_formats = {}
+        
+        for chunk in self._member_chunks(chunks, member):
+            # Classify columns and infer number/date formats once, on the first chunk
+            if financial_cols is None:
+                profile = self.profile(chunk)
+                financial_cols = profile['financial_columns'] if financial else []
+                date_cols = profile['date_columns'] if dates else []
+                date_formats = {col: profile['columns'][col]['date_format'] for col in date_cols}
+            
+            for col in financial_cols:
+                if col not in chunk.columns:
+                    continue
+                # The number format detected on the first chunk is reused for the rest of the column
+                values, failed, locales[col] = self.parse_currency(chunk[col], locales.get(col))
+                financial_states.setdefault(col, NumericAggregate()).update(values, failed)
+                if sketches:
+                    quantile_states.setdefault(col, self._quantiles()).update(values)
+            
+            if sketches:
+                for col in chunk.columns:
+                    distinct_states.setdefault(col, self._distinct()).update(chunk[col])
+                    if col not in financial_cols and self._is_number(chunk[col]):
+                        quantile_states.setdefault(col, self._quantiles()).update(chunk[col])
+        
+            for col in date_cols:
+                if col not in chunk.columns:
+                    continue
+                date_states.setdefault(col, DateAggregate()).update(self._to_datetime(chunk[col], date_formats[col]))
+        
+        return states
+    
+    def states_from_profile(self, profile):
+        """
+        Aggregate states of the financial and date columns of a profile
+        
+        Args:
+            profile (dict): As returned by ``profile``
+            
+        Returns:
+            dict: Same structure as ``aggregate``
+        """
+        columns = profile['columns']
+        return {
+            'financial': {
+                col: NumericAggregate.from_dict(columns[col]['stats'])
+                for col in profile['financial_columns'] if 'stats' in columns[col]
+            },
+            'dates': {
+                col: DateAggregate.from_dict(columns[col]['range'])
+                for col in profile['date_columns'] if 'range' in columns[col]
+            }
+        }
+    
+    def financial_summary_from_states(self, states):
+        """
+        Format the financial metrics of aggregate states
+        
+        Args:
+            states (dict): As returned by ``aggregate``
+            
+        Returns:
+            dict: Dictionary with financial metrics, or None
+        """
+        summary = {}
+        for col, state in states.get('financial', {}).items():
+            if state.count > 0:
+                self._add_financial_metrics(summary, col, state.total, state.count, state.failures)
         
         return summary if summary else None
     
-    def get_column_info(self, df):
+    def _add_financial_metrics(self, summary, col, total, count, failures=0):
+        """Add formatted total, average and count of a financial column, plus unparsed values if any"""
+        avg = total / count
+        
+        # Format numbers with locale
+        try:
+            total_formatted = self._format_currency(total)
+            avg_formatted = self._format_currency(avg)
+        except:
+            total_formatted = f"{total:,.2f}"
+            avg_formatted = f"{avg:,.2f}"
+        
+        summary[f"Total {col}"] = total_formatted
+        summary[f"Avg {col}"] = avg_formatted
+        summary[f"Count {col}"] = f"{count:,}"
+        if failures:
+            summary[f"Unparsed {col}"] = f"{failures:,}"
+    
+    def get_column_info(self, df, approximate=False, version=None):
         """
         Get detailed information about DataFrame columns
         
         Args:
             df: pandas DataFrame
+            approximate (bool): Estimate unique counts with HyperLogLog and
+                add P50/P95/P99 columns for numeric data (see ``profile``)
+            version: Optional dataset version key, see ``profile``
             
         Returns:
             pandas DataFrame: DataFrame with column information
         """
         info_data = []
         
-        for col in df.columns:
-            col_data = df[col]
-            
-            info = {
+        for col, col_profile in self.profile(df, approximate, version)['columns'].items():
+            row = {
                 'Column': col,
-                'Data Type': str(col_data.dtype),
-                'Non-Null Count': col_data.notna().sum(),
-                'Null Count': col_data.isna().sum(),
-                'Unique Values': col_data.nunique(),
+                'Data Type': col_profile['dtype'],
+                'Non-Null Count': col_profile['non_null'],
+                'Null Count': col_profile['nulls'],
+                'Unique Values': col_profile['unique'],
+                'Sample Values': ', '.join([str(val) for val in col_profile['samples']]),
+                'Type': col_profile['type']
             }
-            
-            # Add sample values
-            sample_values = col_data.dropna().head(3).tolist()
-            info['Sample Values'] = ', '.join([str(val) for val in sample_values])
-            
-            # Check if it's a financial column
-            if col in self.identify_financial_columns(df):
-                info['Type'] = 'Financial'
-            elif col in self.identify_date_columns(df):
-                info['Type'] = 'Date'
-            else:
-                info['Type'] = 'Other'
-            
-            info_data.append(info)
+            if approximate:
+                quantiles = col_profile.get('quantiles', {})
+                for name in ('p50', 'p95', 'p99'):
+                    row[name.upper()] = quantiles.get(name)
+            info_data.append(row)
         
         return pd.DataFrame(info_data)
     
-    def get_date_range_summary(self, df):
+    def get_date_range_summary(self, df, version=None, member=None):
         """
         Get date range summary from DataFrame
         
         Args:
-            df: pandas DataFrame
+            df: pandas DataFrame, or an iterable of DataFrame chunks or of
+                (filename, chunk) pairs, as in ``get_financial_summary``
+            version: Optional dataset version key, see ``profile``
+            member (str): As in ``get_financial_summary``
             
         Returns:
             dict: Dictionary with date range information
         """
-        date_cols = self.identify_date_columns(df)
+        if not isinstance(df, pd.DataFrame):
+            return self.date_range_summary_from_states(self._aggregate_chunks(df, financial=False, member=member))
         
-        if not date_cols:
-            return None
+        return self.date_range_summary_from_states(self.states_from_profile(self.profile(df, version=version)))
+    
+    def date_range_summary_from_states(self, states):
+        """
+        Format the date ranges of aggregate states
         
+        Args:
+            states (dict): As returned by ``aggregate``
+            
+        Returns:
+            dict: Dictionary with date range information, or None
+        """
         summary = {}
-        
-        for col in date_cols:
-            try:
-                # Try to convert to datetime
-                date_col = pd.to_datetime(df[col], errors='coerce')
-                valid_dates = date_col.dropna()
-                
-                if len(valid_dates) > 0:
-                    min_date = valid_dates.min()
-                    max_date = valid_dates.max()
-                    
-                    summary[f"{col} Range"] = f"{min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}"
-                    summary[f"{col} Count"] = len(valid_dates)
-            except:
-                continue
+        for col, state in states.get('dates', {}).items():
+            if state.count > 0:
+                self._add_date_range(summary, col, state.minimum, state.maximum, state.count)
         
         return summary if summary else None
     
-    def _is_currency_string(self, value_str):
-        """Check if string represents a currency value"""
-        # Remove common currency symbols and separators
-        cleaned = re.sub(r'[R$€£¥\s,.]', '', str(value_str))
-        try:
-            float(cleaned)
-            return True
-        except:
-            return False
-    
-    def _contains_dates(self, series):
-        """Check if series contains date-like values"""
-        if series.dtype == 'object':
-            sample = series.dropna().head(10)
-            date_count = 0
-            for val in sample:
-                try:
-                    pd.to_datetime(val)
-                    date_count += 1
-                except:
-                    continue
-            return date_count > len(sample) * 0.5
-        return False
+    def _add_date_range(self, summary, col, min_date, max_date, count):
+        summary[f"{col} Range"] = f"{min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}"
+        summary[f"{col} Count"] = count
     
-    def _convert_to_numeric(self, series):
-        """Convert series to numeric, handling currency formatting"""
+    def parse_currency(self, series, number_locale=None):
+        """
+        Convert locale-formatted money strings ("R$ 1.234,56", "$1,234.56",
+        "(1.234,56)") to floats in one vectorized pass
+        
+        Args:
+            series: pandas Series
+            number_locale (str): 'pt-BR' or 'en-US'; detected from a sample
+                of the column when omitted
+            
+        Returns:
+            tuple: (float Series, number of non-empty values that could not
+                be parsed, number locale used or None for numeric input)
+        """
         if pd.api.types.is_numeric_dtype(series):
-            return series
+            return series, 0, None
         
-        try:
-            # Try direct conversion first
-            return pd.to_numeric(series, errors='coerce')
-        except:
-            pass
+        text = self._strip_currency(series.astype('string'))
+        text = text.mask(text == '')
+        if number_locale is None:
+            number_locale = self._detect_number_locale(text.dropna().head(LOCALE_SAMPLE_SIZE))
         
-        # If that fails, try cleaning currency formatting
-        try:
-            cleaned = series.astype(str).str.replace(r'[R$€£¥\s,]', '', regex=True)
-            cleaned = cleaned.str.replace(',', '.')  # Handle decimal comma
-            return pd.to_numeric(cleaned, errors='coerce')
-        except:
-            return None
+        if number_locale == 'pt-BR':
+            normalized = text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        else:
+            normalized = text.str.replace(',', '', regex=False)
+        
+        values = pd.to_numeric(normalized, errors='coerce').astype('float64')
+        failures = int((text.notna() & values.isna()).sum())
+        return values, failures, number_locale
+    
+    def _strip_currency(self, text):
+        """Remove currency symbols and whitespace, and turn accounting negatives like (1,00) into -1,00"""
+        text = text.str.replace(CURRENCY_NOISE, '', regex=True)
+        return text.str.replace(r'^\((.*)\)$', r'-\1', regex=True)
+    
+    def _detect_number_locale(self, text):
+        """
+        Vote pt-BR versus en-US from where the separators sit in sample values
+        
+        The last separator is the decimal one when both appear; a lone
+        separator is decimal unless exactly three digits follow it (1.234 is
+        ambiguous), and a repeated one is always grouping. Ties fall back to
+        pt-BR, the format of Brazilian fiscal exports.
+        """
+        last_comma = text.str.rfind(',')
+        last_dot = text.str.rfind('.')
+        length = text.str.len()
+        
+        comma_decimal = (last_comma > last_dot) & ((last_dot >= 0) | (length - last_comma - 1 != 3))
+        dot_decimal = (last_dot > last_comma) & ((last_comma >= 0) | (length - last_dot - 1 != 3))
+        dot_grouping = (last_comma < 0) & (text.str.count(r'\.') > 1)
+        comma_grouping = (last_dot < 0) & (text.str.count(',') > 1)
+        
+        pt_votes = int((comma_decimal | dot_grouping).sum())
+        en_votes = int((dot_decimal | comma_grouping).sum())
+        return 'en-US' if en_votes > pt_votes else 'pt-BR'
+    
+    def _distinct(self, values=None):
+        """HyperLogLog with this processor's error bound, optionally filled with values"""
+        sketch = HyperLogLog(self.distinct_error)
+        return sketch.update(values) if values is not None else sketch
+    
+    def _quantiles(self, values=None):
+        """DDSketch with this processor's accuracy, optionally filled with values"""
+        sketch = DDSketch(self.quantile_accuracy)
+        return sketch.update(values) if values is not None else sketch
+    
+    def _is_number(self, series):
+        return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+    
+    def _is_text(self, series):
+        """Object or string dtype (pandas may use either for text)"""
+        return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+    
+    def _convert_to_numeric(self, series):
+        """Convert series to numeric, handling currency formatting"""
+        values, _, _ = self.parse_currency(series)
+        return values
     
     def _format_currency(self, value):
         """Format number as currency"""
@@ -1,13 +1,124 @@
 import os
+import io
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, text, inspect, insert, table, column
 from sqlalchemy.exc import SQLAlchemyError
 import logging
+from utils.nfe_schema import INVOICE_COLUMNS, ITEM_COLUMNS
+from utils import query_cache
+
+# Rows sent per COPY or per batched INSERT
+BULK_BATCH_ROWS = 10000
+
+# Concurrent connections for large streamed uploads (capped by the pool size)
+DEFAULT_INGEST_WORKERS = 4
+# Chunks buffered per partition during parallel ingestion
+PARTITION_QUEUE_CHUNKS = 2
+
+# Invoices per page of query_invoices in the UI, and per batch of iter_invoices
+INVOICE_PAGE_ROWS = 100
+STREAM_BATCH_ROWS = 5000
+
+# Pre-aggregated tables kept current by every load: key columns and additive
+# measures (the first one counts the rows behind each key)
+ROLLUP_TABLES = {
+    'invoice_month_rollup': (['mes', 'cnpj_emitente'], ['invoice_count', 'valued_count', 'total_value']),
+    'invoice_recipient_rollup': (['cnpj_destinatario'], ['invoice_count']),
+    'product_rollup': (['descricao_produto'], ['item_count', 'total_quantity', 'total_value'])
+}
+# Transaction-level advisory lock serializing rollup writes on PostgreSQL
+ROLLUP_LOCK_KEY = 7042901
+
+
+def _iter_chunks(pairs):
+    """Flatten (filename, DataFrame or iterable of chunks) pairs into (filename, chunk) pairs"""
+    for filename, data in pairs:
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        for df in chunks:
+            yield filename, df
+
+
+def _partition_of(keys, partitions):
+    """Partition number of each access key, stable across header and item files"""
+    hashes = pd.util.hash_pandas_object(keys.astype(str), index=False, categorize=False).to_numpy()
+    return hashes % partitions
+
+
+def _emission_dates(dates, keys):
+    """
+    Emission dates of a chunk, falling back to the first day of the year and
+    month encoded in the access key (digits 3-6, AAMM) when a date is missing
+    """
+    fallback = pd.to_datetime('20' + keys.astype(str).str[2:6], format='%Y%m', errors='coerce')
+    if dates is None:
+        return fallback
+    return pd.to_datetime(dates, errors='coerce').fillna(fallback)
+
+
+def _chunk_emission_dates(df):
+    """Emission dates of a raw or renamed chunk, see _emission_dates"""
+    keys = df['CHAVE DE ACESSO'] if 'CHAVE DE ACESSO' in df.columns else df['chave_acesso']
+    dates = next((df[col] for col in ('DATA EMISSÃO', 'data_emissao') if col in df.columns), None)
+    return _emission_dates(dates, keys)
+
+
+def _month_period(month):
+    """Monthly period from 'YYYYMM', 'YYYY-MM' or any date-like value in the month"""
+    if isinstance(month, str) and len(month.replace('-', '')) == 6:
+        month = month.replace('-', '')
+        month = f"{month[:4]}-{month[4:]}"
+    return pd.Period(month, freq='M')
+
+
+def _partition_name(parent, month):
+    return f"{parent}_{month.year:04d}_{month.month:02d}"
+
+
+def _empty_load_stats():
+    return {'invoices': 0, 'items': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+
+def _finish_load_stats(stats, start):
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_second'] = (stats['invoices'] + stats['items']) / max(stats['seconds'], 1e-9)
+
+
+def invoice_cursor(row):
+    """Keyset cursor of an invoice row, for the ``after`` argument of query_invoices"""
+    return (row['data_emissao'], row['id'])
+
+
+def _record_batches(df, size=BULK_BATCH_ROWS):
+    """Yield lists of row dicts with nulls as None, for executemany"""
+    for start in range(0, len(df), size):
+        chunk = df.iloc[start:start + size].astype(object)
+        yield chunk.where(chunk.notna(), None).to_dict('records')
+
 
 class DatabaseManager:
     """Manages PostgreSQL database operations for invoice data"""
     
-    def __init__(self):
+    def __init__(self, engine=None, cache_queries=True):
+        """
+        Args:
+            engine: Existing SQLAlchemy engine to use instead of DATABASE_URL
+                (for example the local SQLite stand-in of the benchmarks)
+            cache_queries (bool): Serve the dashboard read methods from the
+                process-wide query cache while the data version is unchanged
+        """
+        self.cache = query_cache.shared_cache() if cache_queries else None
+        # Whether invoices is partitioned by month (detected once), and the months known to exist
+        self._partitioned = None
+        self._partitions = set()
+        
+        if engine is not None:
+            self.engine = engine
+            self.database_url = str(engine.url)
+            return
+        
         self.database_url = os.getenv('DATABASE_URL')
         if not self.database_url:
             raise ValueError("DATABASE_URL environment variable not found")
@@ -23,21 +134,114 @@ class DatabaseManager:
                 "sslmode": "require"
             }
         )
+    
+    @property
+    def data_version(self):
+        """
+        Version of the data, bumped after every successful write
+        
+        The counter is shared by every DatabaseManager of the same database
+        in this process, so callers (and the query cache) can keep derived
+        data per version.
+        """
+        return query_cache.data_version(self.database_url)
+    
+    def _bump_data_version(self):
+        query_cache.bump_data_version(self.database_url)
+    
+    def sync_data_version(self):
+        """
+        Data version, first bumped if another process changed the data
+        
+        data_version only follows the writes of this process. This reads a
+        signature of the stored data (rollup totals and the last archive
+        load, a few small rows) so results kept per data version, such as
+        the query cache or the AI data context, are refreshed as soon as
+        another process (for example ingest_archives.py) loads data.
+        
+        Returns:
+            int: Current data version
+        """
+        try:
+            with self.engine.connect() as conn:
+                signature = tuple(conn.execute(text("""
+                    SELECT
+                        (SELECT COUNT(*) FROM invoice_month_rollup),
+                        (SELECT SUM(invoice_count) FROM invoice_month_rollup),
+                        (SELECT SUM(total_value) FROM invoice_month_rollup),
+                        (SELECT COUNT(*) FROM invoice_recipient_rollup),
+                        (SELECT COUNT(*) FROM product_rollup),
+                        (SELECT SUM(item_count) FROM product_rollup),
+                        (SELECT SUM(total_value) FROM product_rollup),
+                        (SELECT MAX(ingested_at) FROM ingested_archives)
+                """)).one())
+            return query_cache.observe_data_signature(self.database_url, signature)
+        
+        except SQLAlchemyError as e:
+            logging.error(f"Error reading data version: {e}")
+            return self.data_version
+    
+    def _cached(self, name, params, compute, cacheable=None):
+        """
+        Result of a read query, from the query cache while the data is unchanged
+        
+        Entries are keyed by method, parameters and data version; writes by
+        other processes become visible when entries expire (QUERY_CACHE_TTL).
+        Results rejected by ``cacheable`` are not stored.
+        """
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(
+            (self.database_url, self.data_version, name, params), compute, cacheable
+        )
         
     def create_tables(self):
-        """Create tables for invoice data if they don't exist"""
+        """
+        Create tables for invoice data if they don't exist
+        
+        New PostgreSQL databases get tables partitioned by emission month;
+        monthly partitions are created on demand during ingestion. Other
+        engines (such as the SQLite stand-in of the benchmarks and tests) get
+        the same tables unpartitioned. Flat tables from earlier versions are
+        left as they are and keep working.
+        """
         try:
             with self.engine.connect() as conn:
+                # Only new tables or a backfill change what readers see
+                tables = {'invoices', 'invoice_items', 'ingested_archives', *ROLLUP_TABLES}
+                changed = not tables.issubset(inspect(conn).get_table_names())
+                
+                if conn.dialect.name == 'postgresql':
+                    # Range-partitioned by emission month. The access key encodes
+                    # that month, so keys stay unique although the primary key
+                    # must include the date (see _move_redated_invoices)
+                    invoice_id = "id SERIAL"
+                    invoice_key = "PRIMARY KEY (chave_acesso, data_emissao)"
+                    emission_date = "data_emissao DATE NOT NULL"
+                    item_id = "id SERIAL"
+                    # Items are co-partitioned through the emission date of their invoice
+                    item_key = """data_emissao DATE NOT NULL,
+                        PRIMARY KEY (id, data_emissao),
+                        FOREIGN KEY (chave_acesso, data_emissao) REFERENCES invoices (chave_acesso, data_emissao)"""
+                    partitioning = "PARTITION BY RANGE (data_emissao)"
+                else:
+                    invoice_id = "id INTEGER PRIMARY KEY AUTOINCREMENT"
+                    invoice_key = "UNIQUE (chave_acesso)"
+                    emission_date = "data_emissao DATE"
+                    item_id = "id INTEGER PRIMARY KEY AUTOINCREMENT"
+                    item_key = "FOREIGN KEY (chave_acesso) REFERENCES invoices (chave_acesso)"
+                    partitioning = ""
+                
                 # Create invoices table (header data)
-                conn.execute(text("""
+                conn.execute(text(f"""
                     CREATE TABLE IF NOT EXISTS invoices (
-                        id SERIAL PRIMARY KEY,
-                        chave_acesso VARCHAR(44) UNIQUE NOT NULL,
+                        {invoice_id},
+                        chave_acesso VARCHAR(44) NOT NULL,
                         modelo TEXT,
                         serie VARCHAR(50),
                         numero VARCHAR(50),
                         natureza_operacao TEXT,
-                        data_emissao DATE,
+                        {emission_date},
                         evento_recente TEXT,
                         data_evento TIMESTAMP,
                         cnpj_emitente VARCHAR(50),
@@ -53,14 +257,15 @@ class DatabaseManager:
                         consumidor_final VARCHAR(50),
                         presenca_comprador VARCHAR(50),
                         valor_nota_fiscal DECIMAL(15,2),
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        {invoice_key}
+                    ) {partitioning}
                 """))
                 
                 # Create invoice items table (line items)
-                conn.execute(text("""
+                conn.execute(text(f"""
                     CREATE TABLE IF NOT EXISTS invoice_items (
-                        id SERIAL PRIMARY KEY,
+                        {item_id},
                         chave_acesso VARCHAR(44) NOT NULL,
                         numero_produto VARCHAR(20),
                         descricao_produto TEXT,
@@ -72,16 +277,63 @@ class DatabaseManager:
                         valor_unitario DECIMAL(15,4),
                         valor_total DECIMAL(15,2),
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (chave_acesso) REFERENCES invoices (chave_acesso)
+                        {item_key}
+                    ) {partitioning}
+                """))
+                
+                # Rollups behind the dashboard summaries, maintained incrementally
+                # by every load. Missing keys are stored as '' and months as 'YYYY-MM'
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS invoice_month_rollup (
+                        mes VARCHAR(7) NOT NULL,
+                        cnpj_emitente VARCHAR(50) NOT NULL,
+                        invoice_count BIGINT NOT NULL,
+                        valued_count BIGINT NOT NULL,
+                        total_value DECIMAL(18,2) NOT NULL,
+                        PRIMARY KEY (mes, cnpj_emitente)
+                    )
+                """))
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS invoice_recipient_rollup (
+                        cnpj_destinatario VARCHAR(50) PRIMARY KEY,
+                        invoice_count BIGINT NOT NULL
+                    )
+                """))
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS product_rollup (
+                        descricao_produto TEXT PRIMARY KEY,
+                        item_count BIGINT NOT NULL,
+                        total_quantity DECIMAL(20,4) NOT NULL,
+                        total_value DECIMAL(18,2) NOT NULL
+                    )
+                """))
+                
+                # Archives already ingested, keyed by ZipHandler.get_archive_fingerprint
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS ingested_archives (
+                        fingerprint VARCHAR(64) PRIMARY KEY,
+                        filename TEXT,
+                        ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """))
                 
                 # Create indexes for better performance
-                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_invoices_data_emissao ON invoices (data_emissao)"))
+                # Date filters and the (data_emissao, id) keyset pages of query_invoices
+                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_invoices_data_emissao_id ON invoices (data_emissao, id)"))
                 conn.execute(text("CREATE INDEX IF NOT EXISTS idx_invoices_cnpj_emitente ON invoices (cnpj_emitente)"))
                 conn.execute(text("CREATE INDEX IF NOT EXISTS idx_invoice_items_chave_acesso ON invoice_items (chave_acesso)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_product_rollup_total_value ON product_rollup (total_value)"))
+                
+                # Databases loaded before the rollups existed get them built once
+                if (conn.execute(text("SELECT 1 FROM invoice_month_rollup LIMIT 1")).first() is None
+                        and conn.execute(text("SELECT 1 FROM invoices LIMIT 1")).first() is not None):
+                    self._rebuild_rollups(conn)
+                    changed = True
                 
                 conn.commit()
+                self._partitioned = None
+                if changed:
+                    self._bump_data_version()
                 
         except SQLAlchemyError as e:
             logging.error(f"Error creating tables: {e}")
@@ -100,53 +352,491 @@ class DatabaseManager:
                 logging.error(f"Reconnection failed: {reconnect_error}")
                 raise
     
-    def save_csv_data(self, csv_data):
+    def save_csv_data(self, csv_data, fingerprint=None, archive_name=None, workers=1, complete=None):
         """
         Save CSV data to database tables
         
         Args:
-            csv_data (dict): Dictionary with filename as key and DataFrame as value
+            csv_data: Dictionary with filename as key and DataFrame (or an
+                iterable of DataFrame chunks) as value, or an iterable of
+                (filename, DataFrame chunk) pairs such as the one returned by
+                ZipHandler.iter_csv_chunks. Header files must come before
+                their item files.
+            fingerprint (str): Archive fingerprint to record as ingested in
+                the same transaction, see is_archive_ingested
+            archive_name (str): Original archive filename, for reference
+            workers (int): Number of concurrent connections. Above 1, rows are
+                partitioned by access key and each partition is loaded in its
+                own transaction, see _save_parallel
+            complete: Optional callable, called once every chunk was read,
+                telling whether the whole archive was; the fingerprint is
+                only recorded if it returns true (for example
+                ``lambda: not zip_handler.failed_members()``)
+            
+        Returns:
+            dict: Invoices loaded (and how many were inserted, updated or
+                unchanged), items written, elapsed seconds and rows per second
         """
+        pairs = csv_data.items() if isinstance(csv_data, dict) else csv_data
+        start = time.perf_counter()
+        
         try:
-            with self.engine.connect() as conn:
-                for filename, df in csv_data.items():
-                    if 'cabecalho' in filename.lower() or 'header' in filename.lower():
-                        self._save_invoices(df, conn)
-                    elif 'itens' in filename.lower() or 'items' in filename.lower():
-                        self._save_invoice_items(df, conn)
+            workers = self._worker_limit(workers)
+            if workers > 1:
+                stats = self._save_parallel(pairs, workers, fingerprint, archive_name, complete)
+            else:
+                with self.engine.connect() as conn:
+                    stats = self._save_serial(conn, pairs, fingerprint, archive_name, complete)
+                    conn.commit()
+                    self._bump_data_version()
                 
-                conn.commit()
+            _finish_load_stats(stats, start)
+            logging.info(
+                f"Saved {stats['invoices']} invoices ({stats['inserted']} inserted, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged) and {stats['items']} items "
+                f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s)"
+            )
+            for entry in stats.get('workers', []):
+                logging.info(
+                    f"Worker {entry['partition']}: {entry['invoices']} invoices and {entry['items']} items "
+                    f"in {entry['seconds']:.2f}s ({entry['rows_per_second']:,.0f} rows/s)"
+                )
+            return stats
                 
         except SQLAlchemyError as e:
+            # Partitions created in a rolled back transaction do not exist
+            self._partitions = set()
             logging.error(f"Error saving CSV data: {e}")
             raise
     
+    def _save_serial(self, conn, pairs, fingerprint=None, archive_name=None, complete=None):
+        """Load every chunk through one connection, leaving the commit to the caller"""
+        stats = _empty_load_stats()
+        # Access keys whose old items were already removed in this load
+        cleared_keys = set()
+        
+        for filename, df in _iter_chunks(pairs):
+            self._save_chunk(conn, filename, df, stats, cleared_keys)
+        self._merge_rollups(conn)
+        
+        if fingerprint and (complete is None or complete()):
+            self._record_archive(conn, fingerprint, archive_name)
+        return stats
+    
+    def reload_month(self, month, csv_data, fingerprint=None, archive_name=None, complete=None):
+        """
+        Replace all data of one emission month in a single transaction
+        
+        The month is dropped as in drop_month and ``csv_data`` is loaded in
+        its place; readers keep seeing the old month until the commit.
+        
+        Args:
+            month: 'YYYYMM', 'YYYY-MM' or a date in the month
+            csv_data, fingerprint, archive_name, complete: As in save_csv_data
+            
+        Returns:
+            dict: Load statistics as returned by save_csv_data
+        """
+        pairs = csv_data.items() if isinstance(csv_data, dict) else csv_data
+        start = time.perf_counter()
+        
+        try:
+            with self.engine.connect() as conn:
+                self._drop_month(conn, _month_period(month))
+                stats = self._save_serial(conn, pairs, fingerprint, archive_name, complete)
+                conn.commit()
+                self._bump_data_version()
+            
+            _finish_load_stats(stats, start)
+            logging.info(f"Reloaded {month}: {stats['invoices']} invoices and {stats['items']} items")
+            return stats
+        
+        except SQLAlchemyError as e:
+            self._partitions = set()
+            logging.error(f"Error reloading month {month}: {e}")
+            raise
+    
+    def drop_month(self, month):
+        """
+        Delete every invoice and item emitted in one month
+        
+        On partitioned tables the month's partitions are detached and
+        dropped; flat tables fall back to two set-based DELETEs. Either way
+        the month is read once to take it out of the rollups. Ingested
+        archive fingerprints are kept, so use reload_month to load the month
+        again.
+        
+        Args:
+            month: 'YYYYMM', 'YYYY-MM' or a date in the month
+        """
+        try:
+            with self.engine.connect() as conn:
+                self._drop_month(conn, _month_period(month))
+                self._merge_rollups(conn)
+                conn.commit()
+                self._bump_data_version()
+        
+        except SQLAlchemyError as e:
+            logging.error(f"Error dropping month {month}: {e}")
+            raise
+    
+    def _drop_month(self, conn, month):
+        """Delete one month, staging its rows to leave the rollups (merged by the caller)"""
+        bounds = {'start': str(month.start_time.date()), 'end': str((month + 1).start_time.date())}
+        in_month = "data_emissao >= :start AND data_emissao < :end"
+        partitioned = self._is_partitioned(conn)
+        
+        self._stage_invoice_deltas(conn, f"invoices i WHERE {in_month}", sign=-1, params=bounds)
+        if partitioned:
+            self._stage_item_deltas(conn, f"invoice_items ii WHERE {in_month}", sign=-1, params=bounds)
+        else:
+            self._stage_item_deltas(
+                conn, f"invoice_items ii WHERE chave_acesso IN (SELECT chave_acesso FROM invoices WHERE {in_month})",
+                sign=-1, params=bounds
+            )
+        
+        if partitioned:
+            # Items first: their foreign key references the invoice partition
+            for parent in ('invoice_items', 'invoices'):
+                partition = _partition_name(parent, month)
+                if conn.execute(text("SELECT to_regclass(:name)"), {'name': partition}).scalar():
+                    conn.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {partition}"))
+                    conn.execute(text(f"DROP TABLE {partition}"))
+            self._partitions.discard(month)
+            return
+        
+        conn.execute(text(f"""
+            DELETE FROM invoice_items WHERE chave_acesso IN (
+                SELECT chave_acesso FROM invoices WHERE {in_month}
+            )
+        """), bounds)
+        conn.execute(text(f"DELETE FROM invoices WHERE {in_month}"), bounds)
+    
+    def refresh_rollups(self):
+        """
+        Rebuild the rollup tables from the invoices and items
+        
+        Loads keep the rollups current on their own; this is only needed
+        after changing the tables outside DatabaseManager.
+        """
+        try:
+            with self.engine.connect() as conn:
+                self._rebuild_rollups(conn)
+                conn.commit()
+                self._bump_data_version()
+        
+        except SQLAlchemyError as e:
+            logging.error(f"Error refreshing rollups: {e}")
+            raise
+    
+    def _rebuild_rollups(self, conn):
+        self._lock_rollups(conn)
+        for rollup in ROLLUP_TABLES:
+            conn.execute(text(f"DELETE FROM {rollup}"))
+        self._stage_invoice_deltas(conn, "invoices i")
+        self._stage_item_deltas(conn, "invoice_items ii")
+        self._merge_rollups(conn)
+    
+    def _rollup_staging(self, conn, rollup):
+        """Session-private table collecting the pending changes of a rollup until _merge_rollups"""
+        staging = f"staging_{rollup}"
+        conn.execute(text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} AS SELECT * FROM {rollup} WHERE 1 = 0"))
+        return staging
+    
+    def _stage_invoice_deltas(self, conn, source, sign=1, params=None):
+        """
+        Stage what some invoice rows contribute to the invoice rollups
+        
+        Args:
+            source (str): FROM clause (optionally with a WHERE) selecting the
+                rows as ``i``
+            sign (int): 1 to add the rows, -1 to take them out
+            params (dict): Parameters of ``source``
+        """
+        if conn.dialect.name == 'postgresql':
+            month = "to_char(i.data_emissao, 'YYYY-MM')"
+        else:
+            month = "strftime('%Y-%m', i.data_emissao)"
+        conn.execute(text(f"""
+            INSERT INTO {self._rollup_staging(conn, 'invoice_month_rollup')}
+                (mes, cnpj_emitente, invoice_count, valued_count, total_value)
+            SELECT COALESCE({month}, ''), COALESCE(i.cnpj_emitente, ''),
+                   {sign} * COUNT(*), {sign} * COUNT(i.valor_nota_fiscal),
+                   {sign} * COALESCE(SUM(i.valor_nota_fiscal), 0)
+            FROM {source}
+            GROUP BY 1, 2
+        """), params or {})
+        conn.execute(text(f"""
+            INSERT INTO {self._rollup_staging(conn, 'invoice_recipient_rollup')} (cnpj_destinatario, invoice_count)
+            SELECT COALESCE(i.cnpj_destinatario, ''), {sign} * COUNT(*)
+            FROM {source}
+            GROUP BY 1
+        """), params or {})
+    
+    def _stage_item_deltas(self, conn, source, sign=1, params=None):
+        """Stage what some item rows (``ii`` in ``source``) contribute to the product rollup"""
+        conn.execute(text(f"""
+            INSERT INTO {self._rollup_staging(conn, 'product_rollup')}
+                (descricao_produto, item_count, total_quantity, total_value)
+            SELECT COALESCE(ii.descricao_produto, ''), {sign} * COUNT(*),
+                   {sign} * COALESCE(SUM(ii.quantidade), 0), {sign} * COALESCE(SUM(ii.valor_total), 0)
+            FROM {source}
+            GROUP BY 1
+        """), params or {})
+    
+    def _lock_rollups(self, conn):
+        """
+        Serialize rollup writes until the transaction ends
+        
+        Rollup rows are shared by every load (one row per product, recipient
+        or emitter month), so concurrent transactions updating them row by
+        row would block each other and could deadlock. On PostgreSQL writers
+        take one advisory lock instead; SQLite already has a single writer.
+        """
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': ROLLUP_LOCK_KEY})
+    
+    def _merge_rollups(self, conn):
+        """
+        Add the staged changes to their rollups
+        
+        Loads stage their changes as they go and merge once, right before
+        committing, so the rollup lock is only held for the merge and the
+        commit. Only the keys touched by the staged rows are written; keys
+        left without rows are removed.
+        """
+        self._lock_rollups(conn)
+        for rollup in ROLLUP_TABLES:
+            keys, measures = ROLLUP_TABLES[rollup]
+            staging = self._rollup_staging(conn, rollup)
+            key_list = ', '.join(keys)
+            # Bulk-loaded empty strings arrive as NULL
+            staged_keys = ', '.join(f"COALESCE({key}, '')" for key in keys)
+            
+            conn.execute(text(f"""
+                INSERT INTO {rollup} ({key_list}, {', '.join(measures)})
+                SELECT {staged_keys}, {', '.join(f"SUM({measure})" for measure in measures)}
+                FROM {staging}
+                GROUP BY {staged_keys}
+                ORDER BY {staged_keys}
+                ON CONFLICT ({key_list}) DO UPDATE SET
+                    {', '.join(f"{measure} = {rollup}.{measure} + EXCLUDED.{measure}" for measure in measures)}
+            """))
+            conn.execute(text(f"""
+                DELETE FROM {rollup}
+                WHERE {measures[0]} <= 0 AND ({key_list}) IN (SELECT {staged_keys} FROM {staging})
+            """))
+            conn.execute(text(f"DELETE FROM {staging}"))
+    
+    def _is_partitioned(self, conn):
+        """Whether invoices is partitioned by month (flat tables of earlier versions are not)"""
+        if self._partitioned is None:
+            if conn.dialect.name != 'postgresql':
+                self._partitioned = False
+            else:
+                self._partitioned = bool(conn.execute(text("""
+                    SELECT EXISTS (
+                        SELECT 1 FROM pg_partitioned_table p
+                        JOIN pg_class c ON c.oid = p.partrelid
+                        WHERE c.relname = 'invoices' AND pg_table_is_visible(c.oid)
+                    )
+                """)).scalar())
+        return self._partitioned
+    
+    def create_partitions(self, months):
+        """
+        Create monthly partitions ahead of a load (no-op on flat tables)
+        
+        Creating a partition locks the whole table until the transaction
+        ends, so bulk loaders running several transactions at once should
+        create the partitions they need before starting them.
+        
+        Args:
+            months: Iterable of 'YYYYMM', 'YYYY-MM' or dates
+        """
+        try:
+            with self.engine.connect() as conn:
+                if self._is_partitioned(conn):
+                    self._ensure_partitions(conn, {_month_period(month) for month in months})
+                    conn.commit()
+        
+        except SQLAlchemyError as e:
+            self._partitions = set()
+            logging.error(f"Error creating partitions: {e}")
+            raise
+    
+    def _ensure_partitions(self, conn, months):
+        """Create the missing monthly partitions of invoices and invoice_items"""
+        for month in sorted(set(months) - self._partitions):
+            start, end = month.start_time.date(), (month + 1).start_time.date()
+            for parent in ('invoices', 'invoice_items'):
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {_partition_name(parent, month)}
+                    PARTITION OF {parent} FOR VALUES FROM ('{start}') TO ('{end}')
+                """))
+        self._partitions.update(months)
+    
+    def _worker_limit(self, workers):
+        """Clamp the worker count to the connection pool and the backend"""
+        workers = max(1, int(workers or 1))
+        if self.engine.dialect.name == 'sqlite':
+            # SQLite has a single writer: concurrent transactions would only wait on its lock
+            return 1
+        pool_size = getattr(self.engine.pool, 'size', None)
+        if callable(pool_size):
+            workers = min(workers, pool_size())
+        return workers
+    
+    def _save_chunk(self, conn, filename, df, stats, cleared_keys):
+        """Route one chunk to the header or item loader and add its counts to ``stats``"""
+        if 'cabecalho' in filename.lower() or 'header' in filename.lower():
+            for key, count in self._save_invoices(df, conn).items():
+                stats[key] += count
+                stats['invoices'] += count
+        elif 'itens' in filename.lower() or 'items' in filename.lower():
+            stats['items'] += self._save_invoice_items(df, conn, cleared_keys)
+    
+    def _save_parallel(self, pairs, workers, fingerprint=None, archive_name=None, complete=None):
+        """
+        Load chunks concurrently, partitioned by a hash of the access key
+        
+        A header and its items always fall in the same partition, and each
+        partition is fed in file order to one worker with its own pooled
+        connection, so headers still precede their items. Queues are bounded,
+        keeping memory independent of the archive size. Workers commit their
+        rows after every chunk but merge their rollup changes once, when
+        their partition ends, so they wait on the rollup lock only once each.
+        The archive is recorded as ingested only when all of them succeeded,
+        and reloading after a failure is idempotent.
+        
+        Returns:
+            dict: Load statistics with a 'workers' list of per-partition counts,
+                busy seconds and rows per second
+        """
+        tasks = [queue.Queue(maxsize=PARTITION_QUEUE_CHUNKS) for _ in range(workers)]
+        with self.engine.connect() as conn:
+            partitioned = self._is_partitioned(conn)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest') as executor:
+            futures = [executor.submit(self._ingest_partition, tasks[index], index) for index in range(workers)]
+            try:
+                for filename, df in _iter_chunks(pairs):
+                    key_column = 'CHAVE DE ACESSO' if 'CHAVE DE ACESSO' in df.columns else 'chave_acesso'
+                    if key_column not in df.columns:
+                        continue
+                    if partitioned:
+                        # Creating a partition locks the parent table, so it is done here,
+                        # outside the workers' transactions, which end after every chunk
+                        months = set(_chunk_emission_dates(df).dropna().dt.to_period('M'))
+                        if months - self._partitions:
+                            self.create_partitions(months)
+                    partitions = _partition_of(df[key_column], workers)
+                    for index, part in df.groupby(partitions, sort=False):
+                        tasks[index].put((filename, part))
+            finally:
+                # End every partition, also when reading the input failed
+                for task in tasks:
+                    task.put(None)
+            
+            entries = []
+            errors = []
+            for future in futures:
+                try:
+                    entries.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+        
+        # Committed partitions changed the data even if another one failed
+        self._bump_data_version()
+        if errors:
+            raise errors[0]
+        
+        if fingerprint and (complete is None or complete()):
+            with self.engine.connect() as conn:
+                self._record_archive(conn, fingerprint, archive_name)
+                conn.commit()
+        
+        stats = _empty_load_stats()
+        for entry in entries:
+            for key in stats:
+                stats[key] += entry[key]
+        stats['workers'] = entries
+        return stats
+    
+    def _ingest_partition(self, tasks, index):
+        """Worker: load the chunks of one partition, committing each one"""
+        entry = _empty_load_stats()
+        busy = 0.0
+        finished = False
+        try:
+            with self.engine.connect() as conn:
+                cleared_keys = set()
+                try:
+                    for filename, df in iter(tasks.get, None):
+                        start = time.perf_counter()
+                        self._save_chunk(conn, filename, df, entry, cleared_keys)
+                        conn.commit()
+                        busy += time.perf_counter() - start
+                finally:
+                    # Rows are committed per chunk, so a partition created by the
+                    # producer never waits on a worker's transaction. Their rollup
+                    # changes stay staged in the session (a failed chunk's are rolled
+                    # back with it) and are merged once, under one rollup lock
+                    start = time.perf_counter()
+                    conn.rollback()
+                    self._merge_rollups(conn)
+                    conn.commit()
+                    busy += time.perf_counter() - start
+                finished = True
+        finally:
+            if not finished:
+                # Keep draining so the producer never blocks on a failed worker
+                for _ in iter(tasks.get, None):
+                    pass
+        
+        entry['partition'] = index
+        entry['seconds'] = busy
+        entry['rows_per_second'] = (entry['invoices'] + entry['items']) / max(busy, 1e-9)
+        return entry
+    
+    def is_archive_ingested(self, fingerprint):
+        """Check whether an archive with this fingerprint was already saved"""
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(
+                    text("SELECT 1 FROM ingested_archives WHERE fingerprint = :fingerprint"),
+                    {'fingerprint': fingerprint}
+                ).first()
+                return result is not None
+                
+        except SQLAlchemyError as e:
+            logging.error(f"Error checking ingested archives: {e}")
+            return False
+    
+    def _record_archive(self, conn, fingerprint, archive_name):
+        """Remember an ingested archive"""
+        conn.execute(text("""
+            INSERT INTO ingested_archives (fingerprint, filename)
+            VALUES (:fingerprint, :filename)
+            ON CONFLICT (fingerprint) DO UPDATE SET
+                filename = EXCLUDED.filename,
+                ingested_at = CURRENT_TIMESTAMP
+        """), {'fingerprint': fingerprint, 'filename': archive_name})
+    
     def _save_invoices(self, df, conn):
-        """Save invoice header data"""
+        """
+        Save invoice header data
+        
+        The chunk is bulk-loaded into a staging table and merged into
+        ``invoices`` with one INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+        On partitioned tables the conflict target includes the emission date
+        and the partitions of the chunk's months are created when missing.
+        
+        Returns:
+            dict: Number of invoices inserted, updated and left unchanged
+        """
         # Map CSV columns to database columns
-        column_mapping = {
-            'CHAVE DE ACESSO': 'chave_acesso',
-            'MODELO': 'modelo',
-            'SÉRIE': 'serie',
-            'NÚMERO': 'numero',
-            'NATUREZA DA OPERAÇÃO': 'natureza_operacao',
-            'DATA EMISSÃO': 'data_emissao',
-            'EVENTO MAIS RECENTE': 'evento_recente',
-            'DATA/HORA EVENTO MAIS RECENTE': 'data_evento',
-            'CPF/CNPJ Emitente': 'cnpj_emitente',
-            'RAZÃO SOCIAL EMITENTE': 'razao_social_emitente',
-            'INSCRIÇÃO ESTADUAL EMITENTE': 'ie_emitente',
-            'UF EMITENTE': 'uf_emitente',
-            'MUNICÍPIO EMITENTE': 'municipio_emitente',
-            'CNPJ DESTINATÁRIO': 'cnpj_destinatario',
-            'NOME DESTINATÁRIO': 'nome_destinatario',
-            'UF DESTINATÁRIO': 'uf_destinatario',
-            'INDICADOR IE DESTINATÁRIO': 'indicador_ie_destinatario',
-            'DESTINO DA OPERAÇÃO': 'destino_operacao',
-            'CONSUMIDOR FINAL': 'consumidor_final',
-            'PRESENÇA DO COMPRADOR': 'presenca_comprador',
-            'VALOR NOTA FISCAL': 'valor_nota_fiscal'
-        }
+        column_mapping = INVOICE_COLUMNS
         
         # Rename columns and clean data
         df_clean = df.copy()
@@ -158,40 +848,159 @@ class DatabaseManager:
         if 'data_evento' in df_clean.columns:
             df_clean['data_evento'] = pd.to_datetime(df_clean['data_evento'], errors='coerce')
         
-        # Use upsert to handle duplicates
-        for _, row in df_clean.iterrows():
+        # Monthly partitions need an emission date on every row
+        conflict = ['chave_acesso']
+        if self._is_partitioned(conn):
+            df_clean['data_emissao'] = _chunk_emission_dates(df_clean)
+            conflict.append('data_emissao')
+        
+        # Keep the most recent event of keys repeated within the chunk
+        df_clean = df_clean.dropna(subset=conflict)
+        if 'data_evento' in df_clean.columns:
+            df_clean = df_clean.sort_values('data_evento', kind='stable', na_position='first')
+        df_clean = df_clean.drop_duplicates(subset=['chave_acesso'], keep='last')
+        
+        columns = [col for col in INVOICE_COLUMNS.values() if col in df_clean.columns]
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if df_clean.empty:
+            return counts
+        if len(conflict) > 1:
+            self._ensure_partitions(conn, set(df_clean['data_emissao'].dt.to_period('M')))
+        
+        # Session-private staging table (temporary tables are not WAL-logged)
+        conn.execute(text(f"""
+            CREATE TEMP TABLE IF NOT EXISTS staging_invoices AS
+            SELECT {', '.join(INVOICE_COLUMNS.values())} FROM invoices WHERE 1 = 0
+        """))
+        conn.execute(text("DELETE FROM staging_invoices"))
+        self._bulk_insert(conn, 'staging_invoices', df_clean[columns])
+        
+        # Stored rows are matched on the access key alone: on partitioned tables
+        # a key may be stored under another emission date of the chunk's months
+        key_match = "i.chave_acesso = s.chave_acesso"
+        bounds = {}
+        if len(conflict) > 1:
+            months = df_clean['data_emissao'].dt.to_period('M')
+            bounds = {'start': months.min().start_time.date(), 'end': (months.max() + 1).start_time.date()}
+            key_match += " AND i.data_emissao >= :start AND i.data_emissao < :end"
+            # A re-dated key whose stored event is newer keeps its stored row
             conn.execute(text("""
-                INSERT INTO invoices (chave_acesso, modelo, serie, numero, natureza_operacao, 
-                                    data_emissao, evento_recente, data_evento, cnpj_emitente,
-                                    razao_social_emitente, ie_emitente, uf_emitente, municipio_emitente,
-                                    cnpj_destinatario, nome_destinatario, uf_destinatario,
-                                    indicador_ie_destinatario, destino_operacao, consumidor_final,
-                                    presenca_comprador, valor_nota_fiscal)
-                VALUES (:chave_acesso, :modelo, :serie, :numero, :natureza_operacao,
-                        :data_emissao, :evento_recente, :data_evento, :cnpj_emitente,
-                        :razao_social_emitente, :ie_emitente, :uf_emitente, :municipio_emitente,
-                        :cnpj_destinatario, :nome_destinatario, :uf_destinatario,
-                        :indicador_ie_destinatario, :destino_operacao, :consumidor_final,
-                        :presenca_comprador, :valor_nota_fiscal)
-                ON CONFLICT (chave_acesso) DO UPDATE SET
-                    valor_nota_fiscal = EXCLUDED.valor_nota_fiscal,
-                    data_emissao = EXCLUDED.data_emissao
-            """), row.to_dict())
-    
-    def _save_invoice_items(self, df, conn):
-        """Save invoice line items data"""
-        column_mapping = {
-            'CHAVE DE ACESSO': 'chave_acesso',
-            'NÚMERO PRODUTO': 'numero_produto',
-            'DESCRIÇÃO DO PRODUTO/SERVIÇO': 'descricao_produto',
-            'CÓDIGO NCM/SH': 'codigo_ncm',
-            'NCM/SH (TIPO DE PRODUTO)': 'ncm_tipo_produto',
-            'CFOP': 'cfop',
-            'QUANTIDADE': 'quantidade',
-            'UNIDADE': 'unidade',
-            'VALOR UNITÁRIO': 'valor_unitario',
-            'VALOR TOTAL': 'valor_total'
-        }
+                DELETE FROM staging_invoices WHERE EXISTS (
+                    SELECT 1 FROM invoices i
+                    WHERE i.chave_acesso = staging_invoices.chave_acesso
+                      AND i.data_emissao >= :start AND i.data_emissao < :end
+                      AND i.data_emissao <> staging_invoices.data_emissao
+                      AND i.data_evento > staging_invoices.data_evento
+                )
+            """), bounds)
+        matched = f"invoices i JOIN staging_invoices s ON {key_match}"
+        column_list = ', '.join(columns)
+        conflict_list = ', '.join(conflict)
+        
+        # New keys are inserted first, in key order. A key being inserted by a
+        # concurrent load makes this wait until that load ends, so every stored
+        # row read below is committed or our own
+        inserted = conn.execute(text(f"""
+            INSERT INTO invoices ({column_list})
+            SELECT {column_list} FROM staging_invoices WHERE chave_acesso IS NOT NULL
+            ORDER BY {conflict_list}
+            ON CONFLICT ({conflict_list}) DO NOTHING
+            RETURNING {conflict_list}
+        """)).fetchall()
+        conn.execute(text(f"""
+            CREATE TEMP TABLE IF NOT EXISTS staging_new_invoices AS
+            SELECT {conflict_list} FROM invoices WHERE 1 = 0
+        """))
+        conn.execute(text("DELETE FROM staging_new_invoices"))
+        self._bulk_insert(conn, 'staging_new_invoices', pd.DataFrame(inserted, columns=conflict))
+        
+        # Rows stored before this chunk, locked so no concurrent load changes
+        # them between the two rollup snapshots
+        stored = f"""{matched} WHERE NOT EXISTS (
+            SELECT 1 FROM staging_new_invoices n WHERE {' AND '.join(f"n.{col} = i.{col}" for col in conflict)}
+        )"""
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(f"SELECT 1 FROM {stored} ORDER BY i.chave_acesso FOR UPDATE OF i"), bounds)
+        
+        # The stored rows leave the rollups before the upsert and come back, as
+        # merged, after it (see _merge_rollups)
+        self._stage_invoice_deltas(conn, stored, sign=-1, params=bounds)
+        # A re-dated key was inserted under its new date and counts as updated
+        redated = 0
+        if len(conflict) > 1:
+            redated = conn.execute(text(f"""
+                SELECT COUNT(*) FROM {stored}
+                AND EXISTS (SELECT 1 FROM staging_new_invoices n WHERE n.chave_acesso = i.chave_acesso)
+            """), bounds).scalar()
+        
+        # One set-based upsert of every mutable column, skipping rows whose
+        # content is unchanged (such as the rows just inserted) and events
+        # older than the stored one
+        distinct = 'IS DISTINCT FROM' if conn.dialect.name == 'postgresql' else 'IS NOT'
+        mutable = [col for col in columns if col not in conflict]
+        result = conn.execute(text(f"""
+            INSERT INTO invoices ({column_list})
+            SELECT {column_list} FROM staging_invoices WHERE chave_acesso IS NOT NULL
+            ON CONFLICT ({conflict_list}) DO UPDATE SET
+                {', '.join(f"{col} = EXCLUDED.{col}" for col in mutable)}
+            WHERE ({' OR '.join(f"invoices.{col} {distinct} EXCLUDED.{col}" for col in mutable) or 'FALSE'})
+        """ + ("""
+              AND (invoices.data_evento IS NULL OR EXCLUDED.data_evento IS NULL
+                   OR EXCLUDED.data_evento >= invoices.data_evento)
+        """ if 'data_evento' in mutable else '')))
+        
+        if len(conflict) > 1:
+            self._move_redated_invoices(conn, bounds)
+        
+        self._stage_invoice_deltas(conn, matched, params=bounds)
+        
+        counts['inserted'] = len(inserted) - redated
+        counts['updated'] = result.rowcount + redated
+        counts['unchanged'] = len(df_clean) - counts['inserted'] - counts['updated']
+        return counts
+    
+    def _move_redated_invoices(self, conn, bounds):
+        """
+        Finish moving staged keys stored under another emission date
+        
+        On partitioned tables the emission date is part of the primary key,
+        so the upsert inserts a key whose date changed (for example a first
+        load dated from the access key by _emission_dates) as a second row.
+        The items of the old row move to the new date and the old row is
+        deleted. Only the months in ``bounds`` are searched: the access key
+        encodes the emission month, so a key cannot change month.
+        """
+        item_columns = ', '.join(ITEM_COLUMNS.values())
+        # Rows (aliased t) of staged keys stored under another date
+        redated = """
+            t.data_emissao >= :start AND t.data_emissao < :end
+            AND EXISTS (
+                SELECT 1 FROM staging_invoices s
+                WHERE s.chave_acesso = t.chave_acesso AND s.data_emissao <> t.data_emissao
+            )
+        """
+        conn.execute(text(f"""
+            INSERT INTO invoice_items ({item_columns}, data_emissao)
+            SELECT {', '.join(f"ii.{col}" for col in ITEM_COLUMNS.values())}, s.data_emissao
+            FROM invoice_items ii JOIN staging_invoices s ON s.chave_acesso = ii.chave_acesso
+            WHERE ii.data_emissao >= :start AND ii.data_emissao < :end
+              AND s.data_emissao <> ii.data_emissao
+        """), bounds)
+        conn.execute(text(f"DELETE FROM invoice_items t WHERE {redated}"), bounds)
+        conn.execute(text(f"DELETE FROM invoices t WHERE {redated}"), bounds)
+    
+    def _save_invoice_items(self, df, conn, cleared_keys=None):
+        """
+        Save invoice line items data
+        
+        Existing items of each access key are replaced. When the items of one
+        file arrive in several chunks, ``cleared_keys`` tracks the keys already
+        replaced so a later chunk does not delete rows from an earlier one.
+        On partitioned tables each item takes the emission date of its stored
+        invoice, which its foreign key references; the item's own date, or the
+        access key's month, is only used for invoices not stored yet.
+        """
+        column_mapping = ITEM_COLUMNS
         
         df_clean = df.copy()
         df_clean = df_clean.rename(columns=column_mapping)
@@ -202,140 +1011,333 @@ class DatabaseManager:
             if col in df_clean.columns:
                 df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
         
+        columns = [col for col in ITEM_COLUMNS.values() if col in df_clean.columns]
+        bounds = None
+        if self._is_partitioned(conn):
+            # Items carry their invoice's emission date, the partition key
+            df_clean['data_emissao'] = _chunk_emission_dates(df_clean)
+            df_clean = df_clean.dropna(subset=['data_emissao'])
+            months = df_clean['data_emissao'].dt.to_period('M')
+            self._ensure_partitions(conn, set(months))
+            columns.append('data_emissao')
+            # Stored invoices are searched in the months of the access keys and
+            # of the items' own dates
+            months = pd.concat([months, _emission_dates(None, df_clean['chave_acesso']).dt.to_period('M')]).dropna()
+            if not months.empty:
+                bounds = {'start': months.min().start_time.date(), 'end': (months.max() + 1).start_time.date()}
+        
         # Clear existing items for these invoices and insert new ones
-        chaves = df_clean['chave_acesso'].unique()
-        for chave in chaves:
-            conn.execute(text("DELETE FROM invoice_items WHERE chave_acesso = :chave"), {'chave': chave})
+        chaves = [str(chave) for chave in df_clean['chave_acesso'].dropna().unique()]
+        if cleared_keys is not None:
+            chaves = [chave for chave in chaves if chave not in cleared_keys]
+            cleared_keys.update(chaves)
+        self._delete_items(conn, chaves, bounds)
         
-        # Insert new items
-        for _, row in df_clean.iterrows():
+        # New items go through a staging table so their product rollup changes
+        # are summed by the database, with the same DECIMAL types as deletions
+        staged_columns = list(ITEM_COLUMNS.values()) + (['data_emissao'] if 'data_emissao' in columns else [])
+        conn.execute(text(f"""
+            CREATE TEMP TABLE IF NOT EXISTS staging_invoice_items AS
+            SELECT {', '.join(staged_columns)} FROM invoice_items WHERE 1 = 0
+        """))
+        conn.execute(text("DELETE FROM staging_invoice_items"))
+        written = self._bulk_insert(conn, 'staging_invoice_items', df_clean[columns])
+        if bounds:
             conn.execute(text("""
-                INSERT INTO invoice_items (chave_acesso, numero_produto, descricao_produto,
-                                         codigo_ncm, ncm_tipo_produto, cfop, quantidade,
-                                         unidade, valor_unitario, valor_total)
-                VALUES (:chave_acesso, :numero_produto, :descricao_produto,
-                        :codigo_ncm, :ncm_tipo_produto, :cfop, :quantidade,
-                        :unidade, :valor_unitario, :valor_total)
-            """), row.to_dict())
+                UPDATE staging_invoice_items ii SET data_emissao = i.data_emissao
+                FROM invoices i
+                WHERE i.chave_acesso = ii.chave_acesso
+                  AND i.data_emissao >= :start AND i.data_emissao < :end
+                  AND i.data_emissao <> ii.data_emissao
+            """), bounds)
+        self._stage_item_deltas(conn, "staging_invoice_items ii")
+        column_list = ', '.join(columns)
+        conn.execute(text(f"INSERT INTO invoice_items ({column_list}) SELECT {column_list} FROM staging_invoice_items"))
+        return written
+    
+    def _delete_items(self, conn, chaves, bounds=None):
+        """
+        Delete the items of many invoices in one set-based statement
+        
+        PostgreSQL receives the keys as a single array parameter. Other
+        databases get them through a temporary staging table, bulk-filled
+        and joined by one DELETE, so the statement count does not grow with
+        the number of keys. With ``bounds`` ({'start', 'end'} emission dates)
+        only the partitions of that range are searched. The deleted items are
+        staged to leave the product rollup.
+        """
+        if not chaves:
+            return
+        
+        if conn.dialect.name == 'postgresql':
+            condition = "chave_acesso = ANY(:chaves)"
+            params = {'chaves': chaves}
+            if bounds:
+                condition += " AND data_emissao >= :start AND data_emissao < :end"
+                params.update(bounds)
+        else:
+            conn.execute(text("CREATE TEMP TABLE IF NOT EXISTS staging_item_keys (chave_acesso VARCHAR(44) PRIMARY KEY)"))
+            conn.execute(text("DELETE FROM staging_item_keys"))
+            self._bulk_insert(conn, 'staging_item_keys', pd.DataFrame({'chave_acesso': chaves}))
+            condition = "chave_acesso IN (SELECT chave_acesso FROM staging_item_keys)"
+            params = {}
+        
+        self._stage_item_deltas(conn, f"invoice_items ii WHERE {condition}", sign=-1, params=params)
+        conn.execute(text(f"DELETE FROM invoice_items WHERE {condition}"), params)
+    
+    def _bulk_insert(self, conn, table_name, df):
+        """
+        Append DataFrame rows to a table
+        
+        Streams the rows with COPY FROM STDIN on PostgreSQL (psycopg2) and
+        falls back to batched multi-row INSERTs on other drivers.
+        
+        Args:
+            conn: Open SQLAlchemy connection; the rows join its transaction
+            table_name (str): Target table
+            df (DataFrame): Rows, with columns named as the table columns
+            
+        Returns:
+            int: Number of rows written
+        """
+        if df.empty:
+            return 0
+        
+        if conn.dialect.name == 'postgresql' and conn.dialect.driver == 'psycopg2':
+            copy_sql = f"COPY {table_name} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)"
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                for start in range(0, len(df), BULK_BATCH_ROWS):
+                    # Unquoted empty fields are NULL in COPY's CSV format
+                    buffer = io.StringIO()
+                    df.iloc[start:start + BULK_BATCH_ROWS].to_csv(buffer, header=False, index=False)
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_sql, buffer)
+            finally:
+                cursor.close()
+        else:
+            statement = insert(table(table_name, *[column(col) for col in df.columns]))
+            for batch in _record_batches(df):
+                conn.execute(statement, batch)
+        
+        return len(df)
     
     def get_invoice_summary(self):
-        """Get summary statistics from the database"""
+        """
+        Get summary statistics from the database
+        
+        Totals and distinct counts come from the rollup tables, whose size
+        depends on the number of months, emitters, recipients and products
+        rather than on the number of invoices; the date range is read from
+        the data_emissao index. Results are cached per data version.
+        """
         try:
-            with self.engine.connect() as conn:
-                result = conn.execute(text("""
-                    SELECT 
-                        COUNT(*) as total_invoices,
-                        SUM(valor_nota_fiscal) as total_value,
-                        AVG(valor_nota_fiscal) as avg_value,
-                        MIN(data_emissao) as min_date,
-                        MAX(data_emissao) as max_date,
-                        COUNT(DISTINCT cnpj_emitente) as unique_emitters,
-                        COUNT(DISTINCT cnpj_destinatario) as unique_recipients
-                    FROM invoices
-                """)).fetchone()
-                
-                items_result = conn.execute(text("""
-                    SELECT 
-                        COUNT(*) as total_items,
-                        SUM(quantidade) as total_quantity,
-                        SUM(valor_total) as total_items_value
-                    FROM invoice_items
-                """)).fetchone()
-                
-                return {
-                    'invoices': dict(result._mapping) if result else {},
-                    'items': dict(items_result._mapping) if items_result else {}
-                }
+            return self._cached('get_invoice_summary', (), self._invoice_summary)
                 
         except SQLAlchemyError as e:
             logging.error(f"Error getting summary: {e}")
             return {}
     
-    def query_invoices(self, query_params=None):
-        """Query invoices with optional filters"""
-        try:
-            base_query = """
-                SELECT i.*, 
-                       COUNT(ii.id) as item_count,
-                       SUM(ii.valor_total) as calculated_total
-                FROM invoices i
-                LEFT JOIN invoice_items ii ON i.chave_acesso = ii.chave_acesso
-            """
+    def _invoice_summary(self):
+        with self.engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT 
+                    COALESCE(SUM(invoice_count), 0) as total_invoices,
+                    SUM(total_value) as total_value,
+                    SUM(total_value) * 1.0 / NULLIF(SUM(valued_count), 0) as avg_value,
+                    (SELECT MIN(data_emissao) FROM invoices) as min_date,
+                    (SELECT MAX(data_emissao) FROM invoices) as max_date,
+                    COUNT(DISTINCT NULLIF(cnpj_emitente, '')) as unique_emitters,
+                    (SELECT COUNT(*) FROM invoice_recipient_rollup WHERE cnpj_destinatario <> '') as unique_recipients
+                FROM invoice_month_rollup
+            """)).fetchone()
             
-            where_conditions = []
-            params = {}
-            
-            if query_params:
-                if 'start_date' in query_params:
-                    where_conditions.append("i.data_emissao >= :start_date")
-                    params['start_date'] = query_params['start_date']
-                
-                if 'end_date' in query_params:
-                    where_conditions.append("i.data_emissao <= :end_date")
-                    params['end_date'] = query_params['end_date']
-                
-                if 'emitente' in query_params:
-                    where_conditions.append("i.cnpj_emitente = :emitente")
-                    params['emitente'] = query_params['emitente']
-            
-            if where_conditions:
-                base_query += " WHERE " + " AND ".join(where_conditions)
+            items_result = conn.execute(text("""
+                SELECT 
+                    COALESCE(SUM(item_count), 0) as total_items,
+                    SUM(total_quantity) as total_quantity,
+                    SUM(total_value) as total_items_value
+                FROM product_rollup
+            """)).fetchone()
             
-            base_query += " GROUP BY i.id ORDER BY i.data_emissao DESC"
+            return {
+                'invoices': dict(result._mapping) if result else {},
+                'items': dict(items_result._mapping) if items_result else {}
+            }
+    
+    def query_invoices(self, query_params=None, limit=None, after=None):
+        """
+        Query invoices with optional filters, newest first
+        
+        With ``limit`` one page is returned, read by keyset pagination on
+        (data_emissao, id): pass the ``after`` cursor of the last row of a
+        page (see invoice_cursor) to get the next one, at the same cost
+        however deep it is. Pages skip invoices without an emission date,
+        which only flat tables can hold. Date filters also restrict the
+        joined items on partitioned tables, so both sides are pruned to the
+        months in range.
+        
+        Args:
+            query_params (dict): Optional 'start_date', 'end_date' and
+                'emitente' filters
+            limit (int): Page size; every matching invoice when None
+            after (tuple): (data_emissao, id) cursor of the previous page
             
+        Returns:
+            list: Invoice dicts with item_count and calculated_total
+        """
+        try:
             with self.engine.connect() as conn:
-                result = conn.execute(text(base_query), params)
+                sql, params = self._invoice_query(conn, query_params, limit, after)
+                result = conn.execute(text(sql), params)
                 return [dict(row._mapping) for row in result]
                 
         except SQLAlchemyError as e:
             logging.error(f"Error querying invoices: {e}")
             return []
     
-    def get_top_products(self, limit=10):
-        """Get top products by total value"""
+    def iter_invoices(self, query_params=None, batch_size=STREAM_BATCH_ROWS):
+        """
+        Stream every invoice of query_invoices in fixed-size batches
+        
+        Rows come through a server-side cursor on PostgreSQL, so memory
+        stays bounded by ``batch_size`` whatever the number of invoices.
+        
+        Args:
+            query_params (dict): Filters, as in query_invoices
+            batch_size (int): Invoices per batch
+            
+        Yields:
+            list: Up to ``batch_size`` invoice dicts, newest first
+        """
         try:
             with self.engine.connect() as conn:
-                result = conn.execute(text("""
-                    SELECT 
-                        descricao_produto,
-                        SUM(quantidade) as total_quantity,
-                        SUM(valor_total) as total_value,
-                        COUNT(*) as frequency
-                    FROM invoice_items
-                    WHERE descricao_produto IS NOT NULL
-                    GROUP BY descricao_produto
-                    ORDER BY total_value DESC
-                    LIMIT :limit
-                """), {'limit': limit})
-                
-                return [dict(row._mapping) for row in result]
+                sql, params = self._invoice_query(conn, query_params)
+                result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(text(sql), params)
+                for batch in result.partitions(batch_size):
+                    yield [dict(row._mapping) for row in batch]
+                    
+        except SQLAlchemyError as e:
+            logging.error(f"Error streaming invoices: {e}")
+            raise
+    
+    def _invoice_query(self, conn, query_params=None, limit=None, after=None):
+        """
+        Build the SQL and parameters of query_invoices
+        
+        The invoices are filtered, ordered and limited first; only the items
+        of that page are then joined and aggregated.
+        """
+        partitioned = self._is_partitioned(conn)
+        
+        # Invoice columns are listed (and grouped by) explicitly: on
+        # partitioned tables id is no longer a primary key that would let
+        # GROUP BY i.id cover i.*
+        columns = ['id', *INVOICE_COLUMNS.values(), 'created_at']
+        join_conditions = ["i.chave_acesso = ii.chave_acesso"]
+        if partitioned:
+            join_conditions.append("ii.data_emissao = i.data_emissao")
+        
+        where_conditions = []
+        params = {}
+        
+        if query_params:
+            if 'start_date' in query_params:
+                where_conditions.append("i.data_emissao >= :start_date")
+                params['start_date'] = query_params['start_date']
+                if partitioned:
+                    join_conditions.append("ii.data_emissao >= :start_date")
+            
+            if 'end_date' in query_params:
+                where_conditions.append("i.data_emissao <= :end_date")
+                params['end_date'] = query_params['end_date']
+                if partitioned:
+                    join_conditions.append("ii.data_emissao <= :end_date")
+            
+            if 'emitente' in query_params:
+                where_conditions.append("i.cnpj_emitente = :emitente")
+                params['emitente'] = query_params['emitente']
+        
+        if limit is not None or after is not None:
+            where_conditions.append("i.data_emissao IS NOT NULL")
+        if after is not None:
+            where_conditions.append("(i.data_emissao, i.id) < (:after_date, :after_id)")
+            params['after_date'], params['after_id'] = after
+        
+        page_query = f"SELECT {', '.join(f'i.{col}' for col in columns)} FROM invoices i"
+        if where_conditions:
+            page_query += " WHERE " + " AND ".join(where_conditions)
+        page_query += " ORDER BY i.data_emissao DESC, i.id DESC"
+        if limit is not None:
+            page_query += " LIMIT :limit"
+            params['limit'] = int(limit)
+        
+        invoice_columns = ', '.join(f"i.{col}" for col in columns)
+        sql = f"""
+            SELECT {invoice_columns},
+                   COUNT(ii.id) as item_count,
+                   SUM(ii.valor_total) as calculated_total
+            FROM ({page_query}) i
+            LEFT JOIN invoice_items ii ON {' AND '.join(join_conditions)}
+            GROUP BY {invoice_columns}
+            ORDER BY i.data_emissao DESC, i.id DESC
+        """
+        return sql, params
+    
+    def get_top_products(self, limit=10):
+        """Get top products by total value, from the product rollup (cached per data version)"""
+        try:
+            return self._cached('get_top_products', (limit,), lambda: self._top_products(limit))
                 
         except SQLAlchemyError as e:
             logging.error(f"Error getting top products: {e}")
             return []
     
+    def _top_products(self, limit):
+        with self.engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT 
+                    descricao_produto,
+                    total_quantity,
+                    total_value,
+                    item_count as frequency
+                FROM product_rollup
+                WHERE descricao_produto <> ''
+                ORDER BY total_value DESC
+                LIMIT :limit
+            """), {'limit': limit})
+            
+            return [dict(row._mapping) for row in result]
+    
     def check_database_status(self):
-        """Check if database is accessible and has data"""
+        """Check if database is accessible and has data (cached per data version once ready)"""
         try:
-            with self.engine.connect() as conn:
-                # Check if tables exist
-                inspector = inspect(self.engine)
-                tables = inspector.get_table_names()
-                
-                if 'invoices' not in tables:
-                    return {'status': 'no_tables', 'message': 'Database tables not created'}
-                
-                # Check if we have data
-                result = conn.execute(text("SELECT COUNT(*) FROM invoices")).scalar()
-                
-                if result == 0:
-                    return {'status': 'empty', 'message': 'Database is empty'}
-                
-                return {
-                    'status': 'ready',
-                    'message': f'Database ready with {result} invoices',
-                    'invoice_count': result
-                }
+            # Tables and first rows may come from another process at any time
+            return self._cached(
+                'check_database_status', (), self._database_status,
+                cacheable=lambda status: status['status'] == 'ready'
+            )
                 
         except SQLAlchemyError as e:
             return {'status': 'error', 'message': f'Database error: {str(e)}'}
+
+    def _database_status(self):
+        with self.engine.connect() as conn:
+            # Check if tables exist
+            inspector = inspect(self.engine)
+            tables = inspector.get_table_names()
+            
+            if 'invoices' not in tables:
+                return {'status': 'no_tables', 'message': 'Database tables not created'}
+            
+            # Check if we have data
+            result = conn.execute(text("SELECT COUNT(*) FROM invoices")).scalar()
+            
+            if result == 0:
+                return {'status': 'empty', 'message': 'Database is empty'}
+            
+            return {
+                'status': 'ready',
+                'message': f'Database ready with {result} invoices',
+                'invoice_count': result
+            }
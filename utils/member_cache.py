@@ -0,0 +1,118 @@
+import os
+import hashlib
+import logging
+import tempfile
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Bump when parsing changes so entries written by older code are ignored
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join('data', 'cache')
+DEFAULT_CACHE_MAX_MB = 1024
+
+
+class MemberCache:
+    """On-disk Parquet cache of parsed ZIP members with size-bounded LRU eviction"""
+    
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        Args:
+            cache_dir (str): Cache directory (default: CSV_CACHE_DIR or data/cache)
+            max_bytes (int): Total size limit (default: CSV_CACHE_MAX_MB megabytes)
+        """
+        self.cache_dir = cache_dir or os.getenv('CSV_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('CSV_CACHE_MAX_MB', DEFAULT_CACHE_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.enabled = PARQUET_AVAILABLE
+        
+        if not self.enabled:
+            logging.info("pyarrow not installed, parsed member cache disabled")
+    
+    def key(self, info):
+        """Cache key of a ZIP member, from its name, CRC32 and size"""
+        raw = f"{os.path.basename(info.filename)}:{info.CRC:08x}:{info.file_size}:{CACHE_FORMAT_VERSION}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, info):
+        """
+        Load a parsed member from the cache
+        
+        Args:
+            info: zipfile.ZipInfo of the member
+            
+        Returns:
+            pandas DataFrame or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        path = self._path(info)
+        try:
+            df = pd.read_parquet(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        
+        # Refresh the access time used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+    
+    def put(self, info, df):
+        """Store a parsed member, then evict least recently used entries over the size limit"""
+        if not self.enabled:
+            return
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            os.close(fd)
+            try:
+                df.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, self._path(info))
+            finally:
+                self._remove(tmp_path)
+        except Exception as e:
+            logging.warning(f"Could not cache parsed member {info.filename}: {e}")
+            return
+        
+        self.evict()
+    
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith('.parquet'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+    
+    def _path(self, info):
+        return os.path.join(self.cache_dir, f"{self.key(info)}.parquet")
+    
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
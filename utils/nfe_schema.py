@@ -0,0 +1,166 @@
+import pandas as pd
+
+# CSV header -> database column, for the NF-e "Cabecalho" (invoice header) layout
+INVOICE_COLUMNS = {
+    'CHAVE DE ACESSO': 'chave_acesso',
+    'MODELO': 'modelo',
+    'SÉRIE': 'serie',
+    'NÚMERO': 'numero',
+    'NATUREZA DA OPERAÇÃO': 'natureza_operacao',
+    'DATA EMISSÃO': 'data_emissao',
+    'EVENTO MAIS RECENTE': 'evento_recente',
+    'DATA/HORA EVENTO MAIS RECENTE': 'data_evento',
+    'CPF/CNPJ Emitente': 'cnpj_emitente',
+    'RAZÃO SOCIAL EMITENTE': 'razao_social_emitente',
+    'INSCRIÇÃO ESTADUAL EMITENTE': 'ie_emitente',
+    'UF EMITENTE': 'uf_emitente',
+    'MUNICÍPIO EMITENTE': 'municipio_emitente',
+    'CNPJ DESTINATÁRIO': 'cnpj_destinatario',
+    'NOME DESTINATÁRIO': 'nome_destinatario',
+    'UF DESTINATÁRIO': 'uf_destinatario',
+    'INDICADOR IE DESTINATÁRIO': 'indicador_ie_destinatario',
+    'DESTINO DA OPERAÇÃO': 'destino_operacao',
+    'CONSUMIDOR FINAL': 'consumidor_final',
+    'PRESENÇA DO COMPRADOR': 'presenca_comprador',
+    'VALOR NOTA FISCAL': 'valor_nota_fiscal'
+}
+
+# CSV header -> database column, for the NF-e "Itens" (line items) layout
+ITEM_COLUMNS = {
+    'CHAVE DE ACESSO': 'chave_acesso',
+    'NÚMERO PRODUTO': 'numero_produto',
+    'DESCRIÇÃO DO PRODUTO/SERVIÇO': 'descricao_produto',
+    'CÓDIGO NCM/SH': 'codigo_ncm',
+    'NCM/SH (TIPO DE PRODUTO)': 'ncm_tipo_produto',
+    'CFOP': 'cfop',
+    'QUANTIDADE': 'quantidade',
+    'UNIDADE': 'unidade',
+    'VALOR UNITÁRIO': 'valor_unitario',
+    'VALOR TOTAL': 'valor_total'
+}
+
+# Identifiers and free text: kept as strings so leading zeros and 44-digit keys survive
+STRING_COLUMNS = [
+    'CHAVE DE ACESSO', 'SÉRIE', 'NÚMERO', 'CPF/CNPJ Emitente', 'RAZÃO SOCIAL EMITENTE',
+    'INSCRIÇÃO ESTADUAL EMITENTE', 'CNPJ DESTINATÁRIO', 'NOME DESTINATÁRIO',
+    'NÚMERO PRODUTO', 'DESCRIÇÃO DO PRODUTO/SERVIÇO', 'CÓDIGO NCM/SH'
+]
+
+# Enum-like columns with few distinct values
+CATEGORY_COLUMNS = [
+    'MODELO', 'NATUREZA DA OPERAÇÃO', 'EVENTO MAIS RECENTE', 'UF EMITENTE',
+    'MUNICÍPIO EMITENTE', 'UF DESTINATÁRIO', 'INDICADOR IE DESTINATÁRIO',
+    'DESTINO DA OPERAÇÃO', 'CONSUMIDOR FINAL', 'PRESENÇA DO COMPRADOR',
+    'NCM/SH (TIPO DE PRODUTO)', 'CFOP', 'UNIDADE'
+]
+
+# Read as float64 rather than Decimal, which would turn every value column into
+# slow object arrays. With round_trip parsing each value is the closest double to
+# its text, so at most 15 significant digits it converts back to the exact same
+# decimal (DECIMAL(15,2) in the database); only sums computed in pandas can carry
+# float rounding in the last digits.
+NUMERIC_COLUMNS = ['VALOR NOTA FISCAL', 'QUANTIDADE', 'VALOR UNITÁRIO', 'VALOR TOTAL']
+
+DATE_COLUMNS = ['DATA EMISSÃO', 'DATA/HORA EVENTO MAIS RECENTE']
+# Exports use 'YYYY-MM-DD HH:MM:SS'; ISO8601 also accepts date-only values without inference
+DATE_FORMAT = 'ISO8601'
+
+
+def detect_layout(columns):
+    """
+    Identify a known NF-e layout from its header row
+    
+    Args:
+        columns: Header names as found in the file
+        
+    Returns:
+        str: 'items', 'invoices' or None for an unknown layout
+    """
+    names = {str(col).strip() for col in columns}
+    # The items layout repeats most header columns, so it is checked first
+    if set(ITEM_COLUMNS) <= names:
+        return 'items'
+    if set(INVOICE_COLUMNS) <= names:
+        return 'invoices'
+    return None
+
+
+def read_csv_options(columns):
+    """
+    Build explicit pandas.read_csv options for a known layout
+    
+    Keys are matched on the raw header names, which may carry surrounding
+    whitespace. Date columns are read as strings and converted afterwards
+    with ``parse_dates``.
+    
+    Args:
+        columns: Header names as found in the file
+        
+    Returns:
+        tuple: (layout or None, dict of read_csv keyword arguments,
+            list of raw date column names)
+    """
+    layout = detect_layout(columns)
+    if layout is None:
+        return None, {}, []
+    
+    dtype = {}
+    date_columns = []
+    for raw in columns:
+        name = str(raw).strip()
+        if name in STRING_COLUMNS:
+            dtype[raw] = str
+        elif name in CATEGORY_COLUMNS:
+            dtype[raw] = 'category'
+        elif name in NUMERIC_COLUMNS:
+            dtype[raw] = 'float64'
+        elif name in DATE_COLUMNS:
+            dtype[raw] = str
+            date_columns.append(raw)
+    
+    # round_trip makes every float the closest double to the decimal text
+    return layout, {'dtype': dtype, 'float_precision': 'round_trip'}, date_columns
+
+
+def parse_dates(df, date_columns):
+    """
+    Convert date columns in place using the fixed NF-e date format
+    
+    Raises:
+        ValueError: A value is not an ISO 8601 date (for example a dd/mm/yyyy
+            export); no column is converted, so callers can fall back to
+            untyped parsing instead of silently getting empty dates
+    """
+    converted = {}
+    for col in date_columns:
+        name = str(col).strip()
+        target = name if name in df.columns else col
+        if target in df.columns:
+            try:
+                converted[target] = pd.to_datetime(df[target], format=DATE_FORMAT, errors='raise')
+            except (ValueError, TypeError) as e:
+                # pandas appends multi-line hints after the first sentence
+                detail = str(e).splitlines()[0].split(' You might')[0]
+                raise ValueError(f"Column {name} does not match the NF-e date format: {detail}") from e
+    for target, values in converted.items():
+        df[target] = values
+    return df
+
+
+def coerce_dates(df, date_columns):
+    """
+    Convert date columns in place like ``parse_dates``, leaving values that
+    do not match the NF-e date format empty (NaT) instead of failing
+    
+    Returns:
+        dict: Column name -> number of non-empty values that could not be parsed
+    """
+    failures = {}
+    for col in date_columns:
+        name = str(col).strip()
+        target = name if name in df.columns else col
+        if target in df.columns:
+            values = pd.to_datetime(df[target], format=DATE_FORMAT, errors='coerce')
+            failures[name] = int((values.isna() & df[target].notna()).sum())
+            df[target] = values
+    return failures
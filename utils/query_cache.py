@@ -0,0 +1,146 @@
+import os
+import copy
+import time
+import threading
+from collections import OrderedDict
+
+DEFAULT_QUERY_CACHE_ENTRIES = 256
+# Bounds how long writes made by other processes (e.g. ingest_archives.py) stay unseen
+DEFAULT_QUERY_CACHE_TTL = 300
+
+# Data version of each database, shared by every DatabaseManager of this process
+_data_versions = {}
+# Last signature of the stored data seen for each database, see observe_data_signature
+_data_signatures = {}
+_versions_lock = threading.Lock()
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def data_version(namespace):
+    """Current data version of a database (e.g. its URL); 0 until the first bump"""
+    with _versions_lock:
+        return _data_versions.get(namespace, 0)
+
+
+def bump_data_version(namespace):
+    """
+    Mark the data of a database as changed
+    
+    Cached results are keyed by data version, so entries computed before
+    the bump are never served again and age out of the cache.
+    
+    Returns:
+        int: New data version
+    """
+    with _versions_lock:
+        _data_versions[namespace] = _data_versions.get(namespace, 0) + 1
+        return _data_versions[namespace]
+
+
+def observe_data_signature(namespace, signature):
+    """
+    Bump the data version of a database if its stored data changed
+    
+    Writes by other processes do not bump this process' counter; callers
+    read a cheap signature of the stored data (such as row counts and the
+    last load time) and report it here.
+    
+    Returns:
+        int: Current data version
+    """
+    with _versions_lock:
+        if _data_signatures.get(namespace) != signature:
+            _data_signatures[namespace] = signature
+            _data_versions[namespace] = _data_versions.get(namespace, 0) + 1
+        return _data_versions.get(namespace, 0)
+
+
+def shared_cache():
+    """Process-wide QueryCache, created on first use"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = QueryCache()
+        return _shared_cache
+
+
+class QueryCache:
+    """Thread-safe in-memory cache of query results with LRU and TTL eviction"""
+    
+    def __init__(self, max_entries=None, ttl=None):
+        """
+        Args:
+            max_entries (int): Entry limit (default: QUERY_CACHE_ENTRIES or 256)
+            ttl (float): Seconds an entry stays valid (default: QUERY_CACHE_TTL or 300)
+        """
+        if max_entries is None:
+            max_entries = int(os.getenv('QUERY_CACHE_ENTRIES', DEFAULT_QUERY_CACHE_ENTRIES))
+        if ttl is None:
+            ttl = float(os.getenv('QUERY_CACHE_TTL', DEFAULT_QUERY_CACHE_TTL))
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (expiry time, value), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, key, compute, cacheable=None):
+        """
+        Return the cached value of ``key``, computing and storing it on a miss
+        
+        Values are returned as deep copies, so callers cannot alter cached
+        results. Exceptions raised by ``compute`` propagate and nothing is
+        stored. Concurrent misses of one key may both compute it.
+        
+        Args:
+            key: Hashable cache key
+            compute: Callable returning the value
+            cacheable: Optional predicate; computed values it rejects are
+                returned without being stored
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+        
+        value = compute()
+        if cacheable is not None and not cacheable(value):
+            return value
+        
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """
+        Returns:
+            dict: Hits, misses, evictions, current entries and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
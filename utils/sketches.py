@@ -0,0 +1,242 @@
+import base64
+import math
+import numpy as np
+import pandas as pd
+
+# Register indices are taken from the top bits of 64-bit hashes
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+
+def _hash_values(values):
+    """Stable 64-bit hashes of the non-null values (pandas' vectorized SipHash)"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    series = series.dropna()
+    # categorize=False hashes values directly instead of factorizing them first,
+    # which would build the very hash table of distinct values the sketch avoids
+    return pd.util.hash_pandas_object(series, index=False, categorize=False).to_numpy(dtype='uint64')
+
+
+def float_array(values):
+    """float64 numpy array of a Series or array-like, with NA (including pd.NA) as NaN"""
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+    return np.asarray(values, dtype='float64')
+
+
+def _bit_length(array):
+    """Vectorized int.bit_length for uint64 values, exact via frexp on 32-bit halves"""
+    high = (array >> np.uint64(32)).astype('float64')
+    low = (array & np.uint64(0xFFFFFFFF)).astype('float64')
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter with memory fixed by its error bound
+    
+    ``2 ** precision`` one-byte registers give a relative standard error of
+    about 1.04 / sqrt(2 ** precision): 1% needs 16 KB whatever the number
+    of rows. Sketches with the same precision merge by register maximum.
+    """
+    
+    def __init__(self, error=0.01, precision=None):
+        """
+        Args:
+            error (float): Target relative standard error of the estimate
+            precision (int): Number of index bits, overrides ``error``
+        """
+        if precision is None:
+            precision = math.ceil(math.log2((1.04 / error) ** 2))
+        self.precision = min(max(int(precision), MIN_PRECISION), MAX_PRECISION)
+        self.registers = np.zeros(1 << self.precision, dtype='uint8')
+    
+    @property
+    def error(self):
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(len(self.registers))
+    
+    def update(self, values):
+        """
+        Add a chunk of values (nulls are ignored)
+        
+        Returns:
+            HyperLogLog: self
+        """
+        hashes = _hash_values(values)
+        if hashes.size == 0:
+            return self
+        
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype('int64')
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # Position of the leftmost 1-bit in the suffix (suffix_bits + 1 when it is all zeros)
+        rank = (suffix_bits - _bit_length(suffix) + 1).astype('uint8')
+        np.maximum.at(self.registers, index, rank)
+        return self
+    
+    def merge(self, other):
+        """
+        Combine another sketch of the same precision into this one
+        
+        Returns:
+            HyperLogLog: self
+        """
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches of precision {self.precision} and {other.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+    
+    def count(self):
+        """Estimated number of distinct values"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype('int64')).sum()
+        
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+    
+    def to_dict(self):
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(precision=data['precision'])
+        sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype='uint8').copy()
+        return sketch
+
+
+class DDSketch:
+    """
+    Quantile sketch with a relative-accuracy guarantee
+    
+    Values fall into logarithmic buckets of ratio (1 + a) / (1 - a), so any
+    quantile is returned within a relative error ``a`` of a true value of
+    that rank. The number of buckets grows with the log of the value range,
+    not with the row count, and sketches merge by adding bucket counts.
+    """
+    
+    def __init__(self, relative_accuracy=0.01):
+        """
+        Args:
+            relative_accuracy (float): Relative error bound of the quantiles
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+    
+    def update(self, values):
+        """
+        Add a chunk of numeric values (NaN is ignored)
+        
+        Returns:
+            DDSketch: self
+        """
+        array = float_array(values)
+        array = array[np.isfinite(array)]
+        if array.size == 0:
+            return self
+        
+        self.count += int(array.size)
+        self.zeros += int((array == 0).sum())
+        self._add_buckets(self.positive, array[array > 0])
+        self._add_buckets(self.negative, -array[array < 0])
+        
+        minimum, maximum = float(array.min()), float(array.max())
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+        return self
+    
+    def _add_buckets(self, store, magnitudes):
+        if magnitudes.size == 0:
+            return
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype('int64'), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+    
+    def merge(self, other):
+        """
+        Combine another sketch with the same accuracy into this one
+        
+        Returns:
+            DDSketch: self
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge DDSketch sketches with different relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        if other.minimum is not None:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        return self
+    
+    def quantile(self, q):
+        """
+        Approximate q-quantile (0 <= q <= 1), or None for an empty sketch
+        """
+        if self.count == 0:
+            return None
+        
+        rank = q * (self.count - 1)
+        seen = 0
+        # Negative values first, largest magnitude (smallest value) first
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return self._clamp(-self._bucket_value(key))
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._clamp(self._bucket_value(key))
+        return self.maximum
+    
+    def quantiles(self, qs=(0.5, 0.95, 0.99)):
+        """Several quantiles as {'p50': ..., 'p95': ..., 'p99': ...}"""
+        return {f"p{q * 100:g}": self.quantile(q) for q in qs}
+    
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+    
+    def _clamp(self, value):
+        """Keep bucket midpoints inside the exact observed range"""
+        return min(max(value, self.minimum), self.maximum)
+    
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'positive': {str(key): count for key, count in self.positive.items()},
+            'negative': {str(key): count for key, count in self.negative.items()},
+            'zeros': self.zeros,
+            'count': self.count,
+            'min': self.minimum,
+            'max': self.maximum
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.positive = {int(key): count for key, count in data['positive'].items()}
+        sketch.negative = {int(key): count for key, count in data['negative'].items()}
+        sketch.zeros = data['zeros']
+        sketch.count = data['count']
+        sketch.minimum = data['min']
+        sketch.maximum = data['max']
+        return sketch
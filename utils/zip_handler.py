@@ -1,101 +1,517 @@
 import zipfile
+import hashlib
 import pandas as pd
 import tempfile
+import mmap
+import io
 import os
-from io import StringIO
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
 import streamlit as st
+from utils.csv_dialect import DialectDetector
+from utils import nfe_schema
+
+# Uploads that cannot be read in place are spooled to disk past this size
+SPOOL_MAX_MEMORY = 64 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+# Rows per DataFrame yielded by ZipHandler.iter_csv_chunks
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Preflight defaults, overridable with ZIP_MEMORY_BUDGET_MB / ZIP_TIME_BUDGET_SECONDS
+DEFAULT_MEMORY_BUDGET_MB = 1024
+DEFAULT_TIME_BUDGET_SECONDS = 120
+# Parsed DataFrame size relative to the CSV text, measured on the NF-e layouts
+MEMORY_EXPANSION_FACTOR = 2.0
+# Conservative single-core parse throughput used to estimate extraction time
+PARSE_BYTES_PER_SECOND = 20 * 1024 * 1024
+# Archives expanding more than this are treated as ZIP bombs
+MAX_COMPRESSION_RATIO = 200
+ROW_SAMPLE_BYTES = 16 * 1024
+
+
+def _extract_member_from_path(zip_path, member_name, cache=None):
+    """Process pool entry point: each worker opens the archive on its own"""
+    handler = ZipHandler(cache=cache)
+    with handler._open_archive(zip_path) as zip_ref:
+        return handler._extract_member(zip_ref, zip_ref.getinfo(member_name))
+
+
+class _DateParsingReader:
+    """
+    Wraps a chunked pandas reader, converting schema date columns per chunk
+    
+    Chunks already handed out cannot be re-read untyped, so in a chunk whose
+    dates do not match the schema the values that do not parse are left
+    empty. Every chunk keeps datetime columns; the first error is recorded in
+    ``member_stats`` and the unparsed values are counted per column in
+    ``member_stats['date_failures']``.
+    """
+    
+    def __init__(self, reader, date_columns, member_stats=None):
+        self._reader = reader
+        self._date_columns = date_columns
+        self._member_stats = member_stats
+    
+    def __iter__(self):
+        for chunk in self._reader:
+            try:
+                yield nfe_schema.parse_dates(chunk, self._date_columns)
+            except ValueError as e:
+                failures = nfe_schema.coerce_dates(chunk, self._date_columns)
+                if self._member_stats is not None:
+                    if 'schema_error' not in self._member_stats:
+                        self._member_stats['schema_error'] = str(e)
+                        self._member_stats.setdefault('warnings', []).append(f"Unparsed dates left empty: {e}")
+                    counts = self._member_stats.setdefault('date_failures', {})
+                    for col, count in failures.items():
+                        counts[col] = counts.get(col, 0) + count
+                yield chunk
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._reader.close()
+
+
+class _MappedArchive(io.RawIOBase):
+    """Seekable read-only file object over a memory-mapped ZIP archive"""
+    
+    def __init__(self, mapped):
+        self._mapped = mapped
+        self._view = memoryview(mapped)
+        self._pos = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def tell(self):
+        return self._pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._pos
+    
+    def readinto(self, buffer):
+        data = self._view[self._pos:self._pos + len(buffer)]
+        size = len(data)
+        buffer[:size] = data
+        self._pos += size
+        return size
+    
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
 
 class ZipHandler:
     """Handles ZIP file extraction and CSV file identification"""
     
-    def __init__(self):
-        self.supported_encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache: Optional MemberCache; parsed members are then reused across
+                uploads of the same archive by extract_csv_files
+        """
+        self.cache = cache
+        # latin-1 accepts any byte sequence, so it is the last resort
+        self.supported_encodings = ['utf-8', 'cp1252', 'latin-1']
+        self.dialect_detector = DialectDetector(encodings=self.supported_encodings)
+        self.extraction_stats = {}
+        self.member_stats = {}
     
-    def extract_csv_files(self, uploaded_file):
+    def extract_csv_files(self, uploaded_file, parallel=False, max_workers=None, use_processes=False):
         """
         Extract CSV files from uploaded ZIP file
         
+        The archive is read in place (uploaded buffer or memory-mapped file)
+        and each member is decompressed straight into the CSV parser, so no
+        intermediate copy of the archive or of the member text is made.
+        Each member's dialect is sniffed once from a bounded sample and the
+        member is then parsed exactly once. Copy statistics are stored in
+        ``self.extraction_stats`` and per-member dialect, timings and
+        warnings in ``self.member_stats``. With a MemberCache, members whose
+        name, CRC32 and size were seen before are loaded from the cache.
+        
         Args:
-            uploaded_file: Streamlit uploaded file object
-            
+            uploaded_file: Streamlit uploaded file object, file-like object,
+                bytes or path to a ZIP file
+            parallel (bool): Parse members concurrently instead of one by one
+            max_workers (int): Worker count for parallel mode (defaults to
+                one per member, capped at the CPU count)
+            use_processes (bool): Use a process pool instead of threads. Only
+                honoured for archives given as a path, since each worker
+                reopens the archive itself
+                
         Returns:
             dict: Dictionary with filename as key and pandas DataFrame as value
         """
         csv_files = {}
+        self.extraction_stats = {
+            'archive_bytes': 0,
+            'bytes_copied': 0,
+            'bytes_decompressed': 0,
+            'members': 0
+        }
+        self.member_stats = {}
         
         try:
-            # Create temporary file to save uploaded ZIP
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
-            # Extract ZIP file
-            with zipfile.ZipFile(tmp_file_path, 'r') as zip_ref:
-                file_list = zip_ref.namelist()
+            with self._open_archive(uploaded_file) as zip_ref:
+                members = self._csv_members(zip_ref)
                 
-                # Filter CSV files
-                csv_file_names = [f for f in file_list if f.lower().endswith('.csv') and not f.startswith('__MACOSX/')]
+                if parallel and len(members) > 1:
+                    workers = max_workers or min(len(members), os.cpu_count() or 1)
+                    if use_processes and isinstance(uploaded_file, (str, os.PathLike)):
+                        with ProcessPoolExecutor(max_workers=workers) as executor:
+                            results = list(executor.map(
+                                _extract_member_from_path,
+                                [uploaded_file] * len(members),
+                                [info.filename for info in members],
+                                [self.cache] * len(members)
+                            ))
+                    else:
+                        # zipfile serialises reads of the shared archive; inflating and parsing run concurrently
+                        with ThreadPoolExecutor(max_workers=workers) as executor:
+                            results = list(executor.map(lambda info: self._extract_member(zip_ref, info), members))
+                else:
+                    results = [self._extract_member(zip_ref, info) for info in members]
                 
-                for csv_file in csv_file_names:
-                    try:
-                        # Extract CSV file content
-                        with zip_ref.open(csv_file) as file:
-                            content = file.read()
-                            
-                        # Try different encodings to read the CSV
-                        df = None
-                        for encoding in self.supported_encodings:
-                            try:
-                                # Decode content with current encoding
-                                decoded_content = content.decode(encoding)
-                                
-                                # Try different separators
-                                for sep in [',', ';', '\t', '|']:
-                                    try:
-                                        df = pd.read_csv(StringIO(decoded_content), sep=sep)
-                                        # Check if we got meaningful data (more than 1 column)
-                                        if len(df.columns) > 1:
-                                            break
-                                    except:
-                                        continue
-                                
-                                if df is not None and len(df.columns) > 1:
-                                    break
-                                    
-                            except UnicodeDecodeError:
-                                continue
-                        
-                        if df is not None and len(df.columns) > 1:
-                            # Clean column names
-                            df.columns = df.columns.str.strip()
-                            
-                            # Get just the filename without path
-                            clean_filename = os.path.basename(csv_file)
-                            csv_files[clean_filename] = df
-                            
-                        else:
-                            st.warning(f"Could not properly parse CSV file: {csv_file}")
-                            
-                    except Exception as e:
-                        st.warning(f"Error reading CSV file {csv_file}: {str(e)}")
-                        continue
+                for info, (clean_filename, df, member_stats) in zip(members, results):
+                    self.member_stats[clean_filename] = member_stats
+                    
+                    # Warnings are collected per member and shown from the script thread
+                    for message in member_stats['warnings']:
+                        st.warning(message)
+                    
+                    if df is not None:
+                        csv_files[clean_filename] = df
+                        self.extraction_stats['bytes_decompressed'] += info.file_size
+                        self.extraction_stats['members'] += 1
+        
+        except zipfile.BadZipFile:
+            raise Exception("Invalid ZIP file format")
+        except Exception as e:
+            raise Exception(f"Error extracting ZIP file: {str(e)}")
+        
+        return csv_files
+    
+    def _extract_member(self, zip_ref, info):
+        """
+        Read one archive member without touching the Streamlit UI
+        
+        Returns:
+            tuple: (clean filename, DataFrame or None, member statistics)
+        """
+        csv_file = info.filename
+        # Get just the filename without path
+        clean_filename = os.path.basename(csv_file)
+        member_stats = {
+            'size': info.file_size,
+            'compressed_size': info.compress_size,
+            'warnings': []
+        }
+        
+        try:
+            if self.cache is not None:
+                start = time.perf_counter()
+                df = self.cache.get(info)
+                if df is not None:
+                    member_stats['cache'] = 'hit'
+                    member_stats['load_seconds'] = time.perf_counter() - start
+                    return clean_filename, df, member_stats
+                member_stats['cache'] = 'miss'
             
-            # Clean up temporary file
-            os.unlink(tmp_file_path)
+            df, member_stats = self._read_member(zip_ref, info, member_stats)
+            
+            if df is not None and len(df.columns) > 1:
+                # Clean column names
+                df.columns = df.columns.str.strip()
+                if self.cache is not None:
+                    self.cache.put(info, df)
+                return clean_filename, df, member_stats
+            
+            member_stats['warnings'].append(f"Could not properly parse CSV file: {csv_file}")
+        
+        except Exception as e:
+            member_stats['warnings'].append(f"Error reading CSV file {csv_file}: {str(e)}")
+        
+        member_stats['failed'] = True
+        return clean_filename, None, member_stats
+    
+    def iter_csv_chunks(self, uploaded_file, chunksize=DEFAULT_CHUNK_ROWS):
+        """
+        Stream CSV files from a ZIP archive as bounded-size DataFrame chunks
+        
+        Members are read one after another and never materialised whole, so
+        memory use depends on ``chunksize`` rather than on the file size.
+        Statistics are recorded as in ``extract_csv_files`` once each member
+        has been fully read. Warnings are only recorded there, never shown,
+        so streaming also works without a Streamlit session.
+        
+        Args:
+            uploaded_file: Streamlit uploaded file object, file-like object,
+                bytes or path to a ZIP file
+            chunksize (int): Maximum number of rows per chunk
             
+        Yields:
+            tuple: (filename, pandas DataFrame chunk)
+        """
+        self.extraction_stats = {
+            'archive_bytes': 0,
+            'bytes_copied': 0,
+            'bytes_decompressed': 0,
+            'members': 0
+        }
+        self.member_stats = {}
+        
+        try:
+            with self._open_archive(uploaded_file) as zip_ref:
+                for info in self._csv_members(zip_ref):
+                    csv_file = info.filename
+                    clean_filename = os.path.basename(csv_file)
+                    member_stats = {
+                        'size': info.file_size,
+                        'compressed_size': info.compress_size,
+                        'warnings': [],
+                        'chunks': 0,
+                        'rows': 0
+                    }
+                    self.member_stats[clean_filename] = member_stats
+                    
+                    with zip_ref.open(info) as file:
+                        dialect = self.dialect_detector.detect(file)
+                    member_stats['dialect'] = dialect
+                    member_stats['detection_seconds'] = dialect['detection_seconds']
+                    
+                    if dialect['field_count'] < 2:
+                        message = f"Could not properly parse CSV file: {csv_file}"
+                        member_stats['warnings'].append(message)
+                        member_stats['failed'] = True
+                        continue
+                    
+                    # A chunk already handed to the caller cannot be re-read, so decode errors are fatal here
+                    with zip_ref.open(info) as file:
+                        with self._read_csv(file, dialect, dialect['encoding'], chunksize=chunksize,
+                                            member_stats=member_stats) as reader:
+                            for chunk in reader:
+                                chunk.columns = chunk.columns.str.strip()
+                                member_stats['chunks'] += 1
+                                member_stats['rows'] += len(chunk)
+                                yield clean_filename, chunk
+                    
+                    self.extraction_stats['bytes_decompressed'] += info.file_size
+                    self.extraction_stats['members'] += 1
+        
         except zipfile.BadZipFile:
             raise Exception("Invalid ZIP file format")
         except Exception as e:
             raise Exception(f"Error extracting ZIP file: {str(e)}")
+    
+    def failed_members(self):
+        """
+        Members of the last extraction that could not be read
         
-        return csv_files
+        Their warnings in ``self.member_stats`` say why. An archive with
+        failed members should not be recorded as ingested, so that loading
+        it again retries them.
+        
+        Returns:
+            list: Member filenames
+        """
+        return [name for name, stats in self.member_stats.items() if stats.get('failed')]
+    
+    def member_warnings(self):
+        """
+        Warnings of the last extraction, prefixed with their member filename
+        
+        Includes the number of dates left empty per column when a streamed
+        member did not match the NF-e date format.
+        
+        Returns:
+            list: Messages, ready to print or show
+        """
+        messages = []
+        for name, stats in self.member_stats.items():
+            messages.extend(f"{name}: {message}" for message in stats.get('warnings', []))
+            for col, count in stats.get('date_failures', {}).items():
+                if count:
+                    messages.append(f"{name}: {count:,} {col} values did not parse and were left empty")
+        return messages
+    
+    def _read_member(self, zip_ref, info, member_stats):
+        """
+        Sniff the dialect of one archive member and parse it in a single pass
+        
+        Returns:
+            tuple: (DataFrame or None, member statistics dictionary)
+        """
+        with zip_ref.open(info) as file:
+            dialect = self.dialect_detector.detect(file)
+        
+        member_stats['dialect'] = dialect
+        member_stats['detection_seconds'] = dialect['detection_seconds']
+        
+        if dialect['field_count'] < 2:
+            return None, member_stats
+        
+        start = time.perf_counter()
+        try:
+            df = self._parse_member(zip_ref, info, dialect, dialect['encoding'])
+        except UnicodeDecodeError:
+            # The sample decoded cleanly but a later byte did not
+            dialect['encoding'] = self.supported_encodings[-1]
+            dialect['encoding_fallback'] = True
+            df = self._parse_member(zip_ref, info, dialect, dialect['encoding'])
+        except ValueError as e:
+            if not dialect.get('layout'):
+                raise
+            # A value did not fit the NF-e schema; fall back to type inference
+            member_stats['schema_error'] = str(e)
+            df = self._parse_member(zip_ref, info, dialect, dialect['encoding'], typed=False)
+        member_stats['parse_seconds'] = time.perf_counter() - start
+        
+        return df, member_stats
+    
+    def _parse_member(self, zip_ref, info, dialect, encoding, typed=True):
+        """Stream an archive member's decompressed bytes into pandas"""
+        with zip_ref.open(info) as file:
+            return self._read_csv(file, dialect, encoding, typed=typed)
+    
+    def _read_csv(self, file, dialect, encoding, chunksize=None, typed=True, member_stats=None):
+        """
+        Run the CSV parser with a detected dialect
+        
+        Known NF-e layouts are parsed with their explicit schema instead of
+        pandas type inference; the detected layout is stored in the dialect.
+        Chunked reads record schema date errors in ``member_stats``.
+        """
+        layout, options, date_columns = nfe_schema.read_csv_options(dialect.get('columns', []) if typed else [])
+        if typed:
+            dialect['layout'] = layout
+        
+        reader = pd.read_csv(
+            file,
+            sep=dialect['delimiter'],
+            quotechar=dialect['quotechar'],
+            encoding=encoding,
+            skiprows=dialect['header_row'] or None,
+            chunksize=chunksize,
+            **options
+        )
+        if not date_columns:
+            return reader
+        if chunksize is None:
+            return nfe_schema.parse_dates(reader, date_columns)
+        return _DateParsingReader(reader, date_columns, member_stats)
+    
+    def _csv_members(self, zip_ref):
+        """List the CSV members of an open archive"""
+        return [
+            info for info in zip_ref.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith('.csv')
+            and not info.filename.startswith('__MACOSX/')
+        ]
+    
+    @contextmanager
+    def _open_archive(self, source):
+        """
+        Open a ZIP archive without copying it when possible
+        
+        Paths are memory-mapped, seekable buffers (such as Streamlit uploads)
+        are read in place and only non-seekable streams are spooled.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as fh:
+                size = os.fstat(fh.fileno()).st_size
+                self.extraction_stats['archive_bytes'] = size
+                if size == 0:
+                    raise zipfile.BadZipFile("File is empty")
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    archive = _MappedArchive(mapped)
+                    try:
+                        with zipfile.ZipFile(archive, 'r') as zip_ref:
+                            yield zip_ref
+                    finally:
+                        archive.close()
+            return
+        
+        if hasattr(source, 'seekable') and source.seekable():
+            source.seek(0, io.SEEK_END)
+            self.extraction_stats['archive_bytes'] = source.tell()
+            source.seek(0)
+            with zipfile.ZipFile(source, 'r') as zip_ref:
+                yield zip_ref
+            return
+        
+        # Non-seekable stream: spool once, in bounded chunks
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, suffix='.zip') as spool:
+            copied = 0
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+                copied += len(chunk)
+            spool.seek(0)
+            self.extraction_stats['archive_bytes'] = copied
+            self.extraction_stats['bytes_copied'] = copied
+            with zipfile.ZipFile(spool, 'r') as zip_ref:
+                yield zip_ref
+    
+    def get_archive_fingerprint(self, uploaded_file):
+        """
+        Fingerprint an archive from its central directory
+        
+        Only the member names, CRC32s and sizes recorded in the ZIP directory
+        are hashed, so no member is decompressed. Archives with the same CSV
+        contents get the same fingerprint even if they were re-zipped.
+        
+        Args:
+            uploaded_file: Streamlit uploaded file object, file-like object,
+                bytes or path to a ZIP file
+            
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        try:
+            with self._open_archive(uploaded_file) as zip_ref:
+                entries = sorted(
+                    (os.path.basename(info.filename), info.CRC, info.file_size)
+                    for info in self._csv_members(zip_ref)
+                )
+        except zipfile.BadZipFile:
+            raise Exception("Invalid ZIP file format")
+        
+        digest = hashlib.sha256()
+        for name, crc, size in entries:
+            digest.update(f"{name}\0{crc:08x}\0{size}\n".encode('utf-8'))
+        return digest.hexdigest()
     
     def get_file_info(self, zip_path):
         """
         Get information about files in the ZIP archive
         
+        Only the central directory is read; nothing is decompressed.
+        
         Args:
-            zip_path: Path to ZIP file
+            zip_path: Path to ZIP file, Streamlit uploaded file object,
+                file-like object or bytes
             
         Returns:
             list: List of file information dictionaries
@@ -103,16 +519,111 @@ class ZipHandler:
         file_info = []
         
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                for info in zip_ref.infolist():
-                    if not info.is_dir() and info.filename.lower().endswith('.csv'):
-                        file_info.append({
-                            'filename': os.path.basename(info.filename),
-                            'size': info.file_size,
-                            'compressed_size': info.compress_size,
-                            'date_modified': info.date_time
-                        })
+            with self._open_archive(zip_path) as zip_ref:
+                for info in self._csv_members(zip_ref):
+                    file_info.append({
+                        'filename': os.path.basename(info.filename),
+                        'member': info.filename,
+                        'size': info.file_size,
+                        'compressed_size': info.compress_size,
+                        'compression_ratio': info.file_size / info.compress_size if info.compress_size else 0.0,
+                        'date_modified': info.date_time
+                    })
         except Exception as e:
             raise Exception(f"Error reading ZIP file info: {str(e)}")
         
         return file_info
+
+    def preflight(self, uploaded_file, memory_budget_bytes=None, time_budget_seconds=None):
+        """
+        Size up an archive before extracting it and decide how to process it
+        
+        Sizes and compression ratios come from the central directory. Row
+        counts are estimated from the average line length of a small sample
+        (ROW_SAMPLE_BYTES) at the start of each member, so at most a few
+        kilobytes per member are decompressed.
+        
+        Args:
+            uploaded_file: Streamlit uploaded file object, file-like object,
+                bytes or path to a ZIP file
+            memory_budget_bytes (int): Memory allowed for in-memory extraction
+                (default: ZIP_MEMORY_BUDGET_MB megabytes)
+            time_budget_seconds (float): Time allowed for processing inside the
+                app (default: ZIP_TIME_BUDGET_SECONDS)
+            
+        Returns:
+            dict: Manifest with per-member estimates and a 'mode' of
+                'memory' (extract_csv_files), 'streaming' (iter_csv_chunks),
+                'offline' (too slow for the app, use ingest_archives.py) or
+                'reject', with the 'reasons' for the decision
+        """
+        if memory_budget_bytes is None:
+            memory_budget_bytes = float(os.getenv('ZIP_MEMORY_BUDGET_MB', DEFAULT_MEMORY_BUDGET_MB)) * 1024 * 1024
+        if time_budget_seconds is None:
+            time_budget_seconds = float(os.getenv('ZIP_TIME_BUDGET_SECONDS', DEFAULT_TIME_BUDGET_SECONDS))
+        
+        members = self.get_file_info(uploaded_file)
+        
+        try:
+            with self._open_archive(uploaded_file) as zip_ref:
+                for member in members:
+                    member['estimated_rows'] = self._estimate_rows(zip_ref, member['member'], member['size'])
+                    member['estimated_memory_bytes'] = int(member['size'] * MEMORY_EXPANSION_FACTOR)
+        except zipfile.BadZipFile:
+            raise Exception("Invalid ZIP file format")
+        
+        total_size = sum(member['size'] for member in members)
+        total_compressed = sum(member['compressed_size'] for member in members)
+        # Members are parsed one at a time, but all results are held together
+        estimated_memory = sum(member['estimated_memory_bytes'] for member in members)
+        estimated_seconds = total_size / PARSE_BYTES_PER_SECOND
+        
+        manifest = {
+            'members': members,
+            'total_size': total_size,
+            'total_compressed_size': total_compressed,
+            'compression_ratio': total_size / total_compressed if total_compressed else 0.0,
+            'estimated_rows': sum(member['estimated_rows'] for member in members),
+            'estimated_memory_bytes': estimated_memory,
+            'estimated_seconds': estimated_seconds,
+            'memory_budget_bytes': memory_budget_bytes,
+            'time_budget_seconds': time_budget_seconds,
+            'reasons': []
+        }
+        
+        suspicious = [m['filename'] for m in members if m['compression_ratio'] > MAX_COMPRESSION_RATIO]
+        if not members:
+            manifest['mode'] = 'reject'
+            manifest['reasons'].append("No CSV files in archive")
+        elif suspicious:
+            manifest['mode'] = 'reject'
+            manifest['reasons'].append(f"Compression ratio above {MAX_COMPRESSION_RATIO}:1 in {', '.join(suspicious)}")
+        elif estimated_seconds > time_budget_seconds:
+            manifest['mode'] = 'offline'
+            manifest['reasons'].append(
+                f"Estimated {estimated_seconds:.0f}s exceeds the {time_budget_seconds:.0f}s time budget"
+            )
+        elif estimated_memory > memory_budget_bytes:
+            manifest['mode'] = 'streaming'
+            manifest['reasons'].append(
+                f"Estimated {estimated_memory / 1024 / 1024:.0f} MB exceeds the "
+                f"{memory_budget_bytes / 1024 / 1024:.0f} MB memory budget"
+            )
+        else:
+            manifest['mode'] = 'memory'
+        
+        return manifest
+    
+    def _estimate_rows(self, zip_ref, member_name, size):
+        """Estimate a member's row count from the line length of its first bytes"""
+        with zip_ref.open(member_name) as file:
+            sample = file.read(ROW_SAMPLE_BYTES)
+        
+        lines = sample.count(b'\n')
+        if len(sample) >= size:
+            # The whole member fit in the sample: count exactly (minus the header)
+            records = lines if sample.endswith(b'\n') else lines + 1
+            return max(records - 1, 0)
+        if lines == 0:
+            return 0
+        return max(int(size / (len(sample) / lines)) - 1, 0)